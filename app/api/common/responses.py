@@ -0,0 +1,54 @@
+"""
+Fast JSON responses.
+
+Routes with a response_model are already encoded to JSON bytes by
+pydantic-core, as long as they keep FastAPI's default response class, so
+FastJSONResponse (orjson, falling back to the standard library) is only the
+response class of the routes returning plain dicts, such as the health
+checks. Installing it as the application default would switch the
+response_model routes back to building a dict and encoding it in Python.
+
+trusted_response() is for models the application built itself from
+already validated data. FastAPI would validate such a model again against
+the route's response_model (in the threadpool, for sync endpoints) before
+encoding it. trusted_response() instead serializes the model with its
+cached TypeAdapter and returns a Response, which FastAPI passes through
+untouched. The route's response_model still documents the schema in
+OpenAPI.
+"""
+
+from typing import Any, Mapping, Optional
+import json
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.schemas.adapters import type_adapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def trusted_response(model: BaseModel, status_code: int = 200, headers: Optional[Mapping[str, str]] = None):
+    """
+    Return model as a JSON response without re-validating it. Falls back to
+    returning the model itself (FastAPI's validating path) when
+    FAST_RESPONSES_ENABLED is off.
+    """
+    if not settings.FAST_RESPONSES_ENABLED:
+        return model
+    return Response(
+        content=type_adapter(type(model)).dump_json(model),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
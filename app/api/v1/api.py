@@ -1,63 +1,100 @@
 from fastapi import HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import select, insert, func, or_, tuple_
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.models.models import DnsRequest
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_db, get_async_db, get_read_db, get_async_read_db, replica_configured, SessionLocal, AsyncSessionLocal, AsyncReadSessionLocal
+from app.models.models import DnsRequest, DnsRecord, DnsRequestEvent
 from app.schemas.request import DnsRequestCreate
-from app.schemas.response import DnsRequestStatus, ResponseContext, LogMessage
-from app.core.logging import get_logger
-from app.celery.tasks import provision_dns_record
+from app.schemas.response import DnsRequestStatus, ResponseContext, DnsRequestBatchItemResult, DnsRequestBatchStatus, DnsRequestHistory, DnsRequestHistoryEntry, DnsRequestSummary, DnsRequestPage, DnsRecordSummary, DnsRecordPage
+from app.core.logging import get_logger, bind_log_context
+from app.utils.ids import uuid7
+from app.utils.dns import normalize_domain
+from app.api.common.pagination import encode_cursor, decode_cursor
+from app.core.status_cache import status_cache, StatusSnapshot
+from app.core.notifications import notify_status_change, anotify_status_change, status_broadcaster
+from app.core.domain_index import check_conflict, check_conflicts, notify_new_requests, index_new_requests
+from app.core.request_events import record_event, record_events, arecord_event
+from app.core.read_routing import read_from_primary, mark_written
+from app.core.timing import span
+from app.core.idempotency import (
+    request_fingerprint, request_body_hash, find_idempotency_keys, idempotency_row,
+    store_idempotency_keys, lock_fingerprints, find_pending_duplicates, replay_response
+)
+from app.celery.outbox import stage_provisioning, publish_provisioning, outbox_enabled
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Optional
+from datetime import datetime
+import asyncio
 import uuid
 
 logger = get_logger(__name__)
 
-def create_dns_request_logic(
-    request: DnsRequestCreate,
-    db: Session = Depends(get_db)
-):
-    try:
-        logger.info(f"Received DNS request for domain {request.resource.domain} from source {request.context.source}")
-        db_request = DnsRequest(
-            record_type=request.resource.record_type,
-            domain=request.resource.domain,
-            target=request.resource.target,
-            comment=request.resource.comment,
-            status="PENDING",
-            source=request.context.source,
-            config=request.resource.config.model_dump() if request.resource.config else None,
-            log_messages=[LogMessage(status="INFO", message="Received new DNS request.").model_dump()]
-        )
-        db.add(db_request)
-        db.commit()
-        db.refresh(db_request)
+RECEIVED_MESSAGE = "Received new DNS request."
+SUBMITTED_MESSAGE = "DNS request submitted and is being processed."
+DUPLICATE_MESSAGE = "An identical DNS request is already pending; returning its ID."
+KEY_REUSED_MESSAGE = "Idempotency-Key was already used for a different request."
 
-        provision_dns_record.apply_async(args=[str(db_request.id)], queue='dns_tasks')
+def _build_dns_request(request: DnsRequestCreate, content_hash: Optional[str] = None) -> DnsRequest:
+    # The ID is assigned up front so history can be written in the same transaction
+    return DnsRequest(
+        id=uuid7(),
+        record_type=request.resource.record_type,
+        domain=request.resource.domain,
+        target=request.resource.target,
+        comment=request.resource.comment,
+        status="PENDING",
+        source=request.context.source,
+        account_id=request.context.account_id,
+        content_hash=content_hash,
+        config=request.resource.config.model_dump() if request.resource.config else None
+    )
 
-        logger.info(f"DNS request {db_request.id} submitted to Celery")
+def _dns_request_values(request: DnsRequestCreate, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    # Column values for a Core multi-row INSERT; the ID is generated here so
+    # every row in the statement carries its own key.
+    return {
+        "id": uuid7(),
+        "record_type": request.resource.record_type,
+        "domain": request.resource.domain,
+        "target": request.resource.target,
+        "comment": request.resource.comment,
+        "status": "PENDING",
+        "source": request.context.source,
+        "account_id": request.context.account_id,
+        "content_hash": content_hash,
+        "config": request.resource.config.model_dump() if request.resource.config else None,
+    }
 
-        return DnsRequestStatus(
-            context=ResponseContext(
-                request_id=db_request.id,
-                partition=request.context.partition,
-                service=request.context.service,
-                region=request.context.region,
-                account_id=request.context.account_id
-            ),
-            status="PENDING",
-            message="DNS request submitted and is being processed."
-        )
-    except Exception as e:
-        logger.error(f"Error creating DNS request: {e}")
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+def _index_row(request) -> tuple:
+    # (request_id, record_type, domain, target) for the domain index, from a
+    # DnsRequest or a row of _dns_request_values
+    if isinstance(request, dict):
+        return request["id"], request["record_type"], request["domain"], request["target"]
+    return request.id, request.record_type, request.domain, request.target
 
-def get_dns_request_status_logic(
-    request_id: uuid.UUID,
-    db: Session = Depends(get_db)
-):
-    db_request = db.query(DnsRequest).filter(DnsRequest.id == request_id).first()
-    if not db_request:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DNS Request not found")
+def _format_validation_error(error: ValidationError) -> str:
+    # Errors about the whole input (not a dict, not JSON) have no location
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" if err['loc'] else err['msg']
+        for err in error.errors()
+    )
 
+def _submitted_response(request: DnsRequestCreate, request_id: uuid.UUID, message: str = SUBMITTED_MESSAGE) -> DnsRequestStatus:
+    return DnsRequestStatus(
+        context=ResponseContext(
+            request_id=request_id,
+            partition=request.context.partition,
+            service=request.context.service,
+            region=request.context.region,
+            account_id=request.context.account_id
+        ),
+        status="PENDING",
+        message=message
+    )
+
+def _status_response(db_request: DnsRequest, message: str) -> DnsRequestStatus:
     return DnsRequestStatus(
         context=ResponseContext(
             request_id=db_request.id,
@@ -67,31 +104,569 @@ def get_dns_request_status_logic(
             account_id="123456789012"
         ),
         status=db_request.status,
-        message=f"DNS request status: {db_request.status}"
+        message=message
+    )
+
+def _stage_dns_request(db: Session, request: DnsRequestCreate, idempotency_key: Optional[str] = None):
+    """
+    Stage a create in the session's transaction without committing.
+    Raises a 409 when the domain index finds the request conflicting.
+    Returns (response, new_request). new_request is None when the response
+    is a replay or points at a PENDING duplicate; response is None when a
+    concurrent call claimed the same idempotency key first, in which case
+    the caller rolls back and stages again to replay that call's response.
+    """
+    account_id = request.context.account_id
+    body_hash = request_body_hash(request) if idempotency_key else None
+    if idempotency_key:
+        stored = find_idempotency_keys(db, [(account_id, idempotency_key)]).get((account_id, idempotency_key))
+        if stored is not None:
+            response = replay_response(stored, body_hash)
+            if response is None:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=KEY_REUSED_MESSAGE)
+            logger.info("Replaying response for idempotency key %s (request %s)", idempotency_key, response.context.request_id)
+            return response, None
+
+    conflict = check_conflict(request)
+    if conflict is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict)
+
+    fingerprint = request_fingerprint(request)
+    duplicate_of = None
+    if settings.DEDUP_PENDING_REQUESTS:
+        lock_fingerprints(db, [fingerprint])
+        duplicate_of = find_pending_duplicates(db, [fingerprint]).get(fingerprint)
+
+    if duplicate_of is not None:
+        logger.info("DNS request for %s duplicates pending request %s", request.resource.domain, duplicate_of)
+        new_request = None
+        response = _submitted_response(request, duplicate_of, DUPLICATE_MESSAGE)
+    else:
+        new_request = _build_dns_request(request, fingerprint)
+        db.add(new_request)
+        notify_new_requests(db, [_index_row(new_request)])
+        record_event(db, new_request.id, "INFO", RECEIVED_MESSAGE)
+        stage_provisioning(db, [new_request.id])
+        response = _submitted_response(request, new_request.id)
+
+    if idempotency_key and not store_idempotency_keys(db, [idempotency_row(account_id, idempotency_key, body_hash, response)]):
+        return None, None
+    return response, new_request
+
+def create_dns_request_logic(
+    request: DnsRequestCreate,
+    idempotency_key: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        bind_log_context(account_id=request.context.account_id)
+        logger.info("Received DNS request for domain %s from source %s", request.resource.domain, request.context.source)
+        with span("stage"):
+            response, db_request = _stage_dns_request(db, request, idempotency_key)
+            if response is None:
+                db.rollback()
+                response, db_request = _stage_dns_request(db, request, idempotency_key)
+        if response is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Idempotency-Key is in use by a concurrent request")
+        bind_log_context(request_id=str(response.context.request_id))
+        with span("commit"):
+            db.commit()
+
+        if db_request is not None:
+            index_new_requests([_index_row(db_request)])
+            with span("publish"):
+                publish_provisioning([db_request.id])
+            logger.info("DNS request %s submitted for provisioning", db_request.id)
+
+        return response
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        logger.error("Error creating DNS request: %s", e)
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+def create_dns_requests_bulk(
+    requests: List[DnsRequestCreate],
+    db: Session,
+    idempotency_keys: Optional[List[Optional[str]]] = None
+) -> List[uuid.UUID]:
+    """
+    Persist many DNS requests and their outbox rows with a single multi-row
+    INSERT ... RETURNING and commit once (in direct dispatch mode the tasks
+    are then published over one producer).
+    Returns the request IDs in the same order as the input.
+
+    Requests whose idempotency key was already stored get the stored
+    request ID back, as do duplicates of a PENDING request when
+    DEDUP_PENDING_REQUESTS is on; neither is inserted or published again.
+    Raises RuntimeError if a key is claimed concurrently; rolling back and
+    retrying the batch then replays it.
+    """
+    if not requests:
+        return []
+    idempotency_keys = idempotency_keys or [None] * len(requests)
+    scoped_keys = [(request.context.account_id, key) if key else None for request, key in zip(requests, idempotency_keys)]
+    stored = find_idempotency_keys(db, [scoped for scoped in scoped_keys if scoped])
+    fingerprints = [request_fingerprint(request) for request in requests]
+    pending: Dict[str, uuid.UUID] = {}
+    if settings.DEDUP_PENDING_REQUESTS:
+        lock_fingerprints(db, fingerprints)
+        pending = find_pending_duplicates(db, fingerprints)
+
+    request_ids: List[uuid.UUID] = []
+    rows = []
+    key_rows = {}
+    for request, scoped, fingerprint in zip(requests, scoped_keys, fingerprints):
+        if scoped in stored:
+            request_ids.append(stored[scoped].request_id)
+            continue
+        if scoped in key_rows:
+            # Same key twice in one batch, e.g. a message produced twice
+            request_ids.append(key_rows[scoped]["request_id"])
+            continue
+        if fingerprint in pending:
+            request_id = pending[fingerprint]
+            message = DUPLICATE_MESSAGE
+        else:
+            row = _dns_request_values(request, fingerprint)
+            rows.append(row)
+            request_id = row["id"]
+            message = SUBMITTED_MESSAGE
+            if settings.DEDUP_PENDING_REQUESTS:
+                pending[fingerprint] = request_id
+        request_ids.append(request_id)
+        if scoped:
+            response = _submitted_response(request, request_id, message)
+            key_rows[scoped] = idempotency_row(scoped[0], scoped[1], request_body_hash(request), response)
+
+    if rows:
+        result = db.execute(insert(DnsRequest).values(rows).returning(DnsRequest.id))
+        inserted = {row.id for row in result}
+        if len(inserted) != len(rows):
+            raise RuntimeError(f"Bulk insert returned {len(inserted)} rows, expected {len(rows)}")
+        record_events(db, [(row["id"], "INFO", RECEIVED_MESSAGE) for row in rows])
+        stage_provisioning(db, [row["id"] for row in rows])
+        notify_new_requests(db, [_index_row(row) for row in rows])
+    if not store_idempotency_keys(db, list(key_rows.values())):
+        raise RuntimeError("Idempotency keys in this batch were claimed concurrently")
+    with span("commit"):
+        db.commit()
+    index_new_requests([_index_row(row) for row in rows])
+
+    with span("publish"):
+        publish_provisioning([row["id"] for row in rows])
+    logger.info("%d of %d DNS requests submitted for provisioning", len(rows), len(requests))
+    return request_ids
+
+def create_dns_request_batch_logic(
+    items: List[Dict[str, Any]],
+    db: Session = Depends(get_db)
+):
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds the maximum of {settings.BATCH_MAX_ITEMS} items"
+        )
+
+    # Validate every item up front so one bad record does not reject the rest
+    results: List[DnsRequestBatchItemResult] = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, DnsRequestCreate.model_validate(item)))
+        except ValidationError as e:
+            results[index] = DnsRequestBatchItemResult(index=index, error=_format_validation_error(e))
+
+    # Conflicts with existing names, or with earlier items of this batch
+    conflicts = check_conflicts([request for _, request in valid])
+    for (index, _), conflict in zip(valid, conflicts):
+        if conflict is not None:
+            results[index] = DnsRequestBatchItemResult(index=index, error=conflict)
+    valid = [item for item, conflict in zip(valid, conflicts) if conflict is None]
+
+    logger.info("Received DNS batch of %d items, %d valid", len(items), len(valid))
+    if valid:
+        try:
+            request_ids = create_dns_requests_bulk([request for _, request in valid], db)
+        except Exception as e:
+            logger.error("Error creating DNS request batch: %s", e)
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        for (index, request), request_id in zip(valid, request_ids):
+            results[index] = DnsRequestBatchItemResult(index=index, result=_submitted_response(request, request_id))
+
+    return DnsRequestBatchStatus(
+        accepted=len(valid),
+        rejected=len(items) - len(valid),
+        results=results
     )
 
+def build_status_response(snapshot: StatusSnapshot) -> DnsRequestStatus:
+    return _status_response(snapshot, f"DNS request status: {snapshot.status}")
+
+def _status_query(request_id: uuid.UUID):
+    return select(DnsRequest.id, DnsRequest.status, DnsRequest.updated_at).where(DnsRequest.id_clause(request_id))
+
+def get_dns_request_status_snapshot_logic(
+    request_id: uuid.UUID,
+    db: Session = Depends(get_read_db)
+) -> StatusSnapshot:
+    """
+    Read-through lookup of a request's status: cache first, then the database.
+    db is a read session; requests written within the read-your-writes window,
+    or not yet on the replica, are read from the primary instead.
+    """
+    snapshot, generation = status_cache.read(request_id)
+    if snapshot is None:
+        replica = replica_configured()
+        row = None
+        if not read_from_primary(request_id):
+            row = db.execute(_status_query(request_id)).first()
+        from_replica = replica and row is not None
+        if row is None and replica:
+            with SessionLocal() as primary:
+                row = primary.execute(_status_query(request_id)).first()
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DNS Request not found")
+        snapshot = StatusSnapshot.from_row(row)
+        status_cache.set(snapshot, shared=not from_replica, generation=generation)
+    return snapshot
+
+def get_dns_request_status_logic(
+    request_id: uuid.UUID,
+    db: Session = Depends(get_read_db)
+):
+    return build_status_response(get_dns_request_status_snapshot_logic(request_id=request_id, db=db))
+
 def update_dns_request_status_logic(
     request_id: uuid.UUID,
     new_status: str,
     db: Session = Depends(get_db)
 ):
-    db_request = db.query(DnsRequest).filter(DnsRequest.id == request_id).first()
+    bind_log_context(request_id=str(request_id))
+    db_request = db.query(DnsRequest).filter(DnsRequest.id_clause(request_id)).first()
     if not db_request:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DNS Request not found")
 
     db_request.status = new_status
     db.add(db_request)
-    db.commit()
-    db.refresh(db_request)
+    record_event(db, request_id, "INFO", f"Status updated to {new_status}.")
+    notify_status_change(db, request_id, new_status)
+    with span("commit"):
+        db.commit()
+    mark_written(request_id)
+    status_cache.invalidate(request_id)
+    with span("refresh"):
+        db.refresh(db_request)
 
-    return DnsRequestStatus(
-        context=ResponseContext(
-            request_id=db_request.id,
-            partition="default",
-            service="dns",
-            region="us-east-1",
-            account_id="123456789012"
-        ),
-        status=db_request.status,
-        message=f"DNS request status updated to: {db_request.status}"
+    return _status_response(db_request, f"DNS request status updated to: {db_request.status}")
+
+def _history_events(db: Session, request_id: uuid.UUID, after: Optional[int], limit: int) -> Optional[List[DnsRequestEvent]]:
+    # Returns None when the request does not exist in this database
+    query = db.query(DnsRequestEvent).filter(DnsRequestEvent.request_id == request_id)
+    if after is not None:
+        query = query.filter(DnsRequestEvent.id > after)
+    # Fetch one extra row to learn whether another page exists
+    events = query.order_by(DnsRequestEvent.id).limit(limit + 1).all()
+
+    if not events and after is None:
+        if not db.query(DnsRequest.id).filter(DnsRequest.id_clause(request_id)).first():
+            return None
+    return events
+
+def get_dns_request_history_logic(
+    request_id: uuid.UUID,
+    after: Optional[int] = None,
+    limit: int = 50,
+    db: Session = Depends(get_read_db)
+):
+    """
+    One page of a request's history, oldest first. Pages are keyed on the
+    last event ID seen (after), so each page is a single index range scan
+    no matter how deep into the history it is. Read-your-writes is handled
+    as in get_dns_request_status_snapshot_logic.
+    """
+    events = None
+    if not read_from_primary(request_id):
+        events = _history_events(db, request_id, after, limit)
+    if events is None and replica_configured():
+        with SessionLocal() as primary:
+            events = _history_events(primary, request_id, after, limit)
+    if events is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DNS Request not found")
+
+    has_more = len(events) > limit
+    events = events[:limit]
+    return DnsRequestHistory(
+        request_id=request_id,
+        events=[
+            DnsRequestHistoryEntry(id=event.id, timestamp=event.created_at, status=event.status, message=event.message)
+            for event in events
+        ],
+        next_after=events[-1].id if has_more else None
     )
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _domain_conditions(column, domain: Optional[str], domain_suffix: Optional[str], domain_contains: Optional[str]) -> list:
+    # Each condition matches the expression of one of the domain indexes in migration 0004
+    lowered = func.lower(column)
+    conditions = []
+    if domain:
+        conditions.append(lowered == normalize_domain(domain))
+    if domain_suffix:
+        # Match on label boundaries: "example.com" matches itself and "www.example.com",
+        # not "badexample.com". The suffix test is a prefix LIKE on the reversed name.
+        suffix = normalize_domain(domain_suffix).lstrip(".")
+        conditions.append(or_(
+            lowered == suffix,
+            func.reverse(lowered).like(_escape_like(("." + suffix)[::-1]) + "%", escape="\\")
+        ))
+    if domain_contains:
+        conditions.append(lowered.like("%" + _escape_like(domain_contains.lower()) + "%", escape="\\"))
+    return conditions
+
+def _keyset_page(query, sort_column, id_column, cursor: Optional[str], limit: int):
+    """
+    Apply newest-first keyset pagination on (sort_column, id_column) and
+    return (rows, next_cursor). The cursor holds the last row's position,
+    so deep pages cost the same as the first one.
+    """
+    if cursor:
+        try:
+            sort_value, row_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]._mapping
+    return rows, encode_cursor(last[sort_column.key], last[id_column.key])
+
+def list_dns_requests_logic(
+    status_filter: Optional[List[str]] = None,
+    domain: Optional[str] = None,
+    domain_suffix: Optional[str] = None,
+    domain_contains: Optional[str] = None,
+    record_type: Optional[str] = None,
+    source: Optional[str] = None,
+    account_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_read_db)
+):
+    """
+    List DNS requests matching all given filters, newest first.
+    Only the summary columns are selected; config and history stay in the table.
+    """
+    query = db.query(
+        DnsRequest.id, DnsRequest.account_id, DnsRequest.record_type, DnsRequest.domain, DnsRequest.target,
+        DnsRequest.status, DnsRequest.source, DnsRequest.created_at, DnsRequest.updated_at
+    )
+    conditions = _domain_conditions(DnsRequest.domain, domain, domain_suffix, domain_contains)
+    if status_filter:
+        conditions.append(DnsRequest.status.in_(status_filter))
+    if record_type:
+        conditions.append(DnsRequest.record_type == record_type)
+    if source:
+        conditions.append(DnsRequest.source == source)
+    if account_id:
+        conditions.append(DnsRequest.account_id == account_id)
+    # created_at is the partition key, so a range here also prunes partitions
+    if created_after:
+        conditions.append(DnsRequest.created_at >= created_after)
+    if created_before:
+        conditions.append(DnsRequest.created_at < created_before)
+
+    rows, next_cursor = _keyset_page(query.filter(*conditions), DnsRequest.created_at, DnsRequest.id, cursor, limit)
+    return DnsRequestPage(
+        items=[DnsRequestSummary.model_validate(dict(row._mapping)) for row in rows],
+        next_cursor=next_cursor
+    )
+
+def list_dns_records_logic(
+    domain: Optional[str] = None,
+    domain_suffix: Optional[str] = None,
+    domain_contains: Optional[str] = None,
+    record_type: Optional[str] = None,
+    account_id: Optional[str] = None,
+    provisioned_after: Optional[datetime] = None,
+    provisioned_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_read_db)
+):
+    """
+    List provisioned DNS records matching all given filters, newest first.
+    """
+    query = db.query(
+        DnsRecord.id, DnsRecord.request_id, DnsRecord.account_id, DnsRecord.record_type,
+        DnsRecord.domain, DnsRecord.target, DnsRecord.provisioned_at
+    )
+    conditions = _domain_conditions(DnsRecord.domain, domain, domain_suffix, domain_contains)
+    if record_type:
+        conditions.append(DnsRecord.record_type == record_type)
+    if account_id:
+        conditions.append(DnsRecord.account_id == account_id)
+    if provisioned_after:
+        conditions.append(DnsRecord.provisioned_at >= provisioned_after)
+    if provisioned_before:
+        conditions.append(DnsRecord.provisioned_at < provisioned_before)
+
+    rows, next_cursor = _keyset_page(query.filter(*conditions), DnsRecord.provisioned_at, DnsRecord.id, cursor, limit)
+    return DnsRecordPage(
+        items=[DnsRecordSummary.model_validate(dict(row._mapping)) for row in rows],
+        next_cursor=next_cursor
+    )
+
+async def create_dns_request_logic_async(
+    request: DnsRequestCreate,
+    idempotency_key: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        bind_log_context(account_id=request.context.account_id)
+        logger.info("Received DNS request for domain %s from source %s", request.resource.domain, request.context.source)
+        # Staging is shared with the sync path through the session's sync facade
+        with span("stage"):
+            response, db_request = await db.run_sync(_stage_dns_request, request, idempotency_key)
+            if response is None:
+                await db.rollback()
+                response, db_request = await db.run_sync(_stage_dns_request, request, idempotency_key)
+        if response is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Idempotency-Key is in use by a concurrent request")
+        bind_log_context(request_id=str(response.context.request_id))
+        # The primary key is generated client-side, so no refresh round trip is needed
+        with span("commit"):
+            await db.commit()
+
+        if db_request is not None:
+            index_new_requests([_index_row(db_request)])
+            if not outbox_enabled():
+                # Publishing to the broker is blocking socket I/O; keep it off the event loop
+                with span("publish"):
+                    await run_in_threadpool(publish_provisioning, [db_request.id])
+            logger.info("DNS request %s submitted for provisioning", db_request.id)
+
+        return response
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        logger.error("Error creating DNS request: %s", e)
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+async def get_dns_request_status_snapshot_logic_async(
+    request_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_read_db)
+) -> StatusSnapshot:
+    snapshot, generation = await status_cache.aread(request_id)
+    if snapshot is None:
+        replica = replica_configured()
+        row = None
+        if not read_from_primary(request_id):
+            row = (await db.execute(_status_query(request_id))).first()
+        from_replica = replica and row is not None
+        if row is None and replica:
+            async with AsyncSessionLocal() as primary:
+                row = (await primary.execute(_status_query(request_id))).first()
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DNS Request not found")
+        snapshot = StatusSnapshot.from_row(row)
+        await status_cache.aset(snapshot, shared=not from_replica, generation=generation)
+    return snapshot
+
+async def get_dns_request_status_logic_async(
+    request_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return build_status_response(await get_dns_request_status_snapshot_logic_async(request_id=request_id, db=db))
+
+async def update_dns_request_status_logic_async(
+    request_id: uuid.UUID,
+    new_status: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    bind_log_context(request_id=str(request_id))
+    result = await db.execute(select(DnsRequest).where(DnsRequest.id_clause(request_id)))
+    db_request = result.scalars().first()
+    if not db_request:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DNS Request not found")
+
+    db_request.status = new_status
+    await arecord_event(db, request_id, "INFO", f"Status updated to {new_status}.")
+    await anotify_status_change(db, request_id, new_status)
+    with span("commit"):
+        await db.commit()
+    mark_written(request_id)
+    await run_in_threadpool(status_cache.invalidate, request_id)
+    # updated_at is set server-side; reload it explicitly since lazy loads are not allowed here
+    with span("refresh"):
+        await db.refresh(db_request)
+
+    return _status_response(db_request, f"DNS request status updated to: {db_request.status}")
+
+# Statuses after which no further updates are expected for a request
+TERMINAL_STATUSES = {"COMPLETED", "FAILED"}
+
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+async def stream_dns_request_status_logic(
+    request_ids: List[uuid.UUID],
+    is_disconnected: Callable[[], Awaitable[bool]]
+) -> AsyncIterator[str]:
+    """
+    Server-sent events for one or more requests: the current status of each,
+    then every change as it is committed, until all of them reach a terminal
+    status or the client disconnects. Changes arrive through the process-wide
+    LISTEN connection, so waiting clients do not hold database connections.
+    After that connection reconnects the broadcaster republishes the current
+    status of every subscribed request; statuses already sent are skipped.
+    """
+    # Subscribe before reading the current status so no transition is missed
+    queue = await status_broadcaster.subscribe(request_ids)
+    try:
+        # Last status sent for each request that has not finished yet
+        pending: Dict[str, str] = {}
+        async with AsyncReadSessionLocal() as db:
+            for request_id in request_ids:
+                try:
+                    snapshot = await get_dns_request_status_snapshot_logic_async(request_id=request_id, db=db)
+                except HTTPException:
+                    yield _sse_event("not_found", f'{{"request_id": "{request_id}"}}')
+                    continue
+                yield _sse_event("status", build_status_response(snapshot).model_dump_json())
+                if snapshot.status not in TERMINAL_STATUSES:
+                    pending[str(request_id)] = snapshot.status
+
+        while pending:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.STATUS_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                # SSE comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            request_id = event["request_id"]
+            # Skip finished requests and statuses this client already has
+            if pending.get(request_id, event["status"]) == event["status"]:
+                continue
+            snapshot = StatusSnapshot(id=uuid.UUID(request_id), status=event["status"], updated_at=None)
+            yield _sse_event("status", build_status_response(snapshot).model_dump_json())
+            if snapshot.status in TERMINAL_STATUSES:
+                del pending[request_id]
+            else:
+                pending[request_id] = snapshot.status
+    finally:
+        status_broadcaster.unsubscribe(queue, request_ids)
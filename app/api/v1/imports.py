@@ -0,0 +1,241 @@
+"""
+Streaming NDJSON import of DNS requests, for loading whole zones.
+
+Every line of the input is one DnsResource. Lines are validated as they
+are read and collected into chunks of IMPORT_CHUNK_SIZE requests; a full
+chunk is written with a single COPY into dns_requests (its history events
+and outbox rows go in the same transaction) and committed, and its
+provisioning tasks are published, before more input is read. Memory use
+is bounded by the chunk size, IMPORT_MAX_LINE_BYTES and
+IMPORT_MAX_REPORTED_ERRORS, however large the input is.
+
+Lines are checked like /batch items: against the domain index and, with
+DEDUP_PENDING_REQUESTS, against PENDING requests. Chunks committed before
+a failure stay committed; the report says where the import stopped.
+"""
+
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Tuple
+import json
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.api.v1.api import RECEIVED_MESSAGE, _dns_request_values, _format_validation_error, _index_row
+from app.celery.outbox import stage_provisioning, publish_provisioning
+from app.core.config import settings
+from app.core.domain_index import check_conflicts, notify_new_requests, index_new_requests
+from app.core.idempotency import request_fingerprint, lock_fingerprints, find_pending_duplicates
+from app.core.logging import get_logger
+from app.core.request_events import record_events
+from app.schemas.request import DnsRequestCreate, DnsResource, RequestContext
+from app.schemas.response import DnsImportLineError, DnsImportReport
+from app.utils.pgcopy import copy_from
+
+logger = get_logger(__name__)
+
+COPY_COLUMNS = ("id", "record_type", "domain", "target", "comment", "status", "source", "account_id", "config", "content_hash")
+_COPY_SQL = f"COPY dns_requests ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+
+# Characters with a meaning in COPY's text format
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def _copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, dict):
+        value = json.dumps(value)
+    return str(value).translate(_COPY_ESCAPES)
+
+def copy_line(row: Dict) -> bytes:
+    """
+    One dns_requests row, from _dns_request_values, in COPY text format.
+    """
+    return ("\t".join(_copy_value(row[column]) for column in COPY_COLUMNS) + "\n").encode("utf-8")
+
+class LineSplitter:
+    """
+    Splits a stream of byte chunks into numbered lines. A line longer than
+    max_bytes comes out as None and the rest of it is skipped, so input
+    without newlines cannot grow the buffer.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.number = 0
+        self._buffer = bytearray()
+        self._too_long = False
+
+    def feed(self, chunk: bytes) -> List[Tuple[int, Optional[bytes]]]:
+        lines = []
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            self._end_line(chunk[start:end], lines)
+            start = end + 1
+        if not self._too_long:
+            self._buffer += chunk[start:]
+            if len(self._buffer) > self.max_bytes:
+                self._buffer.clear()
+                self._too_long = True
+        return lines
+
+    def finish(self) -> List[Tuple[int, Optional[bytes]]]:
+        lines = []
+        if self._buffer or self._too_long:
+            self._end_line(b"", lines)
+        return lines
+
+    def _end_line(self, tail: bytes, lines: list):
+        self.number += 1
+        if self._too_long or len(self._buffer) + len(tail) > self.max_bytes:
+            lines.append((self.number, None))
+        else:
+            lines.append((self.number, bytes(self._buffer + tail)))
+        self._buffer.clear()
+        self._too_long = False
+
+def write_import_chunk(db: Session, requests: List[DnsRequestCreate]) -> Tuple[List[Optional[str]], int]:
+    """
+    COPY one chunk of requests into dns_requests, commit, and publish their
+    provisioning tasks. Returns the conflict (or None) of every request and
+    how many were PENDING duplicates, which are not inserted.
+    """
+    conflicts = check_conflicts(requests)
+    fingerprints = [request_fingerprint(request) if conflict is None else None for request, conflict in zip(requests, conflicts)]
+    pending: Dict[str, uuid.UUID] = {}
+    if settings.DEDUP_PENDING_REQUESTS:
+        live = [fingerprint for fingerprint in fingerprints if fingerprint]
+        lock_fingerprints(db, live)
+        pending = find_pending_duplicates(db, live)
+
+    rows = []
+    duplicates = 0
+    for request, fingerprint in zip(requests, fingerprints):
+        if fingerprint is None:
+            continue
+        if fingerprint in pending:
+            duplicates += 1
+            continue
+        row = _dns_request_values(request, fingerprint)
+        rows.append(row)
+        if settings.DEDUP_PENDING_REQUESTS:
+            pending[fingerprint] = row["id"]
+
+    if rows:
+        # COPY runs on the session's own connection, inside its transaction
+        copy_from(db.connection().connection.dbapi_connection, _COPY_SQL, (copy_line(row) for row in rows))
+        record_events(db, [(row["id"], "INFO", RECEIVED_MESSAGE) for row in rows])
+        stage_provisioning(db, [row["id"] for row in rows])
+        notify_new_requests(db, [_index_row(row) for row in rows])
+    db.commit()
+
+    index_new_requests([_index_row(row) for row in rows])
+    publish_provisioning([row["id"] for row in rows])
+    return conflicts, duplicates
+
+class NdjsonImport:
+    """
+    State of one import: the chunk being collected and the running report.
+    Feed it lines with add(); when that returns True, write the chunk with
+    write_chunk() before adding more.
+    """
+
+    def __init__(self, account_id: str, source: str = "import"):
+        self.context = RequestContext(account_id=account_id, source=source)
+        self.lines = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.errors: List[DnsImportLineError] = []
+        self.aborted: Optional[str] = None
+        self._chunk: List[Tuple[int, DnsRequestCreate]] = []
+
+    def _reject(self, number: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append(DnsImportLineError(line=number, error=error))
+
+    def add(self, number: int, line: Optional[bytes]) -> bool:
+        if line is None:
+            self.lines += 1
+            self._reject(number, f"Line exceeds {settings.IMPORT_MAX_LINE_BYTES} bytes")
+            return False
+        if not line.strip():
+            return False
+        self.lines += 1
+        try:
+            resource = DnsResource.model_validate_json(line)
+        except ValidationError as e:
+            self._reject(number, _format_validation_error(e))
+            return False
+        self._chunk.append((number, DnsRequestCreate(context=self.context, resource=resource)))
+        return len(self._chunk) >= settings.IMPORT_CHUNK_SIZE
+
+    def write_chunk(self, db: Session) -> bool:
+        """
+        Write the collected chunk. Returns False, with aborted set, when it
+        could not be written.
+        """
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return True
+        try:
+            conflicts, duplicates = write_import_chunk(db, [request for _, request in chunk])
+        except Exception as e:
+            db.rollback()
+            logger.error("Error importing lines %d-%d: %s", chunk[0][0], chunk[-1][0], e)
+            self.aborted = f"Stopped at lines {chunk[0][0]}-{chunk[-1][0]}, which were not imported: {e}"
+            return False
+        for (number, _), conflict in zip(chunk, conflicts):
+            if conflict is not None:
+                self._reject(number, conflict)
+        self.duplicates += duplicates
+        self.accepted += len(chunk) - duplicates - sum(conflict is not None for conflict in conflicts)
+        logger.info("Imported lines %d-%d (%d requests so far)", chunk[0][0], chunk[-1][0], self.accepted)
+        return True
+
+    def report(self) -> DnsImportReport:
+        return DnsImportReport(
+            lines=self.lines,
+            accepted=self.accepted,
+            duplicates=self.duplicates,
+            rejected=self.rejected,
+            # Conflicts are found when their chunk is written, after later lines were validated
+            errors=sorted(self.errors, key=lambda error: error.line),
+            aborted=self.aborted
+        )
+
+def import_ndjson(chunks: Iterable[bytes], db: Session, account_id: str, source: str = "import") -> DnsImportReport:
+    """
+    Import an NDJSON stream given as byte chunks (of any size).
+    """
+    importer = NdjsonImport(account_id, source)
+    splitter = LineSplitter(settings.IMPORT_MAX_LINE_BYTES)
+    for chunk in chunks:
+        for number, line in splitter.feed(chunk):
+            if importer.add(number, line) and not importer.write_chunk(db):
+                return importer.report()
+    for number, line in splitter.finish():
+        importer.add(number, line)
+    importer.write_chunk(db)
+    return importer.report()
+
+async def import_ndjson_async(chunks: AsyncIterable[bytes], db: Session, account_id: str, source: str = "import") -> DnsImportReport:
+    """
+    import_ndjson for a request body: the body is read on the event loop
+    and each chunk is written in the threadpool.
+    """
+    importer = NdjsonImport(account_id, source)
+    splitter = LineSplitter(settings.IMPORT_MAX_LINE_BYTES)
+    async for chunk in chunks:
+        for number, line in splitter.feed(chunk):
+            if importer.add(number, line) and not await run_in_threadpool(importer.write_chunk, db):
+                return importer.report()
+    for number, line in splitter.finish():
+        importer.add(number, line)
+    await run_in_threadpool(importer.write_chunk, db)
+    return importer.report()
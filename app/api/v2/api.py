@@ -14,7 +14,7 @@ def create_dns_request_logic_v2(
     request: DnsRequestCreate,
     db: Session = Depends(get_db)
 ):
-    logger.info(f"V2: Received DNS request for domain {request.resource.domain}")
+    logger.info("V2: Received DNS request for domain %s", request.resource.domain)
     return DnsRequestStatus(
         context=ResponseContext(
             request_id=uuid.uuid4(),
@@ -31,7 +31,7 @@ def get_dns_request_status_logic_v2(
     request_id: uuid.UUID,
     db: Session = Depends(get_db)
 ):
-    logger.info(f"V2: Retrieving status for request ID {request_id}")
+    logger.info("V2: Retrieving status for request ID %s", request_id)
     return DnsRequestStatus(
         context=ResponseContext(
             request_id=request_id,
@@ -49,7 +49,7 @@ def update_dns_request_status_logic_v2(
     new_status: str,
     db: Session = Depends(get_db)
 ):
-    logger.info(f"V2: Updating status for request ID {request_id} to {new_status}")
+    logger.info("V2: Updating status for request ID %s to %s", request_id, new_status)
     return DnsRequestStatus(
         context=ResponseContext(
             request_id=request_id,
@@ -0,0 +1,79 @@
+"""
+Per-zone micro-batching in front of the provisioning executor.
+
+Bulk changes often deliver hundreds of records for the same zone within a
+second. Instead of one provisioning run and one commit per record, records
+are grouped by zone (the registrable domain) and flushed as one job when a
+batch reaches its size limit or its time window expires, whichever is first.
+
+Batches are collected per worker process; run workers with fewer, larger
+processes (or the threads pool) to maximise grouping.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+FlushCallback = Callable[[str, List[Any]], None]
+
+class ZoneBatcher:
+    """
+    Collects items per zone and hands each batch to flush(zone, items).
+
+    flush is called from the batcher's own thread for window expiry and from
+    the caller's thread when a batch fills up, never while holding the lock.
+    """
+
+    def __init__(self, max_size: int, window: float, flush: FlushCallback):
+        self.max_size = max_size
+        self.window = window
+        self._flush = flush
+        self._batches: Dict[str, Tuple[float, List[Any]]] = {}
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, name="zone-batcher", daemon=True).start()
+
+    def add(self, zone: str, item: Any):
+        full = None
+        with self._condition:
+            deadline, items = self._batches.setdefault(zone, (time.monotonic() + self.window, []))
+            items.append(item)
+            if len(items) >= self.max_size:
+                full = self._batches.pop(zone)[1]
+            elif len(items) == 1:
+                # A new batch may have an earlier deadline than the thread is waiting for
+                self._condition.notify()
+        if full is not None:
+            self._safe_flush(zone, full)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = [zone for zone, (deadline, _) in self._batches.items() if deadline <= now]
+                if not due:
+                    next_deadline = min((deadline for deadline, _ in self._batches.values()), default=None)
+                    self._condition.wait(None if next_deadline is None else next_deadline - now)
+                    continue
+                expired = [(zone, self._batches.pop(zone)[1]) for zone in due]
+            for zone, items in expired:
+                self._safe_flush(zone, items)
+
+    def _safe_flush(self, zone: str, items: List[Any]):
+        try:
+            self._flush(zone, items)
+        except Exception as e:
+            logger.error("Failed to flush batch of %d for zone %s: %s", len(items), zone, e)
+
+    def flush_all(self):
+        """
+        Flush every pending batch immediately, e.g. on worker shutdown.
+        """
+        with self._condition:
+            pending = [(zone, items) for zone, (_, items) in self._batches.items()]
+            self._batches.clear()
+        for zone, items in pending:
+            self._safe_flush(zone, items)
@@ -0,0 +1,167 @@
+"""
+Scheduled housekeeping: dns_requests partition maintenance (create upcoming
+monthly partitions, archive the ones past the retention window), purging
+of expired idempotency keys, and re-enqueueing requests whose provisioning
+was lost.
+"""
+
+from datetime import date
+from typing import List, Optional
+import gzip
+import os
+import re
+from sqlalchemy import text
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal, get_engine
+from app.core.logging import get_logger
+from app.core.request_events import record_events
+from app.celery.outbox import stage_provisioning, publish_provisioning
+from app.utils.pgcopy import copy_to
+
+logger = get_logger(__name__)
+
+PARTITION_NAME = re.compile(r"^dns_requests_p(\d{4})(\d{2})$")
+
+REQUEUED_MESSAGE = "No provisioning outcome recorded in time; provisioning re-enqueued."
+
+# Claims the oldest stale PENDING requests and bumps updated_at, so each is
+# re-enqueued at most once per stale interval, even with overlapping sweeps
+_STALE_REQUESTS_SQL = text("""
+    UPDATE dns_requests SET updated_at = now()
+    WHERE status = 'PENDING' AND (id, created_at) IN (
+        SELECT id, created_at FROM dns_requests
+        WHERE status = 'PENDING' AND updated_at < now() - make_interval(secs => :stale_after)
+        ORDER BY created_at
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+""")
+
+def partition_month(name: str) -> Optional[date]:
+    """Return the first day of the month a dns_requests_pYYYYMM table covers."""
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+def retention_cutoff(today: date, retention_months: int) -> date:
+    """Partitions for months before the returned date are due for archival."""
+    months = today.year * 12 + today.month - 1 - retention_months
+    return date(months // 12, months % 12 + 1, 1)
+
+@celery_app.task(queue='dns_tasks')
+def ensure_future_partitions(months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Create the monthly partitions from the current month through
+    months_ahead months from now. Returns the names of the new partitions.
+    """
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    with get_engine().begin() as conn:
+        created = conn.execute(
+            text("SELECT dns_requests_ensure_partitions(now()::date, :months_ahead)"),
+            {"months_ahead": months_ahead}
+        ).scalars().all()
+    for name in created:
+        logger.info("Created partition %s", name)
+    return created
+
+@celery_app.task(queue='dns_tasks')
+def archive_old_partitions(retention_months: Optional[int] = None, archive_dir: Optional[str] = None) -> List[str]:
+    """
+    Detach each partition older than the retention window, write its rows
+    to <archive_dir>/<partition>.csv.gz and drop it. Each step commits on its
+    own, so a partition left detached by an interrupted run is picked up
+    again on the next one. Returns the paths of the written archives.
+    """
+    retention_months = settings.PARTITION_RETENTION_MONTHS if retention_months is None else retention_months
+    archive_dir = archive_dir or settings.PARTITION_ARCHIVE_DIR
+    cutoff = retention_cutoff(date.today(), retention_months)
+
+    with get_engine().connect() as conn:
+        # Detached partitions are plain tables, so look them up by name as well
+        rows = conn.execute(text(
+            "SELECT c.relname, c.relispartition FROM pg_class c "
+            "WHERE c.relkind IN ('r', 'p') AND c.relname LIKE 'dns\\_requests\\_p%' "
+            "AND c.relnamespace = current_schema()::regnamespace"
+        )).all()
+
+    archived = []
+    for name, attached in sorted(rows):
+        month = partition_month(name)
+        if month is None or month >= cutoff:
+            continue
+        if attached:
+            with get_engine().begin() as conn:
+                conn.execute(text(f'ALTER TABLE dns_requests DETACH PARTITION "{name}"'))
+            logger.info("Detached partition %s", name)
+        path = _archive_table(name, archive_dir)
+        with get_engine().begin() as conn:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+        logger.info("Archived partition %s to %s", name, path)
+        archived.append(path)
+    return archived
+
+@celery_app.task(queue='dns_tasks')
+def purge_idempotency_keys(ttl_hours: Optional[int] = None) -> int:
+    """
+    Delete stored idempotency responses older than ttl_hours. Returns the
+    number of keys removed.
+    """
+    ttl_hours = settings.IDEMPOTENCY_KEY_TTL_HOURS if ttl_hours is None else ttl_hours
+    with get_engine().begin() as conn:
+        deleted = conn.execute(
+            text("DELETE FROM idempotency_keys WHERE created_at < now() - make_interval(hours => :ttl_hours)"),
+            {"ttl_hours": ttl_hours}
+        ).rowcount
+    logger.info("Purged %d expired idempotency keys", deleted)
+    return deleted
+
+def _archive_table(name: str, archive_dir: str) -> str:
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    # Write under a temporary name so a partial file never looks like a finished archive
+    partial = f"{path}.partial"
+    raw = get_engine().raw_connection()
+    try:
+        # Dumping a whole month can legitimately outlast DB_STATEMENT_TIMEOUT_MS
+        cursor = raw.cursor()
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.close()
+        with open(partial, "wb") as fileobj:
+            with gzip.GzipFile(filename=f"{name}.csv", mode="wb", fileobj=fileobj) as output:
+                copy_to(raw, f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER true)', output)
+            fileobj.flush()
+            os.fsync(fileobj.fileno())
+        raw.commit()
+    finally:
+        raw.close()
+    os.replace(partial, path)
+    return path
+
+@celery_app.task(queue='dns_tasks')
+def requeue_stale_requests(stale_after_seconds: Optional[float] = None, limit: Optional[int] = None) -> int:
+    """
+    Re-enqueue provisioning for requests PENDING for longer than
+    stale_after_seconds. provision_dns_record is acked once its run is
+    batched or started, so a worker that dies takes those runs with it;
+    this sweep is what recovers them. A run that was only slow and finishes
+    later is harmless: finalize_dns_requests only finalizes PENDING
+    requests. Returns the number of requests re-enqueued.
+    """
+    stale_after_seconds = settings.PROVISIONING_STALE_AFTER_SECONDS if stale_after_seconds is None else stale_after_seconds
+    limit = settings.PROVISIONING_REQUEUE_BATCH_SIZE if limit is None else limit
+    db = SessionLocal()
+    try:
+        request_ids = [row.id for row in db.execute(_STALE_REQUESTS_SQL, {"stale_after": stale_after_seconds, "limit": limit})]
+        record_events(db, [(request_id, "INFO", REQUEUED_MESSAGE) for request_id in request_ids])
+        stage_provisioning(db, request_ids)
+        db.commit()
+    finally:
+        db.close()
+
+    publish_provisioning(request_ids)
+    if request_ids:
+        logger.warning("Re-enqueued %d DNS requests PENDING for over %ds", len(request_ids), stale_after_seconds)
+    return len(request_ids)
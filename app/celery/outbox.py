@@ -0,0 +1,120 @@
+"""
+Transactional outbox for provisioning tasks.
+
+With TASK_DISPATCH_MODE=outbox (the default), create calls stage a task_outbox row in the
+same transaction as the DnsRequest (stage_provisioning) and never talk to
+the broker. The relay
+(run_outbox_relay, started by scripts/run_outbox_relay.py) claims rows in
+batches with FOR UPDATE SKIP LOCKED, publishes them over one producer and
+deletes them. Several relays can run side by side; each claims a disjoint
+batch. Delivery is at-least-once: a relay that dies after publishing but
+before committing leaves its rows to be published again, and
+provision_dns_record skips requests that are no longer PENDING.
+
+In the direct fallback mode, staging is a no-op and publish_provisioning
+publishes after commit.
+"""
+
+from datetime import timedelta
+from typing import Iterable, List
+import time
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import get_logger
+from app.models.models import TaskOutbox
+from app.celery.tasks import enqueue_provisioning
+
+logger = get_logger(__name__)
+
+def outbox_enabled() -> bool:
+    return settings.TASK_DISPATCH_MODE == "outbox"
+
+def _outbox_rows(request_ids: Iterable) -> List[dict]:
+    return [{"request_id": request_id} for request_id in request_ids]
+
+def stage_provisioning(db, request_ids: Iterable) -> None:
+    """
+    Stage provisioning tasks in the session's current transaction.
+    Call before commit; pair with publish_provisioning after commit.
+    """
+    if outbox_enabled():
+        rows = _outbox_rows(request_ids)
+        if rows:
+            db.execute(insert(TaskOutbox), rows)
+
+def publish_provisioning(request_ids: Iterable) -> None:
+    """
+    Publish provisioning tasks after commit. Only does broker I/O in direct
+    mode; in outbox mode the relay publishes the staged rows.
+    """
+    if not outbox_enabled():
+        request_ids = [str(request_id) for request_id in request_ids]
+        if request_ids:
+            enqueue_provisioning(request_ids)
+
+def relay_outbox_batch(batch_size: int) -> int:
+    """
+    Claim up to batch_size due outbox rows, publish their tasks and delete
+    them, all in one transaction. On a publish failure the rows are kept and
+    made due again after OUTBOX_RETRY_BACKOFF_SECONDS. Returns the number of
+    tasks published.
+    """
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(TaskOutbox.id, TaskOutbox.request_id)
+            .where(TaskOutbox.available_at <= func.now())
+            .order_by(TaskOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            db.rollback()
+            return 0
+
+        outbox_ids = [row.id for row in rows]
+        try:
+            enqueue_provisioning([str(row.request_id) for row in rows])
+        except Exception as e:
+            logger.error("Error publishing %d outbox tasks, retrying in %ds: %s", len(rows), settings.OUTBOX_RETRY_BACKOFF_SECONDS, e)
+            db.execute(
+                update(TaskOutbox)
+                .where(TaskOutbox.id.in_(outbox_ids))
+                .values(
+                    attempts=TaskOutbox.attempts + 1,
+                    last_error=str(e)[:1000],
+                    available_at=func.now() + timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF_SECONDS)
+                )
+            )
+            db.commit()
+            return 0
+
+        db.execute(delete(TaskOutbox).where(TaskOutbox.id.in_(outbox_ids)))
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def run_outbox_relay():
+    """
+    Relay loop. Drains full batches back to back and only sleeps for
+    OUTBOX_POLL_INTERVAL_SECONDS once the outbox is empty.
+    """
+    logger.info("Outbox relay running (batch size %d)", settings.OUTBOX_BATCH_SIZE)
+    while True:
+        try:
+            published = relay_outbox_batch(settings.OUTBOX_BATCH_SIZE)
+        except Exception as e:
+            logger.error("Outbox relay error: %s", e)
+            published = 0
+            time.sleep(settings.OUTBOX_RETRY_BACKOFF_SECONDS)
+        if published:
+            logger.info("Published %d provisioning tasks from the outbox", published)
+        if published < settings.OUTBOX_BATCH_SIZE:
+            time.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
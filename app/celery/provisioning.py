@@ -0,0 +1,289 @@
+"""
+Provisioning executors for Celery workers.
+
+provision_dns_record used to block its worker slot for the whole Ansible run.
+An executor instead starts the run in the background and tracks many runs per
+worker process; the Celery task returns as soon as the run is submitted and
+the final status is written by a completion callback.
+
+Backends:
+    fake        sleeps for a configurable latency (and optionally fails a
+                fraction of jobs); used for local throughput measurements
+    subprocess  runs the Ansible playbook as a child process
+"""
+
+import heapq
+import itertools
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+@dataclass
+class ProvisioningJob:
+    """
+    One provisioning run. records holds the DNS records applied by the run.
+    """
+    job_id: str
+    records: List[Dict[str, Any]]
+
+@dataclass
+class ProvisioningResult:
+    """
+    Outcome of a run. failed maps the request IDs of records that could not
+    be applied in an otherwise successful run to their error.
+    """
+    job: ProvisioningJob
+    success: bool
+    message: str
+    duration: float = 0.0
+    failed: Dict[str, str] = field(default_factory=dict)
+
+CompletionCallback = Callable[[ProvisioningResult], None]
+
+class ProvisioningExecutor(ABC):
+    """
+    Base class for provisioning backends.
+
+    submit() blocks while max_in_flight runs are already active, which
+    pushes back on the Celery worker instead of starting unbounded work.
+    Completion callbacks run on a small thread pool so slow callbacks
+    (database writes) do not delay noticing other runs finishing.
+    """
+
+    def __init__(self, max_in_flight: int, callback_threads: int):
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._callbacks = ThreadPoolExecutor(max_workers=callback_threads, thread_name_prefix="provisioning-callback")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, job: ProvisioningJob, on_complete: CompletionCallback):
+        self._slots.acquire()
+        with self._lock:
+            self.in_flight += 1
+        started = time.monotonic()
+
+        def done(success: bool, message: str, failed: Optional[Dict[str, str]] = None):
+            result = ProvisioningResult(job=job, success=success, message=message, duration=time.monotonic() - started, failed=failed or {})
+            with self._lock:
+                self.in_flight -= 1
+                if success:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._slots.release()
+            self._callbacks.submit(self._run_callback, on_complete, result)
+
+        try:
+            self._start(job, done)
+        except Exception as e:
+            logger.error("Failed to start provisioning job %s: %s", job.job_id, e)
+            done(False, f"Failed to start provisioning job: {e}")
+
+    @staticmethod
+    def _run_callback(on_complete: CompletionCallback, result: ProvisioningResult):
+        try:
+            on_complete(result)
+        except Exception as e:
+            logger.error("Provisioning completion callback failed for job %s: %s", result.job.job_id, e)
+
+    @abstractmethod
+    def _start(self, job: ProvisioningJob, done: Callable[..., None]):
+        """
+        Start the run without waiting for it; call done(success, message)
+        exactly once when it ends. Backends that know which records failed
+        pass them as done(True, message, failed={request_id: error}).
+        """
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Wait up to timeout seconds for in-flight runs, then for their callbacks.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.in_flight and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.1)
+        if self.in_flight:
+            logger.warning("Provisioning executor shut down with %d runs in flight", self.in_flight)
+        self._callbacks.shutdown(wait=True)
+
+class FakeExecutor(ProvisioningExecutor):
+    """
+    Completes each job after a fixed latency without doing any work.
+
+    All pending jobs share one timer thread (a heap of deadlines), so
+    thousands of simulated in-flight runs do not need thousands of threads.
+    """
+
+    def __init__(self, latency: float, failure_rate: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._heap: list = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, name="provisioning-fake", daemon=True).start()
+
+    def _start(self, job, done):
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + self.latency, next(self._counter), done))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._condition.wait(None if not self._heap else self._heap[0][0] - time.monotonic())
+                _, _, done = heapq.heappop(self._heap)
+            if random.random() < self.failure_rate:
+                done(False, "Simulated provisioning failure.")
+            else:
+                done(True, "DNS record provisioned successfully by Ansible.")
+
+class SubprocessExecutor(ProvisioningExecutor):
+    """
+    Runs the Ansible playbook once per job as a child process.
+
+    The job's records are passed as extra vars through a temporary JSON file.
+    Output goes to a temporary file rather than a pipe so a chatty playbook
+    can never block on a full pipe buffer; a single monitor thread polls all
+    running processes.
+
+    The playbook may write a JSON object mapping request IDs to errors to
+    the path in the dns_results_file var. When it does, only those records
+    failed and the others were applied, whatever the exit code; otherwise
+    the exit code decides for the whole job.
+    """
+
+    def __init__(self, command: str, playbook: str, timeout: float, **kwargs):
+        super().__init__(**kwargs)
+        self.command = command
+        self.playbook = playbook
+        self.timeout = timeout
+        self._running: list = []
+        self._running_lock = threading.Lock()
+        threading.Thread(target=self._monitor, name="provisioning-monitor", daemon=True).start()
+
+    def _start(self, job, done):
+        vars_file = tempfile.NamedTemporaryFile("w", suffix=".json", prefix=f"dns-{job.job_id}-", delete=False)
+        results_path = f"{vars_file.name}.results"
+        with vars_file:
+            json.dump({"dns_records": job.records, "dns_results_file": results_path}, vars_file)
+        output = tempfile.TemporaryFile()
+        process = subprocess.Popen(
+            [self.command, self.playbook, "-e", f"@{vars_file.name}"],
+            stdout=output,
+            stderr=subprocess.STDOUT
+        )
+        with self._running_lock:
+            self._running.append((process, time.monotonic() + self.timeout, vars_file.name, output, done))
+
+    def _monitor(self):
+        while True:
+            time.sleep(0.2)
+            with self._running_lock:
+                running, self._running = self._running, []
+            still_running = []
+            for entry in running:
+                process, deadline, vars_path, output, done = entry
+                returncode = process.poll()
+                if returncode is None and time.monotonic() < deadline:
+                    still_running.append(entry)
+                    continue
+                if returncode is None:
+                    process.kill()
+                    process.wait()
+                    message = f"Ansible playbook timed out after {self.timeout:.0f}s."
+                    success = False
+                elif returncode == 0:
+                    message = "DNS record provisioned successfully by Ansible."
+                    success = True
+                else:
+                    message = f"Ansible playbook failed with exit code {returncode}: {self._tail(output)}"
+                    success = False
+                output.close()
+                os.unlink(vars_path)
+                failed = self._read_results(f"{vars_path}.results")
+                if returncode is None:
+                    # A run killed halfway may not have reported every record
+                    failed = None
+                elif failed is not None:
+                    success = True
+                    if returncode != 0:
+                        message = f"Ansible playbook reported {len(failed)} failed records."
+                done(success, message, failed)
+            with self._running_lock:
+                self._running.extend(still_running)
+
+    @staticmethod
+    def _read_results(path: str) -> Optional[Dict[str, str]]:
+        # Per-record failures written by the playbook, or None without them
+        try:
+            with open(path) as f:
+                results = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning("Ignoring unreadable provisioning results %s: %s", path, e)
+            results = None
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+        if not isinstance(results, dict):
+            return None
+        return {str(request_id): str(error) for request_id, error in results.items()}
+
+    @staticmethod
+    def _tail(output, limit: int = 2000) -> str:
+        output.seek(0, os.SEEK_END)
+        output.seek(max(output.tell() - limit, 0))
+        return output.read().decode("utf-8", errors="replace").strip()
+
+_executor: Optional[ProvisioningExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ProvisioningExecutor:
+    """
+    Return this process's executor, creating it on first use so that every
+    prefork child gets its own threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            common = dict(max_in_flight=settings.PROVISIONING_MAX_IN_FLIGHT, callback_threads=settings.PROVISIONING_CALLBACK_THREADS)
+            if settings.PROVISIONING_BACKEND == "subprocess":
+                _executor = SubprocessExecutor(
+                    command=settings.PROVISIONING_COMMAND,
+                    playbook=settings.PROVISIONING_PLAYBOOK,
+                    timeout=settings.PROVISIONING_TIMEOUT_SECONDS,
+                    **common
+                )
+            else:
+                _executor = FakeExecutor(
+                    latency=settings.PROVISIONING_FAKE_LATENCY_SECONDS,
+                    failure_rate=settings.PROVISIONING_FAKE_FAILURE_RATE,
+                    **common
+                )
+            logger.info("Started %s provisioning executor (max in flight %d)", settings.PROVISIONING_BACKEND, settings.PROVISIONING_MAX_IN_FLIGHT)
+        return _executor
+
+def shutdown_executor(timeout: Optional[float] = None):
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(timeout=timeout)
@@ -1,49 +1,184 @@
+from celery.signals import worker_process_shutdown
 from app.core.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
+from app.core.status_cache import status_cache
+from app.core.notifications import notify_status_change
+from app.celery.batching import ZoneBatcher
+from app.celery.provisioning import ProvisioningJob, ProvisioningResult, get_executor, shutdown_executor
 from app.models.models import DnsRequest, DnsRecord
-from app.schemas.response import LogMessage
-from app.core.logging import get_logger
+from sqlalchemy import insert, or_, update
+from app.core.request_events import record_events
+from app.core.logging import get_logger, bind_log_context
+from app.core.metrics import CELERY_PUBLISH_DURATION, CELERY_TASKS_PUBLISHED, PROVISION_TASKS, PROVISIONING_RUN_DURATION, PROVISIONED_REQUESTS
+from app.utils.dns import registrable_domain
+from typing import Any, Dict, List, Optional
+import threading
 import time
 
 logger = get_logger(__name__)
 
+_batcher: Optional[ZoneBatcher] = None
+_batcher_lock = threading.Lock()
+
+def _get_batcher() -> ZoneBatcher:
+    # Created lazily so each prefork child gets its own batcher thread
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = ZoneBatcher(
+                max_size=settings.PROVISIONING_BATCH_SIZE,
+                window=settings.PROVISIONING_BATCH_WINDOW_SECONDS,
+                flush=_submit_zone_batch
+            )
+        return _batcher
+
 @celery_app.task(queue='dns_tasks')
 def provision_dns_record(request_id: str):
+    """
+    Start provisioning for a DNS request and return immediately.
+    The record joins its zone's batch (or is submitted on its own when
+    batching is disabled); the run is tracked by the process's provisioning
+    executor and finalize_dns_requests writes the outcome when it completes.
+    """
+    bind_log_context(request_id=request_id)
     db = SessionLocal()
-    db_request = db.query(DnsRequest).filter(DnsRequest.id == request_id).first()
+    try:
+        db_request = db.query(DnsRequest).filter(DnsRequest.id_clause(request_id)).first()
+        if not db_request:
+            logger.warning("[Celery Task] DNS request not found: %s", request_id)
+            PROVISION_TASKS.labels("not_found").inc()
+            return
+        if db_request.status != "PENDING":
+            # Outbox delivery is at-least-once; a republished task finds the request already handled
+            logger.info("[Celery Task] DNS request %s is %s, skipping duplicate task", request_id, db_request.status)
+            PROVISION_TASKS.labels("duplicate").inc()
+            return
+
+        logger.info("[Celery Task] Processing DNS request: %s", request_id)
+        if db_request.config:
+            logger.debug("[Celery Task] DNS config for request %s: %s", request_id, db_request.config)
+
+        record = {
+            "request_id": request_id,
+            "record_type": db_request.record_type,
+            "domain": db_request.domain,
+            "target": db_request.target,
+            "config": db_request.config
+        }
+    finally:
+        db.close()
+
+    if settings.PROVISIONING_BATCH_SIZE > 1:
+        _get_batcher().add(registrable_domain(record["domain"]), record)
+    else:
+        _submit_zone_batch(registrable_domain(record["domain"]), [record])
+    PROVISION_TASKS.labels("submitted").inc()
+
+def _submit_zone_batch(zone: str, records: List[Dict[str, Any]]):
+    request_ids = [record["request_id"] for record in records]
+    logger.info("[Celery Task] Triggering Ansible job for zone %s with %d records", zone, len(records))
+    job = ProvisioningJob(job_id=f"{zone}:{request_ids[0]}", records=records)
+    get_executor().submit(job, on_complete=lambda result: finalize_dns_requests(request_ids, result))
+
+_FINALIZED_COLUMNS = (DnsRequest.id, DnsRequest.account_id, DnsRequest.record_type, DnsRequest.domain, DnsRequest.target, DnsRequest.comment)
 
-    if db_request:
+def _finish_pending(db, request_ids: List[str], status: str):
+    # Only PENDING requests change; a duplicate run finishing second finds
+    # them already finalized and gets no rows back. id_clause limits the
+    # update to the partitions the requests were created in
+    if not request_ids:
+        return []
+    statement = (
+        update(DnsRequest)
+        .where(or_(*(DnsRequest.id_clause(request_id) for request_id in request_ids)), DnsRequest.status == "PENDING")
+        .values(status=status)
+        .returning(*_FINALIZED_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(statement).all()
+
+def finalize_dns_requests(request_ids: List[str], result: ProvisioningResult):
+    """
+    Completion callback: record the outcome of a provisioning run for every
+    request in it that is still PENDING, with all row updates and DnsRecord
+    inserts in one transaction. Records the run reports as failed
+    (result.failed) are marked FAILED with their own error.
+    """
+    logger.info("[Celery Task] Ansible job %s completed for %d requests in %.1fs", result.job.job_id, len(request_ids), result.duration)
+    db = SessionLocal()
+    finalized, failed = [], []
+    try:
         try:
-            logger.info(f"[Celery Task] Processing DNS request: {request_id}")
-            if db_request.config:
-                logger.info(f"[Celery Task] DNS config for request {request_id}: {db_request.config}")
-
-            # Simulate running an Ansible playbook
-            logger.info(f"[Celery Task] Triggering Ansible job for request: {request_id}")
-            time.sleep(10)  # Simulate long-running Ansible job
-            logger.info(f"[Celery Task] Ansible job completed for request: {request_id}")
-
-            db_request.status = "COMPLETED"
-            db_request.log_messages = db_request.log_messages + [LogMessage(status="SUCCESS", message="DNS record provisioned successfully by Ansible.").model_dump()]
-            db.add(db_request)
-
-            db_record = DnsRecord(
-                request_id=db_request.id,
-                record_type=db_request.record_type,
-                domain=db_request.domain,
-                target=db_request.target,
-                comment=db_request.comment
-            )
-            db.add(db_record)
+            if not result.success:
+                raise RuntimeError(result.message)
+
+            # Records the run reports as failed are finalized on their own
+            failed = _finish_pending(db, [request_id for request_id in request_ids if str(request_id) in result.failed], "FAILED")
+            for row in failed:
+                notify_status_change(db, row.id, "FAILED")
+            record_events(db, [(row.id, "ERROR", result.failed[str(row.id)]) for row in failed])
+            if result.failed:
+                logger.warning("[Celery Task] Job %s failed for requests %s", result.job.job_id, ", ".join(result.failed))
+
+            finalized = _finish_pending(db, [request_id for request_id in request_ids if str(request_id) not in result.failed], "COMPLETED")
+            if finalized:
+                db.execute(insert(DnsRecord), [
+                    {
+                        "request_id": row.id,
+                        "account_id": row.account_id,
+                        "record_type": row.record_type,
+                        "domain": row.domain,
+                        "target": row.target,
+                        "comment": row.comment
+                    }
+                    for row in finalized
+                ])
+            for row in finalized:
+                notify_status_change(db, row.id, "COMPLETED", provisioned=True)
+            record_events(db, [(row.id, "SUCCESS", result.message) for row in finalized])
             db.commit()
-            logger.info(f"[Celery Task] Successfully processed DNS request: {request_id}")
+            outcome = "completed"
+            logger.info("[Celery Task] Successfully processed %d DNS requests", len(finalized))
 
         except Exception as e:
             db.rollback()
-            db_request.status = "FAILED"
-            db_request.log_messages = db_request.log_messages + [LogMessage(status="ERROR", message=str(e)).model_dump()]
-            db.add(db_request)
+            finalized = []
+            failed = _finish_pending(db, request_ids, "FAILED")
+            for row in failed:
+                notify_status_change(db, row.id, "FAILED")
+            record_events(db, [(row.id, "ERROR", str(e)) for row in failed])
             db.commit()
-            logger.error(f"[Celery Task] Failed to process DNS request: {request_id}, error: {e}")
+            outcome = "failed"
+            logger.error("[Celery Task] Failed to process %d DNS requests (%s), error: %s; requests: %s", len(failed), result.job.job_id, e, ", ".join(str(row.id) for row in failed))
         finally:
-            db.close()
+            for request_id in request_ids:
+                status_cache.invalidate(request_id)
+        if len(finalized) + len(failed) != len(request_ids):
+            logger.warning("[Celery Task] %d DNS requests were no longer PENDING (or gone) when job %s finished", len(request_ids) - len(finalized) - len(failed), result.job.job_id)
+        PROVISIONING_RUN_DURATION.labels(outcome).observe(result.duration)
+        PROVISIONED_REQUESTS.labels("completed").inc(len(finalized))
+        PROVISIONED_REQUESTS.labels("failed").inc(len(failed))
+    finally:
+        db.close()
+
+@worker_process_shutdown.connect
+def _drain_provisioning_executor(**kwargs):
+    # Flush partially filled batches, then give in-flight runs a chance to
+    # finish and record their status before the process exits
+    if _batcher is not None:
+        _batcher.flush_all()
+    shutdown_executor(timeout=settings.PROVISIONING_SHUTDOWN_TIMEOUT_SECONDS)
+
+def enqueue_provisioning(request_ids: List[str]):
+    """
+    Publish provision_dns_record for every request ID over a single producer.
+    The broker connection and channel are acquired once for the whole batch
+    instead of once per message.
+    """
+    started = time.perf_counter()
+    with celery_app.producer_or_acquire() as producer:
+        for request_id in request_ids:
+            provision_dns_record.apply_async(args=[request_id], queue='dns_tasks', producer=producer)
+    CELERY_PUBLISH_DURATION.labels(provision_dns_record.name).observe(time.perf_counter() - started)
+    CELERY_TASKS_PUBLISHED.labels(provision_dns_record.name).inc(len(request_ids))
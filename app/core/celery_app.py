@@ -1,8 +1,70 @@
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_init, worker_process_shutdown
 from app.core.config import settings
+from app.core.database import dispose_engines_after_fork
+from app.core.logging import bind_log_context, unbind_log_context
+import os
 
 celery_app = Celery(
     "tasks",
-    broker=settings.CELERY_BROKER_URL,
-    include=["app.tasks"]
-)
\ No newline at end of file
+    include=["app.celery.tasks", "app.celery.maintenance"]
+)
+
+# Resolved when the configuration is first read (worker start, first publish),
+# not when this module is imported
+celery_app.add_defaults(lambda: {"broker_url": settings.CELERY_BROKER_URL})
+
+# Run by `celery beat`; every task is idempotent, so a missed or repeated run is harmless
+celery_app.conf.beat_schedule = {
+    "ensure-dns-request-partitions": {
+        "task": "app.celery.maintenance.ensure_future_partitions",
+        "schedule": crontab(hour=2, minute=0),
+        "options": {"queue": "dns_tasks"},
+    },
+    "archive-dns-request-partitions": {
+        "task": "app.celery.maintenance.archive_old_partitions",
+        "schedule": crontab(hour=2, minute=30),
+        "options": {"queue": "dns_tasks"},
+    },
+    "purge-idempotency-keys": {
+        "task": "app.celery.maintenance.purge_idempotency_keys",
+        "schedule": crontab(minute=15),
+        "options": {"queue": "dns_tasks"},
+    },
+    "requeue-stale-dns-requests": {
+        "task": "app.celery.maintenance.requeue_stale_requests",
+        "schedule": crontab(minute="*/5"),
+        "options": {"queue": "dns_tasks"},
+    },
+}
+
+@worker_process_init.connect
+def _reset_db_pools(**kwargs):
+    # Prefork children must not share pooled connections inherited from the parent
+    dispose_engines_after_fork()
+
+@worker_init.connect
+def _serve_metrics(**kwargs):
+    # The main worker process serves /metrics; with PROMETHEUS_MULTIPROC_DIR set
+    # it aggregates what the prefork children record
+    from app.core.metrics import start_metrics_server
+    start_metrics_server()
+
+@worker_process_shutdown.connect
+def _mark_metrics_process_dead(**kwargs):
+    from app.core.metrics import mark_process_dead
+    mark_process_dead(os.getpid())
+
+_log_context_tokens = {}
+
+@task_prerun.connect
+def _bind_task_log_context(task_id=None, task=None, **kwargs):
+    # Records logged while a task runs carry its name and ID
+    _log_context_tokens[task_id] = bind_log_context(task=task.name, task_id=task_id)
+
+@task_postrun.connect
+def _unbind_task_log_context(task_id=None, **kwargs):
+    token = _log_context_tokens.pop(task_id, None)
+    if token is not None:
+        unbind_log_context(token)
@@ -1,17 +1,301 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.core.config import settings
 from app.core.logging import get_logger
+from typing import Any, Dict
+import threading
+import time
+import uuid
 
 logger = get_logger(__name__)
 
-DATABASE_URL = settings.DATABASE_URL
+# Engines are created on first use rather than at import, so importing this
+# module (and everything that imports it) reads no settings and loads no driver.
+_engine = None
+_async_engine = None
+_read_engine = None
+_async_read_engine = None
+_engine_lock = threading.Lock()
 
-# Create a SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+class _CheckoutTimer:
+    """
+    Counts pool checkouts and the time callers spent waiting for them,
+    including time spent opening a new connection.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += elapsed
+            self.wait_seconds_max = max(self.wait_seconds_max, elapsed)
+
+class _TimedPoolMixin:
+    # Optional callable(elapsed, timed_out), set by app.core.metrics.instrument_engine
+    wait_observer = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_timer = _CheckoutTimer()
+
+    def _record_wait(self, elapsed: float, timed_out: bool = False):
+        self.checkout_timer.record(elapsed, timed_out=timed_out)
+        if self.wait_observer is not None:
+            self.wait_observer(elapsed, timed_out)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self._record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self._record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a recreated pool; keep reporting to the same observer
+        pool = super().recreate()
+        pool.wait_observer = self.wait_observer
+        return pool
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _timeout_settings() -> Dict[str, str]:
+    timeouts = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        timeouts["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    if settings.DB_LOCK_TIMEOUT_MS:
+        timeouts["lock_timeout"] = str(settings.DB_LOCK_TIMEOUT_MS)
+    return timeouts
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Keyword arguments for create_engine/create_async_engine: pool sizing and
+    pre-ping, plus driver-specific connect arguments for timeouts and
+    PgBouncer transaction pooling.
+    """
+    driver = make_url(url).get_dialect().driver
+    timeouts = _timeout_settings()
+    connect_args: Dict[str, Any] = {}
+    if driver == "asyncpg":
+        if settings.DB_PGBOUNCER_MODE:
+            # PgBouncer may hand each transaction a different server connection, so
+            # server-side prepared statements cannot be cached or reused by name
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+        elif timeouts:
+            connect_args["server_settings"] = timeouts
+    else:
+        if settings.DB_PGBOUNCER_MODE:
+            if driver == "psycopg":
+                # psycopg 3 prepares statements after repeated use; disable it
+                connect_args["prepare_threshold"] = None
+        elif timeouts:
+            connect_args["options"] = " ".join(f"-c {name}={value}" for name, value in timeouts.items())
+
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if driver == "asyncpg" else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+def _set_local_timeouts(sync_engine):
+    # PgBouncer transaction pooling rejects startup options and would leak session-level
+    # SETs to other clients, so timeouts are scoped to each transaction instead
+    timeouts = _timeout_settings()
+    if not settings.DB_PGBOUNCER_MODE or not timeouts:
+        return
+    statement = "SELECT " + ", ".join(f"set_config('{name}', '{value}', true)" for name, value in timeouts.items())
+
+    @event.listens_for(sync_engine, "begin")
+    def _apply_timeouts(conn):
+        conn.exec_driver_sql(statement)
+
+def _create_engine(url: str, name: str):
+    from app.core.metrics import instrument_engine
+    engine = create_engine(url, **engine_options(url))
+    _set_local_timeouts(engine)
+    instrument_engine(engine, name)
+    return engine
+
+def _create_async_engine(url: str, name: str):
+    from app.core.metrics import instrument_engine
+    engine = create_async_engine(url, **engine_options(url))
+    _set_local_timeouts(engine.sync_engine)
+    instrument_engine(engine.sync_engine, name)
+    return engine
+
+def get_engine():
+    """
+    Return the process-wide SQLAlchemy engine, creating it on first use.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(settings.DATABASE_URL, "sync")
+    return _engine
+
+def get_async_engine():
+    """
+    Return the process-wide async engine, used when DB_ASYNC_ENABLED is set.
+    """
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = _create_async_engine(settings.ASYNC_DATABASE_URL, "async")
+    return _async_engine
+
+def replica_configured() -> bool:
+    return bool(settings.DATABASE_READ_URL)
+
+def get_read_engine():
+    """
+    Return the engine for read-only queries: the replica when
+    DATABASE_READ_URL is set, otherwise the primary engine.
+    """
+    global _read_engine
+    if not replica_configured():
+        return get_engine()
+    if _read_engine is None:
+        with _engine_lock:
+            if _read_engine is None:
+                _read_engine = _create_engine(settings.DATABASE_READ_URL, "read")
+    return _read_engine
+
+def get_async_read_engine():
+    """
+    Async counterpart of get_read_engine.
+    """
+    global _async_read_engine
+    if not replica_configured():
+        return get_async_engine()
+    if _async_read_engine is None:
+        with _engine_lock:
+            if _async_read_engine is None:
+                _async_read_engine = _create_async_engine(settings.ASYNC_DATABASE_READ_URL, "async_read")
+    return _async_read_engine
+
+def _created_engines():
+    return [engine for engine in (_engine, _read_engine) if engine is not None]
+
+def _created_async_engines():
+    return [engine for engine in (_async_engine, _async_read_engine) if engine is not None]
+
+async def dispose_engines():
+    """
+    Close the pooled connections of whichever engines have been created.
+    """
+    for engine in _created_async_engines():
+        await engine.dispose()
+    for engine in _created_engines():
+        engine.dispose()
+
+def dispose_engines_after_fork():
+    """
+    Call in a freshly forked child (gunicorn post_fork, Celery
+    worker_process_init). Drops pooled connections inherited from the parent
+    without closing them, since the parent still owns those sockets; the
+    child then opens its own.
+    """
+    for engine in _created_engines():
+        engine.dispose(close=False)
+    for engine in _created_async_engines():
+        engine.sync_engine.dispose(close=False)
+
+def _pool_stats(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    timer = getattr(pool, "checkout_timer", None)
+    if timer is not None:
+        stats.update(
+            checkouts=timer.checkouts,
+            checkout_timeouts=timer.timeouts,
+            checkout_wait_seconds_total=round(timer.wait_seconds_total, 6),
+            checkout_wait_seconds_max=round(timer.wait_seconds_max, 6),
+        )
+    return stats
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Current pool gauges for each engine created in this process.
+    """
+    stats = {}
+    if _engine is not None:
+        stats["sync"] = _pool_stats(_engine)
+    if _async_engine is not None:
+        stats["async"] = _pool_stats(_async_engine.sync_engine)
+    if _read_engine is not None:
+        stats["read"] = _pool_stats(_read_engine)
+    if _async_read_engine is not None:
+        stats["async_read"] = _pool_stats(_async_read_engine.sync_engine)
+    return stats
+
+class _LazyBindSession(Session):
+    # Sessions resolve the engine when they first need a connection
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is None:
+            return get_engine()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class _LazyAsyncBindSession(Session):
+    # Sync facade behind AsyncSession; binds to the async engine's sync core
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is None:
+            return get_async_engine().sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class _LazyReadBindSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is None:
+            return get_read_engine()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class _LazyAsyncReadBindSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is None:
+            return get_async_read_engine().sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
 # Create a SessionLocal class to get a new session for each request
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=_LazyBindSession, autocommit=False, autoflush=False)
+
+# Async session factory used when DB_ASYNC_ENABLED is set.
+# expire_on_commit is disabled so attributes stay readable after commit
+# without an implicit (and in async code, illegal) lazy refresh.
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, sync_session_class=_LazyAsyncBindSession, autoflush=False, expire_on_commit=False)
+
+# Sessions for read-only queries; bound to the replica when one is configured
+ReadSessionLocal = sessionmaker(class_=_LazyReadBindSession, autocommit=False, autoflush=False)
+AsyncReadSessionLocal = async_sessionmaker(class_=AsyncSession, sync_session_class=_LazyAsyncReadBindSession, autoflush=False, expire_on_commit=False)
 
 # Create a declarative base to be used by all our models
 Base = declarative_base()
@@ -27,11 +311,29 @@ def get_db():
     finally:
         db.close()
 
-def create_tables():
+async def get_async_db():
+    """
+    Async counterpart of get_db.
+    It yields an AsyncSession which is closed once the request completes,
+    so the handler never occupies a threadpool slot while waiting on Postgres.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db():
     """
-    Creates all tables defined in Base's metadata.
-    This should be called at application startup.
+    Dependency for read-only endpoints. The session may be on a replica that
+    lags the primary; see app.core.read_routing for read-your-writes.
     """
-    logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Tables created successfully.")
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """
+    Async counterpart of get_read_db.
+    """
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,372 @@
+"""
+In-memory index of the DNS names in use, for rejecting conflicting create
+requests before they cost a database row and a provisioning run.
+
+DomainIndex is a trie keyed on reversed labels ("www.example.com" lives
+under com -> example -> www). Each node holds the records provisioned at
+that name (DnsRecord) and the requests still PENDING for it, so checking a
+request walks one node per label. check() reports:
+
+- names outside every zone in OWNED_ZONES (when it is set)
+- a CNAME at the apex of an owned zone
+- a CNAME next to other records at the same name, or a record next to a CNAME
+- an exact duplicate (name, type and target) of a provisioned record
+
+Requests identical to a PENDING one are not conflicts; idempotency keys and
+DEDUP_PENDING_REQUESTS decide what happens to those.
+
+Each process that validates requests (API workers, the direct-mode Kafka
+consumer) runs a DomainIndexSync: it LISTENs on dns_domain_changes, where
+the create paths announce new requests in their transaction, and on the
+status channel, where completions and failures arrive, then loads a
+snapshot and swaps it in. Only completions that wrote a DnsRecord (marked
+provisioned) become records; a status set by hand just drops the pending
+entry. A request whose announcement would exceed the NOTIFY payload limit
+is not announced; other processes see it after their next reload. Notifications received while loading are applied
+to the new snapshot afterwards. Until the first snapshot is loaded, and
+while DOMAIN_INDEX_ENABLED is off, requests are not checked.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import json
+import threading
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.notifications import RECONNECT_DELAY, STATUS_CHANNEL, _listen_dsn
+from app.utils.dns import normalize_domain
+from app.utils.lazy import LazyObject
+
+logger = get_logger(__name__)
+
+DOMAIN_CHANNEL = "dns_domain_changes"
+
+# Record types whose target is a domain name, compared case-insensitively
+NAME_TARGET_TYPES = frozenset({"CNAME", "MX", "NS", "PTR", "SRV"})
+
+# One NOTIFY per new request, all sent in a single statement
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD_BYTES = 7999
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload")
+
+_RECORDS_QUERY = "SELECT record_type, domain, target FROM dns_records"
+_PENDING_QUERY = "SELECT id, record_type, domain, target FROM dns_requests WHERE status = 'PENDING'"
+
+def _labels(domain: str) -> List[str]:
+    return normalize_domain(domain).split(".")[::-1]
+
+def _entry(record_type: str, target: str) -> Tuple[str, str]:
+    record_type = record_type.strip().upper()
+    target = normalize_domain(target) if record_type in NAME_TARGET_TYPES else target.strip()
+    return record_type, target
+
+class _Node:
+    __slots__ = ("children", "records", "pending", "zone")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # (record_type, target) -> number of provisioned records
+        self.records: Dict[Tuple[str, str], int] = {}
+        # request ID -> (record_type, target)
+        self.pending: Dict[str, Tuple[str, str]] = {}
+        self.zone = False
+
+    def entries(self) -> Iterable[Tuple[str, str]]:
+        yield from self.records
+        yield from self.pending.values()
+
+class DomainIndex:
+    """
+    Label-reversed trie of provisioned records and pending requests.
+    Safe to use from several threads.
+    """
+
+    def __init__(self, owned_zones: Iterable[str] = ()):
+        self._root = _Node()
+        self._lock = threading.Lock()
+        # request ID -> labels, to find a pending entry by ID
+        self._pending_names: Dict[str, List[str]] = {}
+        self.owned_zones = tuple(normalize_domain(zone) for zone in owned_zones if zone.strip())
+        for zone in self.owned_zones:
+            self._node(_labels(zone)).zone = True
+
+    def _node(self, labels: Sequence[str]) -> _Node:
+        node = self._root
+        for label in labels:
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = _Node()
+            node = child
+        return node
+
+    def _find(self, labels: Sequence[str]) -> Optional[_Node]:
+        node = self._root
+        for label in labels:
+            node = node.children.get(label)
+            if node is None:
+                return None
+        return node
+
+    def add_record(self, record_type: str, domain: str, target: str):
+        entry = _entry(record_type, target)
+        with self._lock:
+            node = self._node(_labels(domain))
+            node.records[entry] = node.records.get(entry, 0) + 1
+
+    def add_pending(self, request_id, record_type: str, domain: str, target: str):
+        request_id = str(request_id)
+        labels = _labels(domain)
+        with self._lock:
+            if request_id in self._pending_names:
+                return
+            self._node(labels).pending[request_id] = _entry(record_type, target)
+            self._pending_names[request_id] = labels
+
+    def resolve_pending(self, request_id, provisioned: bool):
+        """
+        Drop a pending request; when it was provisioned, keep it as a record.
+        Unknown IDs are ignored.
+        """
+        request_id = str(request_id)
+        with self._lock:
+            labels = self._pending_names.pop(request_id, None)
+            if labels is None:
+                return
+            node = self._find(labels)
+            entry = node.pending.pop(request_id)
+            if provisioned:
+                node.records[entry] = node.records.get(entry, 0) + 1
+            else:
+                self._prune(labels)
+
+    def _prune(self, labels: Sequence[str]):
+        # Remove the nodes of a name left without entries, zones or children
+        path = [self._root]
+        for label in labels:
+            path.append(path[-1].children[label])
+        for depth in range(len(labels), 0, -1):
+            node = path[depth]
+            if node.children or node.records or node.pending or node.zone:
+                return
+            del path[depth - 1].children[labels[depth - 1]]
+
+    def owning_zone(self, domain: str) -> Optional[str]:
+        """
+        The longest owned zone containing domain, or None.
+        """
+        labels = _labels(domain)
+        node = self._root
+        depth = 0
+        for i, label in enumerate(labels, 1):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if node.zone:
+                depth = i
+        return ".".join(reversed(labels[:depth])) if depth else None
+
+    def check(self, record_type: str, domain: str, target: str) -> Optional[str]:
+        """
+        Return why a new record would conflict, or None if it would not.
+        """
+        labels = _labels(domain)
+        name = ".".join(reversed(labels))
+        entry = _entry(record_type, target)
+        with self._lock:
+            if self.owned_zones:
+                zone = self.owning_zone(name)
+                if zone is None:
+                    return f"{name} is not in a zone we manage"
+                if entry[0] == "CNAME" and zone == name:
+                    return f"{name} is a zone apex and cannot have a CNAME record"
+            node = self._find(labels)
+            if node is None:
+                return None
+            if node.records.get(entry):
+                return f"{entry[0]} record {name} -> {entry[1]} already exists"
+            for existing in node.entries():
+                if existing == entry:
+                    continue
+                if entry[0] == "CNAME" or existing[0] == "CNAME":
+                    return f"{name} already has a {existing[0]} record; a CNAME cannot coexist with other records"
+        return None
+
+    def check_many(self, requests: Sequence[Tuple[str, str, str]]) -> List[Optional[str]]:
+        """
+        check() for a batch of (record_type, domain, target), where each
+        accepted request is also checked against the ones before it.
+        """
+        batch = DomainIndex()
+        results = []
+        for i, (record_type, domain, target) in enumerate(requests):
+            conflict = self.check(record_type, domain, target) or batch.check(record_type, domain, target)
+            if conflict is None:
+                batch.add_pending(i, record_type, domain, target)
+            results.append(conflict)
+        return results
+
+    def size(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending_names), "owned_zones": len(self.owned_zones)}
+
+_index: Optional[DomainIndex] = None
+
+def current_index() -> Optional[DomainIndex]:
+    """
+    This process's loaded index, or None when requests are not checked.
+    """
+    return _index if settings.DOMAIN_INDEX_ENABLED else None
+
+def _owned_zones() -> List[str]:
+    return [zone for zone in settings.OWNED_ZONES.split(",") if zone.strip()]
+
+def check_conflict(request) -> Optional[str]:
+    """
+    Conflict reason for a DnsRequestCreate, or None.
+    """
+    index = current_index()
+    if index is None:
+        return None
+    resource = request.resource
+    return index.check(resource.record_type, resource.domain, resource.target)
+
+def check_conflicts(requests) -> List[Optional[str]]:
+    index = current_index()
+    if index is None:
+        return [None] * len(requests)
+    return index.check_many([(r.resource.record_type, r.resource.domain, r.resource.target) for r in requests])
+
+def notify_new_requests(db, rows: Iterable[Tuple]):
+    """
+    Announce new requests, as (request_id, record_type, domain, target), to
+    every process's index. Call inside the inserting transaction.
+    """
+    if not settings.DOMAIN_INDEX_ENABLED:
+        return
+    payloads = []
+    for request_id, record_type, domain, target in rows:
+        payload = json.dumps({"request_id": str(request_id), "record_type": record_type, "domain": domain, "target": target})
+        # Failing the NOTIFY would fail the whole create transaction
+        if len(payload.encode("utf-8")) > MAX_NOTIFY_PAYLOAD_BYTES:
+            logger.warning("Not announcing request %s to the domain index: notification too large", request_id)
+            continue
+        payloads.append(payload)
+    if payloads:
+        db.execute(_NOTIFY_SQL, {"channel": DOMAIN_CHANNEL, "payloads": payloads})
+
+def index_new_requests(rows: Iterable[Tuple]):
+    """
+    Add just committed requests to this process's index right away, instead
+    of waiting for their notification.
+    """
+    index = current_index()
+    if index is not None:
+        for request_id, record_type, domain, target in rows:
+            index.add_pending(request_id, record_type, domain, target)
+
+def apply_notification(index: DomainIndex, channel: str, payload: str):
+    try:
+        event = json.loads(payload)
+        if channel == DOMAIN_CHANNEL:
+            index.add_pending(event["request_id"], event["record_type"], event["domain"], event["target"])
+        elif event["status"] != "PENDING":
+            index.resolve_pending(event["request_id"], provisioned=event.get("provisioned", False))
+    except (ValueError, KeyError, AttributeError) as e:
+        logger.warning("Ignoring malformed %s notification: %s", channel, e)
+
+class DomainIndexSync:
+    """
+    Loads this process's DomainIndex and keeps it current over one LISTEN
+    connection, reloading after the connection is lost (notifications may
+    have been missed in between).
+    """
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._conn = None
+        self._backlog: Optional[List[Tuple[str, str]]] = None
+        self._lost: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Set once the first snapshot is in place
+        self.loaded = threading.Event()
+
+    def _on_notify(self, conn, pid, channel, payload):
+        if self._backlog is not None:
+            self._backlog.append((channel, payload))
+        elif _index is not None:
+            apply_notification(_index, channel, payload)
+
+    async def _load(self, conn) -> DomainIndex:
+        index = DomainIndex(_owned_zones())
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            async for row in conn.cursor(_RECORDS_QUERY, prefetch=5000):
+                index.add_record(row["record_type"], row["domain"], row["target"])
+            async for row in conn.cursor(_PENDING_QUERY, prefetch=5000):
+                index.add_pending(row["id"], row["record_type"], row["domain"], row["target"])
+        return index
+
+    async def _sync_once(self):
+        global _index
+        import asyncpg
+
+        self._lost = asyncio.Event()
+        self._conn = await asyncpg.connect(self.dsn)
+        try:
+            self._conn.add_termination_listener(lambda conn: self._lost.set())
+            # Listen before loading, so nothing committed after the snapshot is missed
+            self._backlog = []
+            await self._conn.add_listener(DOMAIN_CHANNEL, self._on_notify)
+            await self._conn.add_listener(STATUS_CHANNEL, self._on_notify)
+            index = await self._load(self._conn)
+            for channel, payload in self._backlog:
+                apply_notification(index, channel, payload)
+            _index, self._backlog = index, None
+            self.loaded.set()
+            logger.info("Loaded domain index: %s", index.size())
+            await self._lost.wait()
+            logger.warning("Domain index LISTEN connection lost, reloading")
+        finally:
+            self._backlog = None
+            if not self._conn.is_closed():
+                await self._conn.close()
+
+    async def run(self):
+        while True:
+            try:
+                await self._sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Domain index sync failed: %s", e)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def start(self):
+        """
+        Run the sync as a task on the current event loop (API workers).
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def start_in_thread(self):
+        """
+        Run the sync on its own event loop thread (processes without one,
+        such as the Kafka consumer).
+        """
+        threading.Thread(target=asyncio.run, args=(self.run(),), name="domain-index-sync", daemon=True).start()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def _build_domain_index_sync() -> DomainIndexSync:
+    return DomainIndexSync(_listen_dsn(settings.DB_LISTEN_URL))
+
+domain_index_sync = LazyObject(_build_domain_index_sync)
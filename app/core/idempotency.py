@@ -0,0 +1,106 @@
+"""
+Idempotency keys and duplicate detection for DNS create requests.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import uuid
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.models import DnsRequest, IdempotencyKey
+from app.schemas.request import DnsRequestCreate
+from app.schemas.response import DnsRequestStatus
+from app.utils.dns import normalize_domain
+
+def request_fingerprint(request: DnsRequestCreate) -> str:
+    """
+    Hash of what makes two requests the same piece of work: the account,
+    record type, normalized domain, target and config. Comments and the
+    request source are ignored.
+    """
+    config = request.resource.config.model_dump(mode="json") if request.resource.config else None
+    identity = {
+        "account_id": request.context.account_id,
+        "record_type": request.resource.record_type.upper(),
+        "domain": normalize_domain(request.resource.domain),
+        "target": request.resource.target,
+        "config": config,
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+def request_body_hash(request: DnsRequestCreate) -> str:
+    """Hash of the full request body, used to reject reuse of a key for a different request."""
+    return hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+
+def find_idempotency_keys(db, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], IdempotencyKey]:
+    """
+    Look up stored responses by (account_id, key).
+    """
+    keys = list(set(keys))
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(IdempotencyKey).where(tuple_(IdempotencyKey.account_id, IdempotencyKey.key).in_(keys))
+    ).scalars()
+    return {(row.account_id, row.key): row for row in rows}
+
+def idempotency_row(account_id: str, key: str, request_hash: str, response: DnsRequestStatus) -> dict:
+    return {
+        "account_id": account_id,
+        "key": key,
+        "request_hash": request_hash,
+        "request_id": response.context.request_id,
+        "response": response.model_dump(mode="json"),
+    }
+
+def store_idempotency_keys(db, rows: List[dict]) -> bool:
+    """
+    Insert idempotency rows in the current transaction. Returns False if any
+    key already exists, i.e. a concurrent request with the same key won;
+    the caller must roll back and replay the stored response instead.
+    """
+    if not rows:
+        return True
+    statement = insert(IdempotencyKey).values(rows).on_conflict_do_nothing().returning(IdempotencyKey.key)
+    return len(db.execute(statement).all()) == len(rows)
+
+def lock_fingerprints(db, fingerprints: Iterable[str]) -> None:
+    """
+    Take transaction-scoped advisory locks on request fingerprints so two
+    identical requests cannot both miss each other's PENDING row. Locks are
+    taken in sorted order to avoid deadlocks between overlapping batches.
+    """
+    fingerprints = sorted(set(fingerprints))
+    if fingerprints:
+        db.execute(
+            text(
+                "SELECT pg_advisory_xact_lock(hashtextextended(h, 0)) "
+                "FROM (SELECT unnest(CAST(:fingerprints AS text[])) AS h ORDER BY 1) AS f"
+            ),
+            {"fingerprints": fingerprints}
+        )
+
+def find_pending_duplicates(db, fingerprints: Iterable[str]) -> Dict[str, uuid.UUID]:
+    """
+    Map each fingerprint to the ID of a PENDING request with that fingerprint, if any.
+    """
+    fingerprints = list(set(fingerprints))
+    if not fingerprints:
+        return {}
+    rows = db.execute(
+        select(DnsRequest.content_hash, DnsRequest.id)
+        .where(DnsRequest.status == "PENDING", DnsRequest.content_hash.in_(fingerprints))
+    )
+    return {row.content_hash: row.id for row in rows}
+
+def replay_response(stored: IdempotencyKey, request_hash: str) -> Optional[DnsRequestStatus]:
+    """
+    The stored response for a repeated key, or None if the key was first used
+    with a different request body.
+    """
+    if stored.request_hash != request_hash:
+        return None
+    return DnsRequestStatus.model_validate(stored.response)
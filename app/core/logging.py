@@ -1,6 +1,92 @@
-import logging
-import json
+"""
+JSON logging through a queue, so callers never wait on the log stream.
+
+get_logger() attaches one process-wide QueueHandler to each logger. The
+calling thread only filters the record (sampling, rate limiting), captures
+the contextual fields bound with bind_log_context()/log_context() and puts
+the record on a bounded queue. A background listener thread formats it as
+JSON and writes it to stderr. If the stream blocks and the queue fills up,
+records are dropped and counted instead of blocking the request; the count
+is reported once the listener catches up.
+
+Pass arguments %-style (logger.info("Processing %s", request_id)) on hot
+paths: the message is then only built for records that are emitted, and
+built on the listener thread when the arguments are immutable.
+
+This module is imported by app.core.config, so it reads its options from
+the environment directly:
+
+- LOG_LEVEL: level of the loggers returned by get_logger (default INFO)
+- LOG_QUEUE_SIZE: records buffered before new ones are dropped (default 10000)
+- LOG_ASYNC: set to false to format and write in the calling thread
+- LOG_SAMPLE_RATES: fraction of below-WARNING records kept per logger prefix,
+  e.g. "app.kafka.consumer=0.1,app.api=0.5"
+- LOG_RATE_LIMIT_PER_SECOND: below-ERROR records allowed per second from each
+  log call site (logger and line); 0 disables
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
 from logging import Handler, LogRecord
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional, Tuple
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Fields a record carries besides the standard ones
+CONTEXT_ATTRIBUTE = "log_context"
+SUPPRESSED_ATTRIBUTE = "suppressed"
+
+# Argument types safe to format later on the listener thread
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None), bytes, uuid.UUID)
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+# ASGI scope of the HTTP request being served, set by LogContextMiddleware
+_http_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("log_http_scope", default=None)
+
+def bind_log_context(**fields) -> Any:
+    """
+    Add fields (request_id, account_id, route, ...) to every record logged
+    from the current context. Returns a token for unbind_log_context.
+    """
+    return _context.set({**_context.get(), **fields})
+
+def unbind_log_context(token):
+    _context.reset(token)
+
+def _current_context() -> Dict[str, Any]:
+    context = _context.get()
+    scope = _http_scope.get()
+    if scope is not None:
+        # The route is only known once the router has matched the request
+        context = {**context, "route": route_label(scope)}
+    return context
+
+@contextmanager
+def log_context(**fields) -> Iterator[None]:
+    token = bind_log_context(**fields)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+def _dumps(log_object: Dict[str, Any]) -> str:
+    if orjson is not None:
+        return orjson.dumps(log_object, default=str).decode("utf-8")
+    return json.dumps(log_object, default=str)
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: LogRecord) -> str:
@@ -10,13 +96,273 @@ class JsonFormatter(logging.Formatter):
             "message": record.getMessage(),
             "name": record.name,
         }
-        return json.dumps(log_object)
+        context = getattr(record, CONTEXT_ATTRIBUTE, None)
+        if context is None:
+            context = _current_context()
+        if context:
+            log_object.update(context)
+        suppressed = getattr(record, SUPPRESSED_ATTRIBUTE, 0)
+        if suppressed:
+            log_object["suppressed"] = suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_object["exception"] = record.exc_text
+        return _dumps(log_object)
+
+def _parse_sample_rates(spec: str) -> Tuple[Tuple[str, float], ...]:
+    rates = []
+    for item in spec.split(","):
+        name, sep, rate = item.partition("=")
+        if sep and name.strip():
+            rates.append((name.strip(), float(rate)))
+    # Longest prefix first, so the most specific setting wins
+    return tuple(sorted(rates, key=lambda pair: len(pair[0]), reverse=True))
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of the below-WARNING records of the configured loggers
+    (and their children). Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Tuple[Tuple[str, float], ...]):
+        super().__init__()
+        self.rates = rates
+        self._by_logger: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._by_logger.get(name)
+        if rate is None:
+            rate = 1.0
+            for prefix, prefix_rate in self.rates:
+                if name == prefix or name.startswith(prefix + "."):
+                    rate = prefix_rate
+                    break
+            self._by_logger[name] = rate
+        return rate
+
+    def filter(self, record: LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per log call site (logger and line), so one hot loop cannot
+    flood the log. The first record let through after a suppressed run
+    carries the number of records dropped in between. Errors are never
+    limited.
+    """
+
+    def __init__(self, per_second: float):
+        super().__init__()
+        self.per_second = per_second
+        self._lock = threading.Lock()
+        # site -> (tokens, last refill time, suppressed count)
+        self._buckets: Dict[Tuple[str, int], list] = {}
+
+    def filter(self, record: LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        site = (record.name, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(site)
+            if bucket is None:
+                bucket = self._buckets[site] = [self.per_second, now, 0]
+            tokens = min(self.per_second, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False
+            bucket[0] = tokens - 1.0
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            setattr(record, SUPPRESSED_ATTRIBUTE, suppressed)
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records when the queue is full instead of
+    blocking or printing a traceback, and does only cheap work in the
+    calling thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # Copy, as QueueHandler does, so handlers further up the hierarchy see the original
+        record = copy.copy(record)
+        # Contextual fields live in this thread's context; capture them now
+        setattr(record, CONTEXT_ATTRIBUTE, _current_context())
+        if record.exc_info:
+            # Tracebacks reference live frames; render them before the caller moves on
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if record.args and (isinstance(record.args, dict) or not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in record.args)):
+            # Mutable arguments could change before the listener formats them
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def take_dropped(self) -> int:
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+class _DropReportingHandler(Handler):
+    """
+    Listener-side wrapper around the stream handler that reports records
+    dropped on a full queue once the writer has caught up.
+    """
+
+    def __init__(self, target: Handler, source: NonBlockingQueueHandler):
+        super().__init__()
+        self.target = target
+        self.source = source
+
+    def handle(self, record: LogRecord) -> bool:
+        self.target.handle(record)
+        dropped = self.source.take_dropped()
+        if dropped:
+            self.target.handle(logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "Dropped %d log records: log queue was full", "args": (dropped,),
+            }))
+        return True
+
+    def emit(self, record: LogRecord):
+        self.handle(record)
+
+_handler: Optional[Handler] = None
+_listener: Optional[QueueListener] = None
+_handler_lock = threading.Lock()
+
+def _stream_handler() -> Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+def _build_handler() -> Handler:
+    global _listener
+    if os.getenv("LOG_ASYNC", "true").lower() != "true":
+        handler = _stream_handler()
+    else:
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+        _listener = QueueListener(handler.queue, _DropReportingHandler(_stream_handler(), handler))
+        _listener.start()
+    sample_rates = _parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    rate_limit = float(os.getenv("LOG_RATE_LIMIT_PER_SECOND", "0"))
+    if rate_limit > 0:
+        handler.addFilter(RateLimitFilter(rate_limit))
+    return handler
+
+def _get_handler() -> Handler:
+    global _handler
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                _handler = _build_handler()
+    return _handler
+
+class _LazyHandler(Handler):
+    """
+    Stand-in attached by get_logger. The queue and its listener thread are
+    created on the first record, not at import, and recreated in a forked
+    child, where the parent's listener thread does not exist.
+    """
+
+    def handle(self, record: LogRecord) -> bool:
+        return _get_handler().handle(record)
+
+    def emit(self, record: LogRecord):
+        _get_handler().emit(record)
+
+_lazy_handler = _LazyHandler()
+
+def stop_logging():
+    """
+    Flush queued records and stop the listener thread. Runs at exit.
+    """
+    global _handler, _listener
+    with _handler_lock:
+        if _listener is not None:
+            try:
+                _listener.stop()
+            except queue.Full:
+                # No room for the stop sentinel; the daemon listener dies with the process
+                pass
+        _handler = None
+        _listener = None
+
+def _reset_after_fork():
+    # The listener thread was not copied into the child and the queue's locks
+    # may have been held at fork time; start over on the next record
+    global _handler, _listener, _handler_lock
+    _handler = None
+    _listener = None
+    _handler_lock = threading.Lock()
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class LogContextMiddleware:
+    """
+    Pure ASGI middleware giving each HTTP request its own log context with
+    the method and route template (see route_label). Logic code adds
+    request_id and account_id with bind_log_context once it knows them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _context.set({"method": scope["method"]})
+        scope_token = _http_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _http_scope.reset(scope_token)
+            _context.reset(token)
+
+def route_label(scope) -> str:
+    """
+    Path template of the route that served a request, e.g.
+    /api/v1/dns/{request_id}, or "unmatched" for 404s. Templates keep the
+    label set bounded no matter how many distinct IDs are requested.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    # Routers included by reference (newer FastAPI) report the route's path
+    # without the include prefix; take the missing leading segments from the
+    # concrete path
+    extra = scope["path"].rstrip("/").count("/") - template.rstrip("/").count("/")
+    if extra > 0:
+        template = "/".join(scope["path"].split("/")[:extra + 1]) + template
+    return template
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(JsonFormatter())
-        logger.addHandler(handler)
+        logger.addHandler(_lazy_handler)
     return logger
@@ -0,0 +1,218 @@
+"""
+Prometheus metrics for the API, database, Celery, Kafka and SSO hot paths.
+
+Every metric has labels, so nothing is allocated (or, in multiprocess mode,
+written to disk) until a code path first records a value. Recording is a
+dict lookup plus a lock-protected add, cheap enough for per-query use.
+
+Multiple processes: set the PROMETHEUS_MULTIPROC_DIR environment variable to
+an empty, writable directory shared by every process on the host (gunicorn
+workers, Celery prefork children). Each process then writes its values to
+memory-mapped files there, and whichever process serves /metrics (or the
+METRICS_PORT server) aggregates all of them. Without it, each process only
+reports its own values.
+"""
+
+import os
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+from app.core.logging import get_logger, route_label
+from app.core.timing import record_span
+
+logger = get_logger(__name__)
+
+# Latency buckets in seconds: HTTP and SSO calls, then database statements
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+PROVISIONING_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "dns_http_request_duration_seconds", "Time to serve an HTTP request",
+    ["method", "route", "status"], buckets=HTTP_BUCKETS
+)
+
+DB_QUERY_DURATION = Histogram(
+    "dns_db_query_duration_seconds", "Database statement execution time",
+    ["engine", "operation"], buckets=DB_BUCKETS
+)
+DB_QUERY_ERRORS = Counter("dns_db_query_errors_total", "Database statements that raised", ["engine"])
+DB_POOL_IN_USE = Gauge(
+    "dns_db_pool_connections_in_use", "Pooled connections currently checked out",
+    ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "dns_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    ["engine"], buckets=DB_BUCKETS
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter("dns_db_pool_checkout_timeouts_total", "Pool checkouts that timed out", ["engine"])
+
+CELERY_PUBLISH_DURATION = Histogram(
+    "dns_celery_publish_duration_seconds", "Time to publish a batch of tasks to the broker",
+    ["task"], buckets=HTTP_BUCKETS
+)
+CELERY_TASKS_PUBLISHED = Counter("dns_celery_tasks_published_total", "Tasks published to the broker", ["task"])
+PROVISION_TASKS = Counter("dns_provision_tasks_total", "provision_dns_record runs by outcome", ["outcome"])
+PROVISIONING_RUN_DURATION = Histogram(
+    "dns_provisioning_run_duration_seconds", "Duration of provisioning runs (one per zone batch)",
+    ["outcome"], buckets=PROVISIONING_BUCKETS
+)
+PROVISIONED_REQUESTS = Counter("dns_provisioned_requests_total", "DNS requests finalized by outcome", ["outcome"])
+
+# Messages per second is rate(dns_kafka_messages_total[1m])
+KAFKA_MESSAGES = Counter("dns_kafka_messages_total", "Kafka messages consumed by outcome", ["topic", "outcome"])
+KAFKA_CONSUMER_LAG = Gauge(
+    "dns_kafka_consumer_lag_messages", "Messages behind the partition high watermark",
+    ["topic", "partition"], multiprocess_mode="mostrecent"
+)
+
+SSO_VALIDATION_DURATION = Histogram(
+    "dns_sso_validation_duration_seconds", "Time to validate a token that missed the token cache",
+    ["method", "outcome"], buckets=HTTP_BUCKETS
+)
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+def _registry():
+    from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+    if not multiprocess_dir():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Current metrics in the Prometheus text format, with its content type.
+    """
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+def start_metrics_server():
+    """
+    Serve /metrics on METRICS_PORT for processes without an HTTP API
+    (Kafka consumer, outbox relay, Celery worker). Does nothing when
+    METRICS_PORT is unset.
+    """
+    if not settings.METRICS_ENABLED or not settings.METRICS_PORT:
+        return
+    from prometheus_client import start_http_server
+    start_http_server(settings.METRICS_PORT, registry=_registry())
+    logger.info("Serving Prometheus metrics on port %d", settings.METRICS_PORT)
+
+def mark_process_dead(pid: int):
+    """
+    Drop the live gauges of an exited process (gunicorn child_exit, Celery
+    worker_process_shutdown). Only needed in multiprocess mode.
+    """
+    if multiprocess_dir():
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording HTTP_REQUEST_DURATION per route, method
+    and status. Avoids BaseHTTPMiddleware, which adds a task and a memory
+    stream to every request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.labels(scope["method"], route_label(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip()[:6].upper()
+    return word.lower() if word in _OPERATIONS else "other"
+
+def instrument_engine(engine, name: str):
+    """
+    Record statement timings, errors and pool usage for a sync engine (pass
+    async_engine.sync_engine for async ones). name is the engine's label,
+    matching the keys of app.core.database.pool_stats().
+    """
+    from sqlalchemy import event
+
+    if not settings.METRICS_ENABLED:
+        return
+
+    durations: Dict[str, Histogram] = {}
+    errors = DB_QUERY_ERRORS.labels(name)
+    in_use = DB_POOL_IN_USE.labels(name)
+    checkout_wait = DB_POOL_CHECKOUT_WAIT.labels(name)
+    checkout_timeouts = DB_POOL_CHECKOUT_TIMEOUTS.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = _operation(statement)
+        histogram = durations.get(operation)
+        if histogram is None:
+            histogram = durations[operation] = DB_QUERY_DURATION.labels(name, operation)
+        histogram.observe(elapsed)
+        record_span("sql", elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(context):
+        errors.inc()
+        conn = context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        in_use.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        in_use.dec()
+
+    def _observe_wait(elapsed: float, timed_out: bool):
+        if timed_out:
+            checkout_timeouts.inc()
+        else:
+            checkout_wait.observe(elapsed)
+
+    engine.pool.wait_observer = _observe_wait
+
+def observe_kafka_batch(consumer, batches):
+    """
+    Update the lag of each partition in a polled batch.
+    """
+    for tp, messages in batches.items():
+        observe_kafka_lag(consumer, tp, messages[-1].offset)
+
+def observe_kafka_lag(consumer, tp, offset: int):
+    # highwater() is the watermark cached from the last fetch, no broker round trip
+    highwater = consumer.highwater(tp)
+    if highwater is not None:
+        KAFKA_CONSUMER_LAG.labels(tp.topic, str(tp.partition)).set(max(highwater - offset - 1, 0))
@@ -0,0 +1,182 @@
+"""
+Postgres LISTEN/NOTIFY based status notifications.
+
+Writers emit a NOTIFY on the dns_request_status channel inside the same
+transaction as the status change, so it is delivered only if the change
+commits. Each API process keeps a single LISTEN connection and fans
+notifications out to in-memory subscriber queues, so thousands of waiting
+streaming clients cost one database connection per process.
+"""
+
+import asyncio
+import json
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import DnsRequest
+from app.utils.lazy import LazyObject
+from app.core.logging import get_logger
+from app.core.status_cache import status_cache
+from app.core.read_routing import mark_written
+
+logger = get_logger(__name__)
+
+STATUS_CHANNEL = "dns_request_status"
+
+# Seconds to wait before re-establishing a dropped LISTEN connection
+RECONNECT_DELAY = 2.0
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+# Subscribed requests read per query when resyncing after a reconnect
+RESYNC_CHUNK_SIZE = 500
+
+def _notify_params(request_id, new_status: str, provisioned: bool = False) -> dict:
+    event = {"request_id": str(request_id), "status": new_status}
+    if provisioned:
+        event["provisioned"] = True
+    return {"channel": STATUS_CHANNEL, "payload": json.dumps(event)}
+
+def notify_status_change(db, request_id, new_status: str, provisioned: bool = False):
+    """
+    Queue a status NOTIFY in the session's current transaction.
+    Postgres delivers it to listeners when the transaction commits.
+    Set provisioned when the change also wrote the request's DnsRecord.
+    """
+    db.execute(_NOTIFY_SQL, _notify_params(request_id, new_status, provisioned))
+
+async def anotify_status_change(db, request_id, new_status: str, provisioned: bool = False):
+    """
+    AsyncSession counterpart of notify_status_change.
+    """
+    await db.execute(_NOTIFY_SQL, _notify_params(request_id, new_status, provisioned))
+
+class StatusBroadcaster:
+    """
+    Shares one LISTEN connection between all status subscribers of this process.
+
+    The connection is opened on the first subscription and re-established if
+    it drops. Notifications sent while it was down are lost, so after a
+    reconnect the current status of every subscribed request is read and
+    published as if it had been notified. Subscriber queues are bounded; a
+    client that stops reading loses its oldest updates rather than growing
+    memory without limit.
+    """
+
+    def __init__(self, dsn: str, queue_size: int = 100):
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._closing = False
+
+    async def _ensure_connected(self):
+        async with self._lock:
+            if self._conn is not None and not self._conn.is_closed():
+                return
+            import asyncpg
+            self._conn = await asyncpg.connect(self.dsn)
+            self._conn.add_termination_listener(self._on_terminated)
+            await self._conn.add_listener(STATUS_CHANNEL, self._on_notify)
+            logger.info("Listening for status notifications on channel %s", STATUS_CHANNEL)
+
+    def _on_terminated(self, conn):
+        if self._closing:
+            return
+        logger.warning("Status LISTEN connection lost, reconnecting")
+        asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while not self._closing and self._subscribers:
+            await asyncio.sleep(RECONNECT_DELAY)
+            try:
+                await self._ensure_connected()
+                await self._resync()
+                return
+            except Exception as e:
+                logger.error("Status LISTEN reconnect failed: %s", e)
+
+    async def _resync(self):
+        # Changes committed while the connection was down were never notified:
+        # locally cached statuses may be stale and subscribers may be waiting
+        status_cache.local.clear()
+        request_ids = list(self._subscribers)
+        if not request_ids:
+            return
+        # One read for all subscribers of this process, from the primary so a
+        # lagging replica cannot report an older status. id_clause lets
+        # Postgres prune each lookup to the partitions around its creation
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(request_ids), RESYNC_CHUNK_SIZE):
+                chunk = request_ids[start:start + RESYNC_CHUNK_SIZE]
+                query = select(DnsRequest.id, DnsRequest.status).where(or_(*(DnsRequest.id_clause(request_id) for request_id in chunk)))
+                for row in (await db.execute(query)).all():
+                    self._publish({"request_id": str(row.id), "status": row.status})
+        logger.info("Resynced the status of %d subscribed requests after reconnecting", len(request_ids))
+
+    def _on_notify(self, conn, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+            request_id = event["request_id"]
+        except (ValueError, KeyError) as e:
+            logger.warning("Ignoring malformed status notification: %s", e)
+            return
+        # Every API process sees every notification, which also keeps the
+        # in-process status cache fresh across processes
+        status_cache.local.pop(_as_uuid(request_id))
+        # Keep reads of this request on the primary until the replica catches up
+        mark_written(request_id)
+        self._publish(event)
+
+    def _publish(self, event: dict):
+        for queue in self._subscribers.get(event["request_id"], ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def subscribe(self, request_ids: Iterable) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        for request_id in request_ids:
+            self._subscribers[str(request_id)].add(queue)
+        try:
+            await self._ensure_connected()
+        except Exception:
+            self.unsubscribe(queue, request_ids)
+            raise
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, request_ids: Iterable):
+        for request_id in request_ids:
+            subscribers = self._subscribers.get(str(request_id))
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[str(request_id)]
+
+    async def stop(self):
+        self._closing = True
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+def _as_uuid(request_id: str):
+    try:
+        return uuid.UUID(request_id)
+    except ValueError:
+        return request_id
+
+def _listen_dsn(url: str) -> str:
+    # asyncpg takes a plain libpq-style DSN without the SQLAlchemy driver suffix
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+def _build_status_broadcaster() -> StatusBroadcaster:
+    return StatusBroadcaster(_listen_dsn(settings.DB_LISTEN_URL))
+
+status_broadcaster = LazyObject(_build_status_broadcaster)
@@ -0,0 +1,84 @@
+"""
+Routing of read-only queries between the primary and a streaming replica.
+
+Status, listing and history reads use the read session (get_read_db), which
+is on the replica when DATABASE_READ_URL is set. A replica trails the
+primary, so a client reading back a request it has just created or updated
+could find it missing or stale. Reads of a single request therefore go to
+the primary when the request was written within READ_YOUR_WRITES_WINDOW_SECONDS,
+and fall back to the primary when the replica does not have the row.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import uuid
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import replica_configured, get_read_engine
+from app.utils.cache import TTLCache
+from app.utils.ids import uuid7_datetime
+from app.utils.lazy import LazyObject
+
+RECENT_WRITES_MAX_SIZE = 100000
+
+# Seconds the replica is behind the primary. Zero when it has replayed all the
+# WAL it received: on an idle primary pg_last_xact_replay_timestamp() stops
+# advancing, and measuring from it alone would report growing lag.
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# Request IDs this process has updated recently. Creations need no entry: the
+# creation time is encoded in the UUIDv7 request ID.
+_recent_writes = LazyObject(lambda: TTLCache(maxsize=RECENT_WRITES_MAX_SIZE, ttl=settings.READ_YOUR_WRITES_WINDOW_SECONDS))
+
+def _as_uuid(request_id) -> uuid.UUID:
+    return uuid.UUID(request_id) if isinstance(request_id, str) else request_id
+
+def mark_written(request_id):
+    """
+    Record that request_id was just written, so reads of it stay on the
+    primary until the replica has had time to catch up.
+    """
+    if replica_configured():
+        _recent_writes.set(_as_uuid(request_id), True)
+
+def read_from_primary(request_id, now: Optional[datetime] = None) -> bool:
+    """
+    Whether a read of request_id should skip the replica. Always False
+    without a replica, where the read session already is the primary.
+    """
+    if not replica_configured():
+        return False
+    request_id = _as_uuid(request_id)
+    if _recent_writes.get(request_id):
+        return True
+    created = uuid7_datetime(request_id)
+    if created is None:
+        return False
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return now - created < timedelta(seconds=settings.READ_YOUR_WRITES_WINDOW_SECONDS)
+
+def replica_lag_seconds() -> Optional[float]:
+    """
+    Current replication lag of the read replica, or None without one.
+    """
+    if not replica_configured():
+        return None
+    with get_read_engine().connect() as conn:
+        return float(conn.execute(REPLICA_LAG_QUERY).scalar())
+
+def replica_status() -> Dict[str, Any]:
+    if not replica_configured():
+        return {"replica": False, "lag_seconds": None}
+    return {
+        "replica": True,
+        "lag_seconds": replica_lag_seconds(),
+        "read_your_writes_window_seconds": settings.READ_YOUR_WRITES_WINDOW_SECONDS,
+    }
@@ -0,0 +1,39 @@
+"""
+Helpers for appending to the dns_request_events history table.
+"""
+
+from typing import Iterable, Tuple
+
+from sqlalchemy import insert
+
+from app.models.models import DnsRequestEvent
+
+# (request_id, status, message)
+EventRow = Tuple[object, str, str]
+
+def _event_statement(events: Iterable[EventRow]):
+    rows = [{"request_id": request_id, "status": status, "message": message} for request_id, status, message in events]
+    return insert(DnsRequestEvent), rows
+
+def record_events(db, events: Iterable[EventRow]):
+    """
+    Append history entries in the session's current transaction with a single
+    executemany INSERT. Nothing already stored is read or rewritten.
+    """
+    statement, rows = _event_statement(events)
+    if rows:
+        db.execute(statement, rows)
+
+def record_event(db, request_id, status: str, message: str):
+    record_events(db, [(request_id, status, message)])
+
+async def arecord_events(db, events: Iterable[EventRow]):
+    """
+    AsyncSession counterpart of record_events.
+    """
+    statement, rows = _event_statement(events)
+    if rows:
+        await db.execute(statement, rows)
+
+async def arecord_event(db, request_id, status: str, message: str):
+    await arecord_events(db, [(request_id, status, message)])
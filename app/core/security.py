@@ -6,18 +6,101 @@ supporting various SSO providers and token validation.
 """
 
 import os
+import time
+import asyncio
+import hashlib
+import json
 import httpx
+import jwt
 from typing import Optional, Dict, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.logging import get_logger
 from app.core.config import settings
+from app.utils.cache import TTLCache
+from app.core.metrics import SSO_VALIDATION_DURATION
+from app.core.timing import span
 
 logger = get_logger(__name__)
 
 # Initialize HTTP Bearer security scheme
 security = HTTPBearer()
 
+class JWKSCache:
+    """
+    Signing keys from the SSO provider's JWKS, refreshed in the background.
+
+    The source can be an http(s) URL or a local file (file:// URL or plain
+    path), which allows verification to be tested with a locally generated
+    key pair.
+    """
+
+    def __init__(self, source: str, refresh_interval: float, get_client):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self._get_client = get_client
+        self._keys: Dict[str, Any] = {}
+        self._last_refresh = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _load(self) -> Dict[str, Any]:
+        if self.source.startswith(("http://", "https://")):
+            response = await self._get_client().get(self.source, timeout=10.0)
+            response.raise_for_status()
+            data = response.json()
+        else:
+            path = self.source[len("file://"):] if self.source.startswith("file://") else self.source
+            with open(path) as f:
+                data = json.load(f)
+        return data
+
+    async def refresh(self):
+        """
+        Reload the key set. Failures keep the previously loaded keys.
+        """
+        async with self._refresh_lock:
+            try:
+                key_set = jwt.PyJWKSet.from_dict(await self._load())
+                self._keys = {key.key_id: key for key in key_set.keys}
+                logger.info("Loaded %d signing keys from JWKS", len(self._keys))
+            except Exception as e:
+                logger.error("Failed to refresh JWKS from %s: %s", self.source, e)
+            finally:
+                self._last_refresh = time.monotonic()
+
+    async def get_key(self, kid: Optional[str]):
+        """
+        Return the signing key for kid, refreshing once if it is unknown
+        (key rotation) but no more often than every 30 seconds.
+        """
+        key = self._lookup(kid)
+        if key is None and time.monotonic() - self._last_refresh > 30:
+            await self.refresh()
+            key = self._lookup(kid)
+        return key
+
+    def _lookup(self, kid: Optional[str]):
+        if kid is None:
+            # Tokens without a kid are only accepted when the set has a single key
+            return next(iter(self._keys.values())) if len(self._keys) == 1 else None
+        return self._keys.get(kid)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def start(self):
+        await self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
 class SSOAuth:
     """
     SSO Authentication handler for various SSO providers.
@@ -29,6 +112,214 @@ class SSOAuth:
         self.sso_client_secret = os.getenv("SSO_CLIENT_SECRET")
         self.token_validation_endpoint = f"{self.sso_endpoint}/validate"
         self.user_info_endpoint = f"{self.sso_endpoint}/userinfo"
+        self.http_max_connections = int(os.getenv("SSO_HTTP_MAX_CONNECTIONS", "100"))
+        # "remote" validates every new token against the SSO provider; "local" verifies
+        # signed JWTs against the JWKS and only falls back to the provider when a
+        # token cannot be verified locally (opaque token, unknown key, JWKS unavailable)
+        self.validation_mode = os.getenv("SSO_VALIDATION_MODE", "remote")
+        self.jwt_issuer = os.getenv("SSO_JWT_ISSUER")
+        self.jwt_audience = os.getenv("SSO_JWT_AUDIENCE", self.sso_client_id)
+        self.jwt_algorithms = os.getenv("SSO_JWT_ALGORITHMS", "RS256,ES256").split(",")
+        self.jwks = JWKSCache(
+            source=os.getenv("SSO_JWKS_URL", f"{self.sso_endpoint}/.well-known/jwks.json"),
+            refresh_interval=float(os.getenv("SSO_JWKS_REFRESH_SECONDS", "300")),
+            get_client=self._get_client
+        )
+        # Validated tokens are cached by SHA-256 hash so raw tokens are never used as keys
+        self.token_cache = TTLCache(
+            maxsize=int(os.getenv("SSO_CACHE_MAX_SIZE", "10000")),
+            ttl=float(os.getenv("SSO_CACHE_TTL_SECONDS", "300"))
+        )
+        self.single_flight_joins = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Return the process-wide pooled client, creating it on first use.
+        Reusing keep-alive connections avoids a TLS handshake per call.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(
+                    max_connections=self.http_max_connections,
+                    max_keepalive_connections=self.http_max_connections
+                )
+            )
+        return self._client
+
+    async def start(self):
+        """
+        Load the JWKS and start its background refresh when local verification
+        is enabled. Called on application startup.
+
+        Raises:
+            RuntimeError: If local verification is enabled without an issuer
+            and audience to verify tokens against
+        """
+        if self.validation_mode == "local":
+            if not self.jwt_issuer or not self.jwt_audience:
+                raise RuntimeError(
+                    "SSO_VALIDATION_MODE=local requires SSO_JWT_ISSUER and SSO_JWT_AUDIENCE (or SSO_CLIENT_ID)"
+                )
+            await self.jwks.start()
+
+    async def aclose(self):
+        """
+        Stop the JWKS refresh and close the pooled HTTP client. Called on application shutdown.
+        """
+        await self.jwks.stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Token cache hit/miss counters plus the number of lookups that joined
+        an in-flight validation instead of calling the SSO provider.
+        """
+        return {**self.token_cache.stats(), "single_flight_joins": self.single_flight_joins}
+
+    async def authenticate(self, token: str) -> Dict[str, Any]:
+        """
+        Validate a token and fetch user info, served from the token cache when possible.
+
+        Concurrent lookups of the same uncached token share a single
+        validation instead of each calling the SSO provider.
+
+        Args:
+            token: The bearer token to authenticate
+
+        Returns:
+            Dict with token_data, user_info and token
+
+        Raises:
+            HTTPException: If token validation fails
+        """
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached = self.token_cache.get(key)
+        if cached is not None:
+            return {**cached, "token": token}
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._authenticate_remote(key, token))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.single_flight_joins += 1
+        # shield so one cancelled caller does not cancel the lookup for the others
+        user_data = await asyncio.shield(task)
+        return {**user_data, "token": token}
+
+    async def _authenticate_remote(self, key: str, token: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        method = "local"
+        outcome = "error"
+        cacheable = True
+        try:
+            user_data = None
+            if self.validation_mode == "local":
+                user_data = await self.verify_token_locally(token)
+
+            if user_data is None:
+                method = "remote"
+                # Both calls only depend on the token, so run them concurrently
+                token_data, user_info = await asyncio.gather(
+                    self.validate_token(token),
+                    self._fetch_user_info(token)
+                )
+                # Without user info this request gets no permissions; that is not
+                # cached, so the next request with the token asks again
+                cacheable = user_info is not None
+                user_data = {"token_data": token_data, "user_info": user_info or {}}
+            outcome = "ok"
+        except HTTPException as e:
+            outcome = "rejected" if e.status_code == status.HTTP_401_UNAUTHORIZED else "unavailable"
+            raise
+        finally:
+            SSO_VALIDATION_DURATION.labels(method, outcome).observe(time.perf_counter() - started)
+
+        if cacheable:
+            self.token_cache.set(key, user_data, ttl=self._remaining_lifetime(user_data["token_data"]))
+        return user_data
+
+    async def verify_token_locally(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Verify a signed JWT against the cached JWKS without calling the SSO provider.
+
+        Args:
+            token: The bearer token to verify
+
+        Returns:
+            user_data in the same shape as remote validation, or None when the
+            token cannot be verified locally and remote validation should decide
+
+        Raises:
+            HTTPException: If the token is verifiably invalid (bad signature,
+            wrong issuer or audience, expired)
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.DecodeError:
+            # Not a JWT, e.g. an opaque access token
+            return None
+
+        signing_key = await self.jwks.get_key(header.get("kid"))
+        if signing_key is None:
+            logger.warning("No JWKS key for token, falling back to remote validation")
+            return None
+
+        try:
+            claims = jwt.decode(
+                token,
+                signing_key.key,
+                algorithms=self.jwt_algorithms,
+                audience=self.jwt_audience,
+                issuer=self.jwt_issuer,
+                options={
+                    "require": ["exp", "iss", "aud"],
+                    "verify_aud": True,
+                    "verify_iss": True
+                }
+            )
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+        except jwt.InvalidTokenError as e:
+            logger.warning("Local token verification failed: %s", e)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+
+        return {"token_data": claims, "user_info": self._user_info_from_claims(claims)}
+
+    @staticmethod
+    def _user_info_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+        # Mirror the /userinfo fields that require_permissions and require_role read
+        permissions = claims.get("permissions")
+        if permissions is None and isinstance(claims.get("scope"), str):
+            permissions = claims["scope"].split()
+        return {
+            "sub": claims.get("sub"),
+            "email": claims.get("email"),
+            "name": claims.get("name"),
+            "role": claims.get("role"),
+            "permissions": permissions or []
+        }
+
+    @staticmethod
+    def _remaining_lifetime(token_data: Dict[str, Any]) -> Optional[float]:
+        # Never cache a token beyond its own expiry
+        if isinstance(token_data.get("exp"), (int, float)):
+            return token_data["exp"] - time.time()
+        if isinstance(token_data.get("expires_in"), (int, float)):
+            return float(token_data["expires_in"])
+        return None
         
     async def validate_token(self, token: str) -> Dict[str, Any]:
         """
@@ -44,33 +335,34 @@ class SSOAuth:
             HTTPException: If token validation fails
         """
         try:
-            logger.info("Validating SSO token")
+            logger.debug("Validating SSO token")
             
             # Make request to SSO provider for token validation
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                }
-                
-                # Validate token
-                response = await client.get(
-                    self.token_validation_endpoint,
-                    headers=headers,
-                    timeout=10.0
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json"
+            }
+
+            # Validate token
+            response = await self._get_client().get(
+                self.token_validation_endpoint,
+                headers=headers,
+                timeout=10.0
+            )
+
+            if response.status_code == 200:
+                token_data = response.json()
+                logger.debug("SSO token validation successful")
+                return token_data
+            else:
+                logger.warning("SSO token validation failed: %s", response.status_code)
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid or expired token"
                 )
-                
-                if response.status_code == 200:
-                    token_data = response.json()
-                    logger.info("SSO token validation successful")
-                    return token_data
-                else:
-                    logger.warning(f"SSO token validation failed: {response.status_code}")
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail="Invalid or expired token"
-                    )
-                    
+
+        except HTTPException:
+            raise
         except httpx.TimeoutException:
             logger.error("SSO token validation timeout")
             raise HTTPException(
@@ -78,7 +370,7 @@ class SSOAuth:
                 detail="SSO service unavailable"
             )
         except Exception as e:
-            logger.error(f"SSO token validation error: {e}")
+            logger.error("SSO token validation error: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token validation failed"
@@ -92,30 +384,33 @@ class SSOAuth:
             token: The bearer token
             
         Returns:
-            Dict containing user information
+            Dict containing user information, empty if it could not be fetched
         """
+        return await self._fetch_user_info(token) or {}
+
+    async def _fetch_user_info(self, token: str) -> Optional[Dict[str, Any]]:
+        # None when the SSO provider did not answer with user info
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = await client.get(
-                    self.user_info_endpoint,
-                    headers=headers,
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logger.warning(f"Failed to get user info: {response.status_code}")
-                    return {}
-                    
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json"
+            }
+
+            response = await self._get_client().get(
+                self.user_info_endpoint,
+                headers=headers,
+                timeout=10.0
+            )
+
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.warning("Failed to get user info: %s", response.status_code)
+                return None
+
         except Exception as e:
-            logger.error(f"Error getting user info: {e}")
-            return {}
+            logger.error("Error getting user info: %s", e)
+            return None
 
 # Initialize SSO auth instance
 sso_auth = SSOAuth()
@@ -142,26 +437,17 @@ async def get_current_user(
         )
     
     try:
-        # Validate token with SSO provider
-        token_data = await sso_auth.validate_token(credentials.credentials)
-        
-        # Get additional user information
-        user_info = await sso_auth.get_user_info(credentials.credentials)
-        
-        # Combine token data and user info
-        user_data = {
-            "token_data": token_data,
-            "user_info": user_info,
-            "token": credentials.credentials
-        }
-        
-        logger.info(f"User authenticated: {user_info.get('email', 'unknown')}")
+        # Validate token and fetch user info (cached, single-flight, concurrent)
+        with span("sso"):
+            user_data = await sso_auth.authenticate(credentials.credentials)
+
+        logger.debug("User authenticated: %s", user_data["user_info"].get("email", "unknown"))
         return user_data
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Authentication error: {e}")
+        logger.error("Authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authentication failed"
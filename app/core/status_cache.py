@@ -0,0 +1,185 @@
+"""
+Read-through cache for DNS request status lookups.
+
+Pollers hit GET /{request_id} in tight loops while provisioning runs, and the
+answer rarely changes. Lookups are served from an in-process LRU first and an
+optional shared Redis tier second, falling back to the database. Writers
+(the update-status logic and the Celery task) invalidate the entry whenever a
+status changes.
+
+A reader that loaded the row just before a writer committed must not put its
+stale snapshot back after the writer's invalidation. Invalidation therefore
+bumps a per-request generation in Redis; read() returns the generation seen
+on the miss, and set() only writes the shared tier if it is unchanged.
+"""
+
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Optional, Tuple
+import uuid
+
+from app.core.config import settings
+from app.utils.lazy import LazyObject
+from app.core.logging import get_logger
+from app.utils.cache import TTLCache
+
+logger = get_logger(__name__)
+
+# Writes the snapshot (KEYS[1]) only if the generation (KEYS[2]) is still the
+# one the reader saw on its miss (ARGV[1], "" when there was none)
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """
+    The cached subset of a DnsRequest needed to answer a status poll.
+    """
+    id: uuid.UUID
+    status: str
+    updated_at: Optional[str]
+
+    @classmethod
+    def from_row(cls, row) -> "StatusSnapshot":
+        updated_at = row.updated_at.isoformat() if isinstance(row.updated_at, datetime) else row.updated_at
+        return cls(id=row.id, status=row.status, updated_at=updated_at)
+
+    @property
+    def etag(self) -> str:
+        digest = hashlib.sha1(f"{self.id}:{self.status}:{self.updated_at}".encode("utf-8")).hexdigest()
+        return f'"{digest[:20]}"'
+
+class StatusCache:
+    """
+    Two-tier status cache. Redis errors are logged and treated as misses so
+    the cache can never fail a request.
+    """
+
+    def __init__(self, maxsize: int, local_ttl: float, redis_url: Optional[str], redis_ttl: int):
+        self.local = TTLCache(maxsize=maxsize, ttl=local_ttl)
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self._redis = None
+        self._set_script = None
+
+    def _redis_client(self):
+        if self._redis is None and self.redis_url:
+            import redis
+            # Tight timeouts: a slow cache must not be slower than the database
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.05, socket_connect_timeout=0.05)
+            self._set_script = self._redis.register_script(_SET_IF_GENERATION)
+        return self._redis
+
+    @staticmethod
+    def _redis_keys(request_id) -> Tuple[str, str]:
+        # Snapshot and generation share a hash tag, so they live on one cluster slot
+        return f"dns_status:{{{request_id}}}", f"dns_status_gen:{{{request_id}}}"
+
+    def _redis_get(self, request_id) -> Tuple[Optional[StatusSnapshot], Optional[str]]:
+        client = self._redis_client()
+        if client is None:
+            return None, None
+        try:
+            raw, generation = client.mget(self._redis_keys(request_id))
+        except Exception as e:
+            logger.warning("Status cache Redis read failed: %s", e)
+            # Unknown generation: the snapshot loaded after this miss is kept local only
+            return None, None
+        generation = generation.decode() if generation is not None else ""
+        if raw is None:
+            return None, generation
+        data = json.loads(raw)
+        return StatusSnapshot(id=uuid.UUID(data["id"]), status=data["status"], updated_at=data["updated_at"]), generation
+
+    def _redis_set(self, snapshot: StatusSnapshot, generation: str):
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            value = json.dumps({**asdict(snapshot), "id": str(snapshot.id)})
+            self._set_script(keys=self._redis_keys(snapshot.id), args=[generation, value, self.redis_ttl])
+        except Exception as e:
+            logger.warning("Status cache Redis write failed: %s", e)
+
+    def read(self, request_id) -> Tuple[Optional[StatusSnapshot], Optional[str]]:
+        """
+        Look up a snapshot. On a miss, also returns the generation to pass to
+        set() with the snapshot loaded from the database (None when the
+        shared tier could not be asked, which keeps that snapshot local).
+        """
+        snapshot = self.local.get(request_id)
+        if snapshot is not None:
+            return snapshot, None
+        snapshot, generation = self._redis_get(request_id)
+        if snapshot is not None:
+            self.local.set(request_id, snapshot)
+        return snapshot, generation
+
+    async def aread(self, request_id) -> Tuple[Optional[StatusSnapshot], Optional[str]]:
+        """
+        Same as read, with the Redis round trip moved off the event loop.
+        """
+        snapshot = self.local.get(request_id)
+        if snapshot is not None or not self.redis_url:
+            return snapshot, None
+        snapshot, generation = await asyncio.to_thread(self._redis_get, request_id)
+        if snapshot is not None:
+            self.local.set(request_id, snapshot)
+        return snapshot, generation
+
+    def get(self, request_id) -> Optional[StatusSnapshot]:
+        return self.read(request_id)[0]
+
+    def set(self, snapshot: StatusSnapshot, shared: bool = True, generation: Optional[str] = None):
+        """
+        Cache a snapshot loaded after read() missed with generation. It is
+        written to the shared tier only if no invalidation happened since.
+        Pass shared=False for snapshots read from a replica: they may
+        predate an invalidation, so they are kept only for the short local
+        TTL and never written to the shared tier.
+        """
+        self.local.set(snapshot.id, snapshot)
+        if shared and generation is not None:
+            self._redis_set(snapshot, generation)
+
+    async def aset(self, snapshot: StatusSnapshot, shared: bool = True, generation: Optional[str] = None):
+        self.local.set(snapshot.id, snapshot)
+        if shared and generation is not None and self.redis_url:
+            await asyncio.to_thread(self._redis_set, snapshot, generation)
+
+    def invalidate(self, request_id):
+        if isinstance(request_id, str):
+            request_id = uuid.UUID(request_id)
+        self.local.pop(request_id)
+        client = self._redis_client()
+        if client is None:
+            return
+        key, generation_key = self._redis_keys(request_id)
+        try:
+            with client.pipeline(transaction=False) as pipe:
+                pipe.incr(generation_key)
+                # Outlives any reader's miss-to-set window; an expired generation
+                # also fails the readers' comparison, so it stays safe
+                pipe.expire(generation_key, self.redis_ttl)
+                pipe.delete(key)
+                pipe.execute()
+        except Exception as e:
+            logger.warning("Status cache Redis invalidation failed: %s", e)
+
+def _build_status_cache() -> StatusCache:
+    return StatusCache(
+        maxsize=settings.STATUS_CACHE_MAX_SIZE if settings.STATUS_CACHE_ENABLED else 0,
+        local_ttl=settings.STATUS_CACHE_LOCAL_TTL_SECONDS,
+        redis_url=settings.STATUS_CACHE_REDIS_URL if settings.STATUS_CACHE_ENABLED else None,
+        redis_ttl=settings.STATUS_CACHE_REDIS_TTL_SECONDS
+    )
+
+status_cache = LazyObject(_build_status_cache)
@@ -0,0 +1,289 @@
+"""
+Per-request timing breakdown (Server-Timing) and a sampling profiler.
+
+Code marks the phases of a request with span("name"). While a request is
+being timed, each span adds its duration to the request's RequestTimings,
+which ServerTimingMiddleware returns in a Server-Timing header, e.g.
+
+    Server-Timing: validate;dur=1.8, stage;dur=4.2, sql;dur=3.9;desc="6 calls", commit;dur=2.1, total;dur=9.6
+
+Spans with the same name are summed. Durations are in milliseconds.
+
+Sampled requests (PROFILE_SAMPLE_RATE, or the X-Profile header when
+PROFILE_HEADER_ENABLED is set) are also profiled: a background thread
+samples the stacks of the threads running the request every
+PROFILE_INTERVAL_MS and the result is written to PROFILE_DIR in collapsed
+stack format ("frame;frame;frame count" per line), which flamegraph.pl,
+speedscope and inferno read directly.
+
+When neither timing nor profiling is enabled the middleware is not
+installed, TimedRoute does not wrap endpoints and span() reduces to one
+context variable lookup.
+"""
+
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Set
+import asyncio
+import inspect
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+# Frames kept per sample, innermost last; deeper stacks are truncated at the root
+MAX_STACK_DEPTH = 128
+
+_NO_SPAN = nullcontext()
+
+def timing_enabled() -> bool:
+    return settings.SERVER_TIMING_ENABLED or settings.PROFILE_SAMPLE_RATE > 0 or settings.PROFILE_HEADER_ENABLED
+
+class RequestTimings:
+    """
+    Span totals of one request, shared by every context copy (threadpool
+    calls, tasks) made while handling it.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handler_started: Optional[float] = None
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.profile: Optional["_Profile"] = None
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def header_value(self) -> str:
+        now = time.perf_counter()
+        entries = []
+        if self.handler_started is not None:
+            # Body parsing, Pydantic validation and dependencies (SSO is also reported on its own)
+            entries.append(f"validate;dur={(self.handler_started - self.started) * 1000:.1f}")
+        for name, seconds in self.durations.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if self.counts[name] > 1:
+                entry += f';desc="{self.counts[name]} calls"'
+            entries.append(entry)
+        if self.profile is not None:
+            entries.append(f'profile;desc="{self.profile.filename}"')
+        entries.append(f"total;dur={(now - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+def span(name: str):
+    """
+    Context manager timing one phase of the current request. A no-op when
+    the request is not being timed.
+    """
+    timings = _current.get()
+    if timings is None:
+        return _NO_SPAN
+    return _timed_span(timings, name)
+
+@contextmanager
+def _timed_span(timings: RequestTimings, name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+def record_span(name: str, seconds: float):
+    """
+    Add an already measured duration (e.g. from SQLAlchemy events) to the current request.
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+def _handler_entered():
+    # Marks the end of the validate phase and registers the thread for profiling
+    timings = _current.get()
+    if timings is None:
+        return
+    if timings.handler_started is None:
+        timings.handler_started = time.perf_counter()
+    if timings.profile is not None:
+        timings.profile.threads.add(threading.get_ident())
+
+class TimedRoute(APIRoute):
+    """
+    Route class that notes when the endpoint starts, splitting request
+    parsing and validation from the handler. Endpoints are only wrapped
+    when timing is enabled.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if timing_enabled():
+            endpoint = _wrap_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+def _wrap_endpoint(endpoint):
+    # functools.wraps keeps the signature FastAPI inspects for parameters
+    if inspect.iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            _handler_entered()
+            return await endpoint(*args, **kwargs)
+    else:
+        @wraps(endpoint)
+        def timed_endpoint(*args, **kwargs):
+            _handler_entered()
+            return endpoint(*args, **kwargs)
+    return timed_endpoint
+
+class _Profile:
+    def __init__(self, filename: str, thread_id: int):
+        self.filename = filename
+        self.threads: Set[int] = {thread_id}
+        self.stacks: Counter = Counter()
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def _collapse(frame) -> str:
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+class SamplingProfiler:
+    """
+    One daemon thread per process sampling the registered threads of every
+    active profile. It only runs while at least one profile is active.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Set[_Profile] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: _Profile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, profile: _Profile):
+        with self._lock:
+            self._active.discard(profile)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                profiles = list(self._active)
+            if not profiles:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for profile in profiles:
+                for thread_id in list(profile.threads):
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        profile.stacks[_collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+_profiler: Optional[SamplingProfiler] = None
+
+def _get_profiler() -> SamplingProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(settings.PROFILE_INTERVAL_MS / 1000)
+    return _profiler
+
+def _profile_filename(method: str, path: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:80] or "root"
+    return f"{stamp}-{method}-{slug}-{uuid.uuid4().hex[:8]}.folded"
+
+def write_profile(profile: _Profile) -> Optional[str]:
+    """
+    Write a profile's samples in collapsed stack format. Returns the path,
+    or None when no samples were taken.
+    """
+    if not profile.stacks:
+        return None
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILE_DIR, profile.filename)
+    with open(path, "w") as f:
+        for stack, count in profile.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+def _profile_requested(scope) -> bool:
+    if settings.PROFILE_HEADER_ENABLED:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return value not in (b"", b"0", b"false")
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware that times each HTTP request, adds the
+    Server-Timing header when SERVER_TIMING_ENABLED is set, and profiles
+    sampled requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.emit_header = settings.SERVER_TIMING_ENABLED
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        if _profile_requested(scope):
+            timings.profile = _Profile(_profile_filename(scope["method"], scope["path"]), threading.get_ident())
+            _get_profiler().start(timings.profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and self.emit_header:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if timings.profile is not None:
+                _get_profiler().stop(timings.profile)
+                try:
+                    path = await asyncio.to_thread(write_profile, timings.profile)
+                    if path:
+                        logger.info("Wrote request profile %s", path)
+                except OSError as e:
+                    logger.warning("Could not write request profile: %s", e)
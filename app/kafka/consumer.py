@@ -1,43 +1,179 @@
 from kafka import KafkaConsumer
+from kafka.structs import TopicPartition
+from pydantic import ValidationError
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.domain_index import check_conflicts, domain_index_sync
 from app.core.logging import get_logger
+from app.core.metrics import KAFKA_MESSAGES, observe_kafka_batch, observe_kafka_lag
+from app.schemas.request import DnsRequestCreate
+from typing import Dict, Any, List, Tuple
 import json
 import requests
+import time
 
 logger = get_logger(__name__)
 
+def build_api_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a Kafka message onto the DnsRequestCreate request body.
+    """
+    return {
+        "context": {
+            "account_id": payload.get("account_id", "default_account"),
+            "source": "kafka"
+        },
+        "resource": {
+            "record_type": payload.get("record_type"),
+            "domain": payload.get("domain"),
+            "target": payload.get("target"),
+            "comment": payload.get("comment"),
+            "config": payload.get("config") # Include config from Kafka payload.
+        }
+    }
+
+def parse_message(value: bytes) -> Dict[str, Any]:
+    """
+    Decode a Kafka message into the DnsRequestCreate request body. Raises
+    ValueError for anything but a JSON object.
+    """
+    payload = json.loads(value.decode('utf-8'))
+    if not isinstance(payload, dict):
+        raise ValueError(f"expected a JSON object, got {type(payload).__name__}")
+    return build_api_payload(payload)
+
+def message_idempotency_key(topic: str, partition: int, offset: int) -> str:
+    """
+    Idempotency key for a Kafka message. A redelivered message keeps its
+    offset, so re-ingesting it replays the original request instead of
+    creating a new one.
+    """
+    return f"kafka:{topic}:{partition}:{offset}"
+
 def consume_dns_requests():
+    if settings.KAFKA_CONSUMER_MODE == "direct":
+        return consume_dns_requests_direct()
+    if settings.KAFKA_CONSUMER_MODE == "async_http":
+        # Imported here so the other modes do not need an event loop or httpx
+        import asyncio
+        from app.kafka.forwarder import forward_dns_requests
+        return asyncio.run(forward_dns_requests())
+
     consumer = KafkaConsumer(
         settings.KAFKA_DNS_TOPIC,
         bootstrap_servers=settings.KAFKA_BROKER_URL,
-        value_deserializer=lambda v: json.loads(v.decode('utf-8')),
         auto_offset_reset='earliest'
     )
 
     for message in consumer:
-        payload = message.value
-        logger.info(f"Received message from Kafka: {payload}")
+        logger.debug("Received message from Kafka: %s", message.value)
 
         # Construct the API request payload
-        api_payload = {
-            "context": {
-                "account_id": payload.get("account_id", "default_account"),
-                "source": "kafka"
-            },
-            "resource": {
-                "record_type": payload.get("record_type"),
-                "domain": payload.get("domain"),
-                "target": payload.get("target"),
-                "comment": payload.get("comment"),
-                "config": payload.get("config") # Include config from Kafka payload.
-            }
-        }
+        try:
+            api_payload = parse_message(message.value)
+        except ValueError as e:
+            logger.error("Skipping invalid Kafka message at %s[%d]@%d: %s", message.topic, message.partition, message.offset, e)
+            KAFKA_MESSAGES.labels(message.topic, "invalid").inc()
+            continue
 
         try:
             # Call the API endpoint
-            response = requests.post(settings.API_URL, json=api_payload)
+            response = requests.post(
+                settings.API_URL,
+                json=api_payload,
+                headers={"Idempotency-Key": message_idempotency_key(message.topic, message.partition, message.offset)}
+            )
             response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
-            logger.info(f"Successfully called API for request: {api_payload}")
-            logger.info(f"API response: {response.json()}")
+            logger.debug("Successfully called API for request: %s", api_payload)
+            logger.debug("API response: %s", response.content)
+            KAFKA_MESSAGES.labels(message.topic, "ok").inc()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error calling API for request {api_payload}: {e}")
+            logger.error("Error calling API for request %s: %s", api_payload, e)
+            KAFKA_MESSAGES.labels(message.topic, "error").inc()
+        observe_kafka_lag(consumer, TopicPartition(message.topic, message.partition), message.offset)
+
+def consume_dns_requests_direct():
+    """
+    Ingest Kafka messages in-process instead of posting them back to the API.
+
+    Messages are polled in batches, validated into DnsRequestCreate objects and
+    written through create_dns_requests_bulk (one INSERT, one commit, one
+    producer for the Celery publishes). Offsets are committed manually only
+    after that succeeds, so a crash or DB error leads to redelivery of the
+    batch. Each message carries an idempotency key derived from its offset,
+    so redelivered messages do not create duplicate requests.
+    """
+    consumer = KafkaConsumer(
+        settings.KAFKA_DNS_TOPIC,
+        bootstrap_servers=settings.KAFKA_BROKER_URL,
+        group_id=settings.KAFKA_CONSUMER_GROUP,
+        auto_offset_reset='earliest',
+        enable_auto_commit=False
+    )
+    logger.info("Kafka consumer running in direct ingestion mode (batch size %d)", settings.KAFKA_BATCH_SIZE)
+    if settings.DOMAIN_INDEX_ENABLED:
+        domain_index_sync.start_in_thread()
+
+    while True:
+        batches = consumer.poll(timeout_ms=settings.KAFKA_POLL_TIMEOUT_MS, max_records=settings.KAFKA_BATCH_SIZE)
+        if not batches:
+            continue
+        if not ingest_batch(consumer, batches):
+            time.sleep(settings.KAFKA_RETRY_BACKOFF_SECONDS)
+
+def ingest_batch(consumer, batches) -> bool:
+    """
+    Write one polled batch through create_dns_requests_bulk and commit its
+    offsets. On failure the consumer is rewound to the start of the batch,
+    so it is polled again, and False is returned.
+    """
+    # Imported here so the HTTP mode does not pull in the API logic layer
+    from app.api.v1.api import create_dns_requests_bulk
+
+    observe_kafka_batch(consumer, batches)
+    dns_requests, idempotency_keys = _parse_batch(batches)
+    db = SessionLocal()
+    try:
+        create_dns_requests_bulk(dns_requests, db, idempotency_keys)
+    except Exception as e:
+        db.rollback()
+        logger.error("Error ingesting Kafka batch of %d requests, rewinding: %s", len(dns_requests), e)
+        KAFKA_MESSAGES.labels(settings.KAFKA_DNS_TOPIC, "error").inc(len(dns_requests))
+        # Rewind to the start of the batch so it is polled again
+        for tp, messages in batches.items():
+            consumer.seek(tp, messages[0].offset)
+        return False
+    finally:
+        db.close()
+
+    consumer.commit()
+    KAFKA_MESSAGES.labels(settings.KAFKA_DNS_TOPIC, "ok").inc(len(dns_requests))
+    logger.info("Ingested Kafka batch of %d requests", len(dns_requests))
+    return True
+
+def _parse_batch(batches) -> Tuple[List[DnsRequestCreate], List[str]]:
+    dns_requests = []
+    idempotency_keys = []
+    positions = []
+    for tp, messages in batches.items():
+        for message in messages:
+            try:
+                dns_requests.append(DnsRequestCreate.model_validate(parse_message(message.value)))
+                idempotency_keys.append(message_idempotency_key(tp.topic, tp.partition, message.offset))
+                positions.append((tp, message.offset))
+            except (ValueError, ValidationError) as e:
+                # Malformed messages can never succeed; skip them rather than block the partition
+                logger.error("Skipping invalid Kafka message at %s[%d]@%d: %s", tp.topic, tp.partition, message.offset, e)
+                KAFKA_MESSAGES.labels(tp.topic, "invalid").inc()
+
+    # Conflicting requests would only fail in provisioning; skip them like invalid ones
+    conflicts = check_conflicts(dns_requests)
+    if any(conflicts):
+        for (tp, offset), conflict in zip(positions, conflicts):
+            if conflict is not None:
+                logger.error("Skipping conflicting Kafka message at %s[%d]@%d: %s", tp.topic, tp.partition, offset, conflict)
+                KAFKA_MESSAGES.labels(tp.topic, "conflict").inc()
+        kept = [i for i, conflict in enumerate(conflicts) if conflict is None]
+        dns_requests = [dns_requests[i] for i in kept]
+        idempotency_keys = [idempotency_keys[i] for i in kept]
+    return dns_requests, idempotency_keys
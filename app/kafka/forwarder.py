@@ -0,0 +1,222 @@
+"""
+Async HTTP forwarding mode for the Kafka consumer.
+
+Used where the consumer must keep going through the HTTP API (network
+isolation) but should not pay one blocking round trip per message. Messages
+are forwarded concurrently over a pooled keep-alive client, bounded by an
+in-flight window. Offsets are committed per partition only up to the highest
+contiguous completed message, and partitions are paused while the window is
+full so Kafka does not keep handing us records we cannot start yet.
+
+On a rebalance, completed offsets of the revoked partitions are committed
+and their tracking state is dropped; forwards still running for them
+finish without committing, and the new owner redelivers those messages
+(with the same idempotency keys).
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable
+
+import httpx
+from kafka import ConsumerRebalanceListener, KafkaConsumer
+from kafka.errors import CommitFailedError
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import KAFKA_MESSAGES, observe_kafka_batch
+from app.kafka.consumer import message_idempotency_key, parse_message
+
+logger = get_logger(__name__)
+
+# Poll timeout used while paused, so completions are committed promptly
+PAUSED_POLL_TIMEOUT_MS = 100
+
+class PartitionOffsetTracker:
+    """
+    Tracks in-flight offsets per partition.
+
+    Offsets are registered in the order they were polled and may complete in
+    any order. committable() only advances a partition past a prefix of
+    completed offsets, which keeps commits ordered: an offset is never
+    committed while an earlier one on the same partition is still in flight.
+    Completions of offsets that are no longer tracked (their partition was
+    revoked) are ignored.
+    """
+
+    def __init__(self):
+        self._offsets: Dict[TopicPartition, "OrderedDict[int, bool]"] = {}
+        self.in_flight = 0
+        # Completions arrive on the event loop, rebalances on the Kafka thread
+        self._lock = threading.Lock()
+
+    def track(self, tp: TopicPartition, offset: int):
+        with self._lock:
+            self._offsets.setdefault(tp, OrderedDict())[offset] = False
+            self.in_flight += 1
+
+    def complete(self, tp: TopicPartition, offset: int):
+        with self._lock:
+            offsets = self._offsets.get(tp)
+            if offsets is not None and offsets.get(offset) is False:
+                offsets[offset] = True
+                self.in_flight -= 1
+
+    def forget(self, tps: Iterable[TopicPartition]):
+        """
+        Drop the state of revoked partitions, including offsets still in flight.
+        """
+        with self._lock:
+            for tp in tps:
+                offsets = self._offsets.pop(tp, None)
+                if offsets:
+                    self.in_flight -= sum(not done for done in offsets.values())
+
+    def committable(self) -> Dict[TopicPartition, int]:
+        """
+        Pop the completed prefix of every partition and return, per partition
+        that advanced, the next offset to commit (last completed + 1).
+        """
+        result = {}
+        with self._lock:
+            for tp, offsets in self._offsets.items():
+                last = None
+                while offsets:
+                    offset, done = next(iter(offsets.items()))
+                    if not done:
+                        break
+                    offsets.popitem(last=False)
+                    last = offset
+                if last is not None:
+                    result[tp] = last + 1
+        return result
+
+def _offset_and_metadata(offset: int) -> OffsetAndMetadata:
+    # kafka-python 2.0.x has (offset, metadata); later releases add leader_epoch
+    if "leader_epoch" in OffsetAndMetadata._fields:
+        return OffsetAndMetadata(offset, "", -1)
+    return OffsetAndMetadata(offset, "")
+
+def _commit(consumer, offsets: Dict[TopicPartition, int]):
+    if not offsets:
+        return
+    try:
+        consumer.commit(offsets={tp: _offset_and_metadata(offset) for tp, offset in offsets.items()})
+    except CommitFailedError as e:
+        # The group rebalanced first; the partitions' new owner redelivers these messages
+        logger.warning("Could not commit offsets %s: %s", offsets, e)
+
+class _RebalanceListener(ConsumerRebalanceListener):
+    """
+    Commits what completed before partitions are revoked and forgets them, and keeps
+    newly assigned partitions paused while the window is full. Runs inside
+    poll(), on the Kafka thread.
+    """
+
+    def __init__(self, consumer: KafkaConsumer, tracker: PartitionOffsetTracker):
+        self.consumer = consumer
+        self.tracker = tracker
+        self.paused = False
+
+    def on_partitions_revoked(self, revoked):
+        # Still the owner here, so everything completed can be committed
+        _commit(self.consumer, self.tracker.committable())
+        self.tracker.forget(revoked)
+        logger.info("Partitions revoked: %s", sorted(revoked))
+
+    def on_partitions_assigned(self, assigned):
+        if self.paused and assigned:
+            self.consumer.pause(*assigned)
+        logger.info("Partitions assigned: %s", sorted(assigned))
+
+async def _forward_message(client: httpx.AsyncClient, tracker: PartitionOffsetTracker, tp: TopicPartition, message):
+    # Whatever happens, the offset must complete, or the partition never commits again
+    try:
+        await _forward(client, tp, message)
+    finally:
+        tracker.complete(tp, message.offset)
+
+async def _forward(client: httpx.AsyncClient, tp: TopicPartition, message):
+    try:
+        api_payload = parse_message(message.value)
+    except ValueError as e:
+        logger.error("Skipping invalid Kafka message at %s[%d]@%d: %s", tp.topic, tp.partition, message.offset, e)
+        KAFKA_MESSAGES.labels(tp.topic, "invalid").inc()
+        return
+
+    # Retries and redeliveries reuse the key, so the API creates the request at most once
+    headers = {"Idempotency-Key": message_idempotency_key(tp.topic, tp.partition, message.offset)}
+    outcome = "error"
+    for attempt in range(settings.KAFKA_FORWARD_MAX_RETRIES + 1):
+        try:
+            response = await client.post(settings.API_URL, json=api_payload, headers=headers)
+            if response.status_code < 500:
+                # 4xx means the payload itself is rejected; retrying cannot help
+                response.raise_for_status()
+                outcome = "ok"
+                break
+            logger.warning("API returned %d for message %d@%d, attempt %d", response.status_code, tp.partition, message.offset, attempt + 1)
+        except httpx.HTTPStatusError as e:
+            logger.error("API rejected message %d@%d: %s", tp.partition, message.offset, e)
+            break
+        except httpx.HTTPError as e:
+            logger.warning("Error forwarding message %d@%d, attempt %d: %s", tp.partition, message.offset, attempt + 1, e)
+        await asyncio.sleep(min(2 ** attempt * 0.1, 5.0))
+    else:
+        logger.error("Giving up on message %d@%d after %d attempts", tp.partition, message.offset, settings.KAFKA_FORWARD_MAX_RETRIES + 1)
+
+    KAFKA_MESSAGES.labels(tp.topic, outcome).inc()
+
+async def forward_dns_requests():
+    """
+    Consume DNS requests and forward them to API_URL with up to
+    KAFKA_FORWARD_WINDOW requests in flight.
+    """
+    window = settings.KAFKA_FORWARD_WINDOW
+    consumer = KafkaConsumer(
+        bootstrap_servers=settings.KAFKA_BROKER_URL,
+        group_id=settings.KAFKA_CONSUMER_GROUP,
+        auto_offset_reset='earliest',
+        enable_auto_commit=False
+    )
+    # KafkaConsumer is not thread-safe: every call goes through this single thread
+    kafka_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka")
+    loop = asyncio.get_running_loop()
+
+    def run(fn, *args, **kwargs):
+        return loop.run_in_executor(kafka_thread, partial(fn, *args, **kwargs))
+
+    tracker = PartitionOffsetTracker()
+    rebalance = _RebalanceListener(consumer, tracker)
+    consumer.subscribe([settings.KAFKA_DNS_TOPIC], listener=rebalance)
+    tasks = set()
+    limits = httpx.Limits(max_connections=window, max_keepalive_connections=window)
+    logger.info("Kafka consumer running in async HTTP forwarding mode (window %s)", window)
+
+    async with httpx.AsyncClient(limits=limits, timeout=settings.KAFKA_FORWARD_TIMEOUT_SECONDS) as client:
+        while True:
+            await run(lambda: _commit(consumer, tracker.committable()))
+
+            # Backpressure: stop fetching while the window is full, but keep polling
+            # so the consumer stays in the group
+            if tracker.in_flight >= window and not rebalance.paused:
+                rebalance.paused = True
+                await run(lambda: consumer.pause(*consumer.assignment()))
+            elif tracker.in_flight < window and rebalance.paused:
+                rebalance.paused = False
+                await run(lambda: consumer.resume(*consumer.paused()))
+
+            timeout_ms = PAUSED_POLL_TIMEOUT_MS if rebalance.paused or tracker.in_flight else settings.KAFKA_POLL_TIMEOUT_MS
+            batches = await run(consumer.poll, timeout_ms=timeout_ms, max_records=max(window - tracker.in_flight, 1))
+            if batches:
+                await run(observe_kafka_batch, consumer, batches)
+            for tp, messages in batches.items():
+                for message in messages:
+                    tracker.track(tp, message.offset)
+                    task = asyncio.create_task(_forward_message(client, tracker, tp, message))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
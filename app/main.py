@@ -1,56 +1,129 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 import importlib
-import pkgutil
-from app.core.database import engine, Base
 from app.core.logging import get_logger
+from app.routes import ROUTERS
 
 logger = get_logger(__name__)
 
-Base.metadata.create_all(bind=engine)
+# Importing this module only defines the app factory. The application, its
+# routers and everything they import are built on first access to `app`
+# (uvicorn's "app.main:app" lookup, TestClient), and connections are opened
+# in the lifespan handler. The schema is managed by Alembic only.
 
-app = FastAPI(
-    title="DNS Orchestrator API",
-    description="API for orchestrating DNS records",
-    version="1.0.0"
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.core.database import dispose_engines
+    from app.core.security import sso_auth
+    from app.core.notifications import status_broadcaster
+    from app.core.config import settings
+    from app.core.domain_index import domain_index_sync
 
-@app.on_event("startup")
-async def startup_event():
     logger.info("Application startup")
+    if settings.TASK_DISPATCH_MODE == "outbox":
+        logger.info("TASK_DISPATCH_MODE=outbox: provisioning tasks are only published while scripts/run_outbox_relay.py is running")
+    await sso_auth.start()
+    if settings.DOMAIN_INDEX_ENABLED:
+        domain_index_sync.start()
+    try:
+        yield
+    finally:
+        await sso_auth.aclose()
+        if status_broadcaster.is_loaded:
+            await status_broadcaster.stop()
+        if domain_index_sync.is_loaded:
+            await domain_index_sync.stop()
+        await dispose_engines()
+        logger.info("Application shutdown")
 
+def create_app() -> FastAPI:
+    from app.core.config import settings
 
-# Dynamically register routers for all versions in app/routes
-from pathlib import Path
-routes_path = Path(__file__).parent / "routes"
-for version_pkg in routes_path.iterdir():
-    if version_pkg.is_dir() and not version_pkg.name.startswith("__"):
-        version = version_pkg.name
-        router_file_path = version_pkg / "routes.py" # Specifically look for routes.py
-        if router_file_path.exists():
-            try:
-                module = importlib.import_module(f"app.routes.{version}.routes") # Import routes module
-                app.include_router(
-                    module.router,
-                    prefix=f"/api/{version}", # Prefix will be /api/v1, /api/v2
-                    tags=[f"api_{version}"] # Tag will be api_v1, api_v2
-                )
-            except Exception as e:
-                logger.warning(f"Could not import router for {version}/routes.py: {e}")
-        else:
-            logger.info(f"No routes.py found for version {version}") # Logger message if not found
-
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to the DNS Orchestrator API"}
-
-@app.get("/health")
-async def health_check():
-    """
-    Health check endpoint for container orchestration.
-    """
-    return {
-        "status": "healthy",
-        "service": "dns-orchestrator",
-        "version": "1.0.0",
-        "timestamp": "2024-01-01T00:00:00Z"
-    }
+    app = FastAPI(
+        title="DNS Orchestrator API",
+        description="API for orchestrating DNS records",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+
+    for version, module_name in ROUTERS:
+        module = importlib.import_module(module_name)
+        app.include_router(
+            module.router,
+            prefix=f"/api/{version}", # Prefix will be /api/v1, /api/v2
+            tags=[f"api_{version}"] # Tag will be api_v1, api_v2
+        )
+
+    from fastapi.responses import JSONResponse
+    from app.api.common.responses import FastJSONResponse
+    json_response = FastJSONResponse if settings.FAST_RESPONSES_ENABLED else JSONResponse
+
+    from app.core.logging import LogContextMiddleware
+    app.add_middleware(LogContextMiddleware)
+
+    from app.core.timing import ServerTimingMiddleware, timing_enabled
+    if timing_enabled():
+        app.add_middleware(ServerTimingMiddleware)
+
+    if settings.METRICS_ENABLED:
+        from app.core.metrics import MetricsMiddleware, render_metrics
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            """
+            Prometheus metrics, aggregated across workers in multiprocess mode.
+            """
+            body, content_type = render_metrics()
+            return Response(content=body, media_type=content_type)
+
+    @app.get("/", response_class=json_response)
+    def read_root():
+        return {"message": "Welcome to the DNS Orchestrator API"}
+
+    @app.get("/health", response_class=json_response)
+    async def health_check():
+        """
+        Health check endpoint for container orchestration.
+        """
+        return {
+            "status": "healthy",
+            "service": "dns-orchestrator",
+            "version": "1.0.0",
+            "timestamp": "2024-01-01T00:00:00Z"
+        }
+
+    @app.get("/health/db-pool", response_class=json_response)
+    def db_pool_stats():
+        """
+        Connection pool gauges for this worker process: size, connections in
+        use, overflow, and checkout counts and wait times.
+        """
+        from app.core.database import pool_stats
+        return pool_stats()
+
+    @app.get("/health/replica", response_class=json_response)
+    def replica_health():
+        """
+        Whether a read replica is configured and how far it lags the primary.
+        """
+        from app.core.read_routing import replica_status
+        return replica_status()
+
+    @app.get("/health/domain-index", response_class=json_response)
+    def domain_index_health():
+        """
+        Whether this worker's domain index is loaded, and its size.
+        """
+        from app.core.domain_index import current_index
+        index = current_index()
+        return {"enabled": settings.DOMAIN_INDEX_ENABLED, "loaded": index is not None, **(index.size() if index else {})}
+
+    return app
+
+def __getattr__(name):
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
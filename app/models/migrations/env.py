@@ -19,10 +19,15 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Use the application's database URL unless alembic.ini sets one explicitly
+from app.core.config import settings
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 from app.core.database import Base
-from app.models.models import DnsRequest, DnsRecord # Import all your models
+from app.models.models import DnsRequest, DnsRecord, DnsRequestEvent, IdempotencyKey, TaskOutbox # Import all your models
 
 target_metadata = Base.metadata
 
@@ -1,30 +1,24 @@
-```
 """${message}
 
 Revision ID: ${up_revision}
-Revises: ${down_revision}
+Revises: ${down_revision | comma,n}
 Create Date: ${create_date}
 
 """
 from alembic import op
 import sqlalchemy as sa
-
+${imports if imports else ""}
 
 # revision identifiers, used by Alembic.
-revision = ${up_revision}
-down_revision = ${down_revision}
-branch_labels = None
-depends_on = None
+revision = ${repr(up_revision)}
+down_revision = ${repr(down_revision)}
+branch_labels = ${repr(branch_labels)}
+depends_on = ${repr(depends_on)}
 
 
 def upgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    ${upgrades if upgrades else "pass"}
 
 
 def downgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
-```
\ No newline at end of file
+    ${downgrades if downgrades else "pass"}
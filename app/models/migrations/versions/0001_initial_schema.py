@@ -0,0 +1,63 @@
+"""initial schema
+
+Baseline for dns_requests and dns_records, which were previously created by
+Base.metadata.create_all at application startup. Tables that already exist
+are left untouched so existing databases can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-06-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    # Offline (--sql) mode has no connection to inspect; emit the full DDL
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table("dns_requests"):
+        op.create_table(
+            "dns_requests",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("record_type", sa.String(10), nullable=False),
+            sa.Column("domain", sa.String(), nullable=False),
+            sa.Column("target", sa.String(), nullable=False),
+            sa.Column("comment", sa.String(), nullable=True),
+            sa.Column("status", sa.String(50), nullable=False),
+            sa.Column("source", sa.String(50), nullable=False),
+            sa.Column("config", postgresql.JSONB(), nullable=True),
+            sa.Column("log_messages", postgresql.JSONB(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+
+    if not _has_table("dns_records"):
+        op.create_table(
+            "dns_records",
+            sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column("request_id", postgresql.UUID(as_uuid=True), nullable=False, unique=True),
+            sa.Column("record_type", sa.String(10), nullable=False),
+            sa.Column("domain", sa.String(), nullable=False),
+            sa.Column("target", sa.String(), nullable=False),
+            sa.Column("comment", sa.String(), nullable=True),
+            sa.Column("provisioned_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+
+
+def downgrade():
+    op.drop_table("dns_records")
+    op.drop_table("dns_requests")
@@ -0,0 +1,51 @@
+"""append-only dns_request_events
+
+Request history moves out of the dns_requests.log_messages JSONB array,
+which was rewritten in full on every event, into an insert-only table.
+Existing log_messages entries are copied over.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "dns_request_events",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column("request_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("message", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_dns_request_events_request_id_id", "dns_request_events", ["request_id", "id"])
+
+    op.execute(
+        """
+        INSERT INTO dns_request_events (request_id, status, message, created_at)
+        SELECT r.id,
+               COALESCE(e.entry->>'status', 'INFO'),
+               COALESCE(e.entry->>'message', ''),
+               COALESCE((e.entry->>'timestamp')::timestamp, r.created_at, now())
+        FROM dns_requests r
+        CROSS JOIN LATERAL jsonb_array_elements(COALESCE(r.log_messages, '[]'::jsonb)) WITH ORDINALITY AS e(entry, position)
+        ORDER BY r.id, e.position
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_dns_request_events_request_id_id", table_name="dns_request_events")
+    op.drop_table("dns_request_events")
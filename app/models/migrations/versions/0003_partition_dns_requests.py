@@ -0,0 +1,130 @@
+"""partition dns_requests by created_at
+
+dns_requests becomes a table range-partitioned by month on created_at, so
+old months can be detached and archived instead of deleted row by row.
+created_at joins the primary key (Postgres requires the partition key in
+every unique constraint). A DEFAULT partition catches rows outside the
+provisioned range, and dns_requests_ensure_partitions(months_ahead) creates
+the monthly partitions from start_month up to months_ahead past the current
+month; the maintenance task calls it on a schedule.
+
+Existing rows are copied into the new table and the old one is dropped.
+Rows with a NULL created_at are given the current time.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-07-01 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = "id, record_type, domain, target, comment, status, source, config, log_messages, created_at, updated_at"
+
+ENSURE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION dns_requests_ensure_partitions(start_month date, months_ahead integer)
+RETURNS SETOF text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start date := date_trunc('month', start_month)::date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    partition_name text;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := format('dns_requests_p%s', to_char(month_start, 'YYYYMM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Postgres refuses to attach a range that still has rows in DEFAULT
+            IF EXISTS (
+                SELECT 1 FROM dns_requests_default
+                WHERE created_at >= month_start AND created_at < (month_start + interval '1 month')
+            ) THEN
+                RAISE WARNING 'dns_requests_default has rows for %, not creating %', month_start, partition_name;
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF dns_requests FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, (month_start + interval '1 month')::date
+                );
+                RETURN NEXT partition_name;
+            END IF;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END;
+$$
+"""
+
+
+def upgrade():
+    op.execute("ALTER TABLE dns_requests RENAME TO dns_requests_unpartitioned")
+    op.execute("ALTER TABLE dns_requests_unpartitioned RENAME CONSTRAINT dns_requests_pkey TO dns_requests_unpartitioned_pkey")
+    op.execute(
+        """
+        CREATE TABLE dns_requests (
+            id uuid NOT NULL,
+            record_type varchar(10) NOT NULL,
+            domain varchar NOT NULL,
+            target varchar NOT NULL,
+            comment varchar,
+            status varchar(50) NOT NULL,
+            source varchar(50) NOT NULL,
+            config jsonb,
+            log_messages jsonb,
+            created_at timestamp NOT NULL DEFAULT now(),
+            updated_at timestamp DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE dns_requests_default PARTITION OF dns_requests DEFAULT")
+    op.execute(ENSURE_PARTITIONS_FUNCTION)
+
+    # Partitions for every month that already has data, plus the months ahead
+    op.execute(
+        """
+        SELECT dns_requests_ensure_partitions(
+            COALESCE((SELECT min(created_at) FROM dns_requests_unpartitioned), now())::date, 3
+        )
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO dns_requests ({COLUMNS})
+        SELECT id, record_type, domain, target, comment, status, source, config, log_messages,
+               COALESCE(created_at, now()), updated_at
+        FROM dns_requests_unpartitioned
+        """
+    )
+    op.execute("DROP TABLE dns_requests_unpartitioned")
+
+
+def downgrade():
+    op.execute("ALTER TABLE dns_requests RENAME TO dns_requests_partitioned")
+    op.execute("ALTER TABLE dns_requests_partitioned RENAME CONSTRAINT dns_requests_pkey TO dns_requests_partitioned_pkey")
+    op.execute(
+        """
+        CREATE TABLE dns_requests (
+            id uuid PRIMARY KEY,
+            record_type varchar(10) NOT NULL,
+            domain varchar NOT NULL,
+            target varchar NOT NULL,
+            comment varchar,
+            status varchar(50) NOT NULL,
+            source varchar(50) NOT NULL,
+            config jsonb,
+            log_messages jsonb,
+            created_at timestamp DEFAULT now(),
+            updated_at timestamp DEFAULT now()
+        )
+        """
+    )
+    op.execute(f"INSERT INTO dns_requests ({COLUMNS}) SELECT {COLUMNS} FROM dns_requests_partitioned")
+    op.execute("DROP TABLE dns_requests_partitioned CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS dns_requests_ensure_partitions(date, integer)")
@@ -0,0 +1,58 @@
+"""account_id and listing indexes
+
+Adds account_id to dns_requests and dns_records, and the indexes behind the
+filtered listing endpoints:
+
+- (created_at DESC, id DESC) and per-account/per-status variants, matching
+  the keyset order so every page is an index range scan;
+- lower(domain) for exact matches, reverse(lower(domain)) text_pattern_ops
+  for suffix matches (a suffix becomes a LIKE 'prefix%' on the reversed
+  name) and a pg_trgm GIN index for substring search.
+
+Indexes on the partitioned dns_requests cascade to every partition.
+Rows created before this revision keep a NULL account_id.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-07-15 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_dns_requests_created_at_id", "dns_requests", "(created_at DESC, id DESC)"),
+    ("ix_dns_requests_account_created_at_id", "dns_requests", "(account_id, created_at DESC, id DESC)"),
+    ("ix_dns_requests_status_created_at_id", "dns_requests", "(status, created_at DESC, id DESC)"),
+    ("ix_dns_requests_domain", "dns_requests", "(lower(domain))"),
+    ("ix_dns_requests_domain_reversed", "dns_requests", "(reverse(lower(domain)) text_pattern_ops)"),
+    ("ix_dns_requests_domain_trgm", "dns_requests", "USING gin (lower(domain) gin_trgm_ops)"),
+    ("ix_dns_records_provisioned_at_id", "dns_records", "(provisioned_at DESC, id DESC)"),
+    ("ix_dns_records_account_provisioned_at_id", "dns_records", "(account_id, provisioned_at DESC, id DESC)"),
+    ("ix_dns_records_domain", "dns_records", "(lower(domain))"),
+    ("ix_dns_records_domain_reversed", "dns_records", "(reverse(lower(domain)) text_pattern_ops)"),
+    ("ix_dns_records_domain_trgm", "dns_records", "USING gin (lower(domain) gin_trgm_ops)"),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column("dns_requests", sa.Column("account_id", sa.String(), nullable=True))
+    op.add_column("dns_records", sa.Column("account_id", sa.String(), nullable=True))
+    for name, table, definition in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}")
+
+
+def downgrade():
+    for name, _table, _definition in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.drop_column("dns_records", "account_id")
+    op.drop_column("dns_requests", "account_id")
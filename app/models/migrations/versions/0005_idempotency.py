@@ -0,0 +1,47 @@
+"""idempotency keys and pending-request dedup
+
+Adds the idempotency_keys table, which stores the response of a create call
+per (account_id, Idempotency-Key), and dns_requests.content_hash with a
+partial index over PENDING rows for content-based deduplication.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-08-01 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("account_id", sa.String(), primary_key=True),
+        sa.Column("key", sa.String(255), primary_key=True),
+        sa.Column("request_hash", sa.String(64), nullable=False),
+        sa.Column("request_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("response", postgresql.JSONB(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"])
+
+    op.add_column("dns_requests", sa.Column("content_hash", sa.String(64), nullable=True))
+    op.create_index(
+        "ix_dns_requests_pending_content_hash", "dns_requests", ["content_hash"],
+        postgresql_where=sa.text("status = 'PENDING'")
+    )
+
+
+def downgrade():
+    op.drop_index("ix_dns_requests_pending_content_hash", table_name="dns_requests")
+    op.drop_column("dns_requests", "content_hash")
+    op.drop_index("ix_idempotency_keys_created_at", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
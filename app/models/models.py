@@ -1,31 +1,75 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, func
+from datetime import timedelta
+from sqlalchemy import Column, String, DateTime, BigInteger, Integer, Identity, Index, DDL, and_, event, func, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.core.config import settings
 from app.core.database import Base
+from app.utils.ids import uuid7, uuid7_datetime
+
+# The domain search indexes use trigram operator classes
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
 
 class DnsRequest(Base):
     """
     Represents an ongoing DNS request in the database.
-    The logs are stored as a JSONB column, which is perfect for dynamic data.
+    The request's history lives in dns_request_events; log_messages only
+    holds entries written before that table existed.
+
+    The table is range-partitioned by month on created_at (see migration
+    0003), so created_at is part of the primary key. IDs are UUIDv7, which
+    embed their creation time; id_clause uses it to let Postgres prune
+    lookups by ID down to the partitions around that time.
     """
     __tablename__ = "dns_requests"
 
-    # Use UUID for a unique, unguessable primary key
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Time-ordered UUID: unique, unguessable, and locates its partition
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     record_type = Column(String(10), nullable=False)
     domain = Column(String, nullable=False)
     target = Column(String, nullable=False)
     comment = Column(String, nullable=True)
     status = Column(String(50), default="PENDING", nullable=False)
     source = Column(String(50), default="api", nullable=False)
+    # Tenant that submitted the request (RequestContext.account_id)
+    account_id = Column(String, nullable=True)
     config = Column(JSONB, nullable=True)
+    # sha256 of the request's identity (see app.core.idempotency.request_fingerprint)
+    content_hash = Column(String(64), nullable=True)
     
-    # JSONB is a highly efficient way to store semi-structured log data
+    # Deprecated: superseded by DnsRequestEvent, no longer written
     log_messages = Column(JSONB, default=[])
 
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, server_default=func.now(), primary_key=True, nullable=False)
     updated_at = Column(DateTime, onupdate=func.now(), server_default=func.now())
 
+    # Listing is newest first and paginated on (created_at, id); see migration 0004
+    __table_args__ = (
+        Index("ix_dns_requests_created_at_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_dns_requests_account_created_at_id", "account_id", text("created_at DESC"), text("id DESC")),
+        Index("ix_dns_requests_status_created_at_id", "status", text("created_at DESC"), text("id DESC")),
+        Index("ix_dns_requests_domain", text("lower(domain)")),
+        Index("ix_dns_requests_domain_reversed", text("reverse(lower(domain)) text_pattern_ops")),
+        Index("ix_dns_requests_domain_trgm", text("lower(domain) gin_trgm_ops"), postgresql_using="gin"),
+        # Only PENDING rows are candidates for deduplication, which keeps this index small
+        Index("ix_dns_requests_pending_content_hash", "content_hash", postgresql_where=text("status = 'PENDING'")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    @classmethod
+    def id_clause(cls, request_id):
+        """
+        Filter matching one request by ID. For UUIDv7 IDs a created_at range
+        is added so only the partitions around the request's creation are
+        scanned; older UUIDv4 IDs fall back to probing every partition.
+        """
+        if isinstance(request_id, str):
+            request_id = uuid.UUID(request_id)
+        created = uuid7_datetime(request_id)
+        if created is None:
+            return cls.id == request_id
+        slack = timedelta(seconds=settings.PARTITION_LOOKUP_SLACK_SECONDS)
+        return and_(cls.id == request_id, cls.created_at >= created - slack, cls.created_at < created + slack)
+
     def __repr__(self):
         return f"<DnsRequest(id='{self.id}', status='{self.status}')>"
 
@@ -37,11 +81,85 @@ class DnsRecord(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     request_id = Column(UUID(as_uuid=True), nullable=False, unique=True)
+    account_id = Column(String, nullable=True)
     record_type = Column(String(10), nullable=False)
     domain = Column(String, nullable=False)
     target = Column(String, nullable=False)
     comment = Column(String, nullable=True)
     provisioned_at = Column(DateTime, server_default=func.now())
-    
+
+    __table_args__ = (
+        Index("ix_dns_records_provisioned_at_id", text("provisioned_at DESC"), text("id DESC")),
+        Index("ix_dns_records_account_provisioned_at_id", "account_id", text("provisioned_at DESC"), text("id DESC")),
+        Index("ix_dns_records_domain", text("lower(domain)")),
+        Index("ix_dns_records_domain_reversed", text("reverse(lower(domain)) text_pattern_ops")),
+        Index("ix_dns_records_domain_trgm", text("lower(domain) gin_trgm_ops"), postgresql_using="gin"),
+    )
+
     def __repr__(self):
         return f"<DnsRecord(id='{self.id}', domain='{self.domain}')>"
+
+class DnsRequestEvent(Base):
+    """
+    One entry in a DNS request's history.
+    Rows are only ever inserted, so recording an event costs the same
+    regardless of how long the request's history already is.
+    """
+    __tablename__ = "dns_request_events"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    request_id = Column(UUID(as_uuid=True), nullable=False)
+    status = Column(String(50), nullable=False)
+    message = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    # Serves both "history of one request" and keyset pagination over it
+    __table_args__ = (
+        Index("ix_dns_request_events_request_id_id", "request_id", "id"),
+    )
+
+    def __repr__(self):
+        return f"<DnsRequestEvent(request_id='{self.request_id}', status='{self.status}')>"
+
+class IdempotencyKey(Base):
+    """
+    The response to a create call made with an Idempotency-Key header,
+    replayed when the same key is sent again by the same account.
+    Kept out of the partitioned dns_requests table because a unique key
+    there would have to include created_at.
+    """
+    __tablename__ = "idempotency_keys"
+
+    account_id = Column(String, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # Detects a key being reused for a different request body
+    request_hash = Column(String(64), nullable=False)
+    request_id = Column(UUID(as_uuid=True), nullable=False)
+    response = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(account_id='{self.account_id}', key='{self.key}')>"
+
+class TaskOutbox(Base):
+    """
+    A provisioning task waiting to be published to Celery.
+    Written in the same transaction as its DnsRequest, so a committed request
+    always has its task; the outbox relay publishes and deletes the rows.
+    """
+    __tablename__ = "task_outbox"
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    request_id = Column(UUID(as_uuid=True), nullable=False)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    last_error = Column(String, nullable=True)
+    # Pushed into the future after a failed publish
+    available_at = Column(DateTime, server_default=func.now(), nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<TaskOutbox(id={self.id}, request_id='{self.request_id}')>"
@@ -0,0 +1,7 @@
+# Versioned routers mounted by app.main.create_app, as (version, module).
+# Each module exposes a `router`, served under /api/<version>.
+# Add an entry here when adding app/routes/<version>/routes.py.
+ROUTERS = [
+    ("v1", "app.routes.v1.routes"),
+    ("v2", "app.routes.v2.routes"),
+]
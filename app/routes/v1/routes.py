@@ -1,35 +1,192 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_db, get_async_db, get_read_db, get_async_read_db
+from app.api.common.etag import etag_matches
+from app.api.common.responses import trusted_response
+from app.core.timing import TimedRoute
 from app.schemas.request import DnsRequestCreate
-from app.schemas.response import DnsRequestStatus
+from app.schemas.response import DnsImportReport, DnsRequestStatus, DnsRequestBatchStatus, DnsRequestHistory, DnsRequestPage, DnsRecordPage
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 import uuid
 from app.api.v1.api import (
 	create_dns_request_logic,
-	get_dns_request_status_logic,
-	update_dns_request_status_logic
+	build_status_response,
+	get_dns_request_status_snapshot_logic,
+	get_dns_request_status_snapshot_logic_async,
+	update_dns_request_status_logic,
+	create_dns_request_batch_logic,
+	stream_dns_request_status_logic,
+	get_dns_request_history_logic,
+	list_dns_requests_logic,
+	list_dns_records_logic,
+	create_dns_request_logic_async,
+	update_dns_request_status_logic_async
 )
 
-router = APIRouter()
+from app.api.v1.imports import import_ndjson_async
 
-@router.post("/create", response_model=DnsRequestStatus, summary="Create a new DNS record request")
-def create_dns_request(
-	request: DnsRequestCreate,
+router = APIRouter(route_class=TimedRoute)
+
+def _conditional_status_response(snapshot, response: Response, if_none_match: Optional[str]):
+	# Pollers send back the last ETag; an unchanged status costs a 304 with no body
+	if etag_matches(if_none_match, snapshot.etag):
+		return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": snapshot.etag, "Cache-Control": "no-cache"})
+	headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+	if not settings.FAST_RESPONSES_ENABLED:
+		response.headers.update(headers)
+	# A returned Response is not merged with the injected one, so it carries the headers itself
+	return trusted_response(build_status_response(snapshot), headers=headers)
+
+# Declared before /{request_id} so "stream" is not parsed as a request ID
+@router.get("/stream", summary="Stream DNS request status updates as server-sent events")
+async def stream_dns_request_status(
+	request: Request,
+	request_id: List[uuid.UUID] = Query(...)
+):
+	if len(request_id) > settings.STATUS_STREAM_MAX_IDS:
+		raise HTTPException(
+			status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+			detail=f"At most {settings.STATUS_STREAM_MAX_IDS} request IDs per stream"
+		)
+	return StreamingResponse(
+		stream_dns_request_status_logic(request_ids=request_id, is_disconnected=request.is_disconnected),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	)
+
+IDEMPOTENCY_KEY_DESCRIPTION = "Repeating a create with the same key returns the original response instead of creating a new request."
+CURSOR_DESCRIPTION = "Opaque cursor from next_cursor of the previous page."
+SUFFIX_DESCRIPTION = "Match this domain and its subdomains, e.g. example.com."
+
+# Declared before /{request_id} so "requests" and "records" are not parsed as request IDs
+@router.get("/requests", response_model=DnsRequestPage, summary="List DNS requests")
+def list_dns_requests(
+	status_filter: Optional[List[str]] = Query(None, alias="status"),
+	domain: Optional[str] = Query(None, description="Exact domain name (case-insensitive)."),
+	domain_suffix: Optional[str] = Query(None, description=SUFFIX_DESCRIPTION),
+	domain_contains: Optional[str] = Query(None, min_length=3, description="Substring of the domain name."),
+	record_type: Optional[str] = None,
+	source: Optional[str] = None,
+	account_id: Optional[str] = None,
+	created_after: Optional[datetime] = None,
+	created_before: Optional[datetime] = None,
+	cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+	limit: int = Query(50, ge=1, le=500),
+	db: Session = Depends(get_read_db)
+):
+	return list_dns_requests_logic(
+		status_filter=status_filter, domain=domain, domain_suffix=domain_suffix, domain_contains=domain_contains,
+		record_type=record_type, source=source, account_id=account_id,
+		created_after=created_after, created_before=created_before, cursor=cursor, limit=limit, db=db
+	)
+
+@router.get("/records", response_model=DnsRecordPage, summary="List provisioned DNS records")
+def list_dns_records(
+	domain: Optional[str] = Query(None, description="Exact domain name (case-insensitive)."),
+	domain_suffix: Optional[str] = Query(None, description=SUFFIX_DESCRIPTION),
+	domain_contains: Optional[str] = Query(None, min_length=3, description="Substring of the domain name."),
+	record_type: Optional[str] = None,
+	account_id: Optional[str] = None,
+	provisioned_after: Optional[datetime] = None,
+	provisioned_before: Optional[datetime] = None,
+	cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+	limit: int = Query(50, ge=1, le=500),
+	db: Session = Depends(get_read_db)
+):
+	return list_dns_records_logic(
+		domain=domain, domain_suffix=domain_suffix, domain_contains=domain_contains,
+		record_type=record_type, account_id=account_id,
+		provisioned_after=provisioned_after, provisioned_before=provisioned_before, cursor=cursor, limit=limit, db=db
+	)
+
+# Items are validated one by one in the logic layer so that invalid entries are
+# reported per item instead of failing the whole batch with a 422.
+@router.post("/batch", response_model=DnsRequestBatchStatus, summary="Create DNS record requests in bulk")
+def create_dns_request_batch(
+	items: List[Dict[str, Any]] = Body(...),
 	db: Session = Depends(get_db)
 ):
-	return create_dns_request_logic(request=request, db=db)
+	return create_dns_request_batch_logic(items=items, db=db)
 
-@router.get("/{request_id}", response_model=DnsRequestStatus, summary="Get DNS request status by ID")
-def get_dns_request_status(
-	request_id: uuid.UUID,
+# The body is read as a stream and written in chunks, so it is not declared
+# as a parameter; every line is validated on its own.
+@router.post(
+	"/import",
+	response_model=DnsImportReport,
+	summary="Import DNS record requests from an NDJSON stream",
+	openapi_extra={"requestBody": {"required": True, "content": {"application/x-ndjson": {"schema": {"type": "string"}}}}}
+)
+async def import_dns_requests(
+	request: Request,
+	account_id: str = Query(..., description="Account the imported requests belong to."),
+	source: str = Query("import", max_length=50),
 	db: Session = Depends(get_db)
 ):
-	return get_dns_request_status_logic(request_id=request_id, db=db)
+	return await import_ndjson_async(request.stream(), db, account_id=account_id, source=source)
 
-@router.post("/update_status/{request_id}", response_model=DnsRequestStatus, summary="Update DNS request status")
-def update_dns_request_status(
+@router.get("/{request_id}/events", response_model=DnsRequestHistory, summary="Get the event history of a DNS request")
+def get_dns_request_history(
 	request_id: uuid.UUID,
-	new_status: str,
-	db: Session = Depends(get_db)
+	after: Optional[int] = Query(None, description="Return events after this event ID (next_after of the previous page)."),
+	limit: int = Query(50, ge=1, le=500),
+	db: Session = Depends(get_read_db)
 ):
-	return update_dns_request_status_logic(request_id=request_id, new_status=new_status, db=db)
\ No newline at end of file
+	return get_dns_request_history_logic(request_id=request_id, after=after, limit=limit, db=db)
+
+if settings.DB_ASYNC_ENABLED:
+	# Async path: handlers run on the event loop and never hold a threadpool slot
+	@router.post("/create", response_model=DnsRequestStatus, summary="Create a new DNS record request")
+	async def create_dns_request(
+		request: DnsRequestCreate,
+		idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
+		db: AsyncSession = Depends(get_async_db)
+	):
+		return trusted_response(await create_dns_request_logic_async(request=request, idempotency_key=idempotency_key, db=db))
+
+	@router.get("/{request_id}", response_model=DnsRequestStatus, summary="Get DNS request status by ID")
+	async def get_dns_request_status(
+		request_id: uuid.UUID,
+		response: Response,
+		if_none_match: Optional[str] = Header(None),
+		db: AsyncSession = Depends(get_async_read_db)
+	):
+		snapshot = await get_dns_request_status_snapshot_logic_async(request_id=request_id, db=db)
+		return _conditional_status_response(snapshot, response, if_none_match)
+
+	@router.post("/update_status/{request_id}", response_model=DnsRequestStatus, summary="Update DNS request status")
+	async def update_dns_request_status(
+		request_id: uuid.UUID,
+		new_status: str,
+		db: AsyncSession = Depends(get_async_db)
+	):
+		return trusted_response(await update_dns_request_status_logic_async(request_id=request_id, new_status=new_status, db=db))
+else:
+	@router.post("/create", response_model=DnsRequestStatus, summary="Create a new DNS record request")
+	def create_dns_request(
+		request: DnsRequestCreate,
+		idempotency_key: Optional[str] = Header(None, max_length=255, description=IDEMPOTENCY_KEY_DESCRIPTION),
+		db: Session = Depends(get_db)
+	):
+		return trusted_response(create_dns_request_logic(request=request, idempotency_key=idempotency_key, db=db))
+
+	@router.get("/{request_id}", response_model=DnsRequestStatus, summary="Get DNS request status by ID")
+	def get_dns_request_status(
+		request_id: uuid.UUID,
+		response: Response,
+		if_none_match: Optional[str] = Header(None),
+		db: Session = Depends(get_read_db)
+	):
+		snapshot = get_dns_request_status_snapshot_logic(request_id=request_id, db=db)
+		return _conditional_status_response(snapshot, response, if_none_match)
+
+	@router.post("/update_status/{request_id}", response_model=DnsRequestStatus, summary="Update DNS request status")
+	def update_dns_request_status(
+		request_id: uuid.UUID,
+		new_status: str,
+		db: Session = Depends(get_db)
+	):
+		return trusted_response(update_dns_request_status_logic(request_id=request_id, new_status=new_status, db=db))
@@ -2,6 +2,8 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.api.common.responses import trusted_response
+from app.core.timing import TimedRoute
 from app.schemas.request import DnsRequestCreate
 from app.schemas.response import DnsRequestStatus
 import uuid
@@ -11,21 +13,21 @@ from app.api.v2.api import (
 	update_dns_request_status_logic_v2
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/create", response_model=DnsRequestStatus, summary="V2: Create a new DNS record request")
 def create_dns_request_v2(
 	request: DnsRequestCreate,
 	db: Session = Depends(get_db)
 ):
-	return create_dns_request_logic_v2(request=request, db=db)
+	return trusted_response(create_dns_request_logic_v2(request=request, db=db))
 
 @router.get("/{request_id}", response_model=DnsRequestStatus, summary="V2: Get DNS request status by ID")
 def get_dns_request_status_v2(
 	request_id: uuid.UUID,
 	db: Session = Depends(get_db)
 ):
-	return get_dns_request_status_logic_v2(request_id=request_id, db=db)
+	return trusted_response(get_dns_request_status_logic_v2(request_id=request_id, db=db))
 
 @router.post("/update_status/{request_id}", response_model=DnsRequestStatus, summary="V2: Update DNS request status")
 def update_dns_request_status_v2(
@@ -33,4 +35,4 @@ def update_dns_request_status_v2(
 	new_status: str,
 	db: Session = Depends(get_db)
 ):
-	return update_dns_request_status_logic_v2(request_id=request_id, new_status=new_status, db=db)
+	return trusted_response(update_dns_request_status_logic_v2(request_id=request_id, new_status=new_status, db=db))
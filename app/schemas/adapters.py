@@ -0,0 +1,25 @@
+"""
+Cached pydantic TypeAdapters.
+
+Building a TypeAdapter compiles a validator and a serializer, which costs
+far more than using one. type_adapter() builds each adapter once per type,
+on first use rather than at import.
+"""
+
+from functools import lru_cache
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from app.schemas.request import DnsRequestCreate
+from app.schemas.response import DnsRequestStatus
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+def dns_request_create_adapter() -> TypeAdapter:
+    return type_adapter(DnsRequestCreate)
+
+def dns_request_status_adapter() -> TypeAdapter:
+    return type_adapter(DnsRequestStatus)
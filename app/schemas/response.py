@@ -21,10 +21,110 @@ class DnsRequestStatus(BaseModel):
     status: str
     message: str
 
+class DnsRequestBatchItemResult(BaseModel):
+    """
+    The outcome of one item of a batch create call.
+    Exactly one of result or error is set.
+    """
+    index: int
+    result: Optional[DnsRequestStatus] = None
+    error: Optional[str] = None
+
+class DnsRequestBatchStatus(BaseModel):
+    """
+    The response body after a batch of DNS requests is submitted.
+    """
+    accepted: int
+    rejected: int
+    results: List[DnsRequestBatchItemResult]
+
+class DnsImportLineError(BaseModel):
+    """
+    A rejected line of an NDJSON import, numbered from 1.
+    """
+    line: int
+    error: str
+
+class DnsImportReport(BaseModel):
+    """
+    The outcome of an NDJSON import. accepted requests were created,
+    duplicates matched a PENDING request and were not created again.
+    errors lists at most IMPORT_MAX_REPORTED_ERRORS of the rejected lines.
+    aborted is set when a chunk could not be written; lines after it were
+    not read.
+    """
+    lines: int
+    accepted: int
+    duplicates: int
+    rejected: int
+    errors: List[DnsImportLineError]
+    aborted: Optional[str] = None
+
 class LogMessage(BaseModel):
     """
     Schema for a single log entry.
     """
     timestamp: datetime = Field(default_factory=datetime.now)
     status: str
-    message: str
\ No newline at end of file
+    message: str
+
+class DnsRequestHistoryEntry(BaseModel):
+    """
+    A single event in a DNS request's history.
+    """
+    id: int
+    timestamp: datetime
+    status: str
+    message: str
+
+class DnsRequestHistory(BaseModel):
+    """
+    One page of a DNS request's history.
+    Pass next_after as the after parameter to fetch the next page; it is
+    null on the last page.
+    """
+    request_id: uuid.UUID
+    events: List[DnsRequestHistoryEntry]
+    next_after: Optional[int] = None
+
+class DnsRequestSummary(BaseModel):
+    """
+    A DNS request as returned by the listing endpoint.
+    """
+    id: uuid.UUID
+    account_id: Optional[str] = None
+    record_type: str
+    domain: str
+    target: str
+    status: str
+    source: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+class DnsRequestPage(BaseModel):
+    """
+    One page of DNS requests, newest first.
+    Pass next_cursor as the cursor parameter to fetch the next page; it is
+    null on the last page.
+    """
+    items: List[DnsRequestSummary]
+    next_cursor: Optional[str] = None
+
+class DnsRecordSummary(BaseModel):
+    """
+    A provisioned DNS record as returned by the listing endpoint.
+    """
+    id: uuid.UUID
+    request_id: uuid.UUID
+    account_id: Optional[str] = None
+    record_type: str
+    domain: str
+    target: str
+    provisioned_at: datetime
+
+class DnsRecordPage(BaseModel):
+    """
+    One page of provisioned DNS records, newest first.
+    """
+    items: List[DnsRecordSummary]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,35 @@
+"""
+DNS name helpers.
+"""
+
+# Public suffixes that span two labels. A full Public Suffix List is not
+# needed here: these cover the registries our zones actually live under, and
+# anything else is treated as a single-label TLD.
+MULTI_LABEL_SUFFIXES = frozenset({
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "plc.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "net.nz",
+    "co.jp", "ne.jp", "or.jp",
+    "com.br", "net.br", "org.br",
+    "com.cn", "net.cn", "org.cn",
+    "co.in", "net.in", "org.in",
+    "co.za", "org.za",
+    "com.mx", "com.sg", "com.hk", "com.tr", "com.ar",
+})
+
+def normalize_domain(domain: str) -> str:
+    """
+    Lower-case a domain name and strip the trailing root dot.
+    """
+    return domain.strip().rstrip(".").lower()
+
+def registrable_domain(domain: str) -> str:
+    """
+    Return the registrable part of a domain name (public suffix plus one label),
+    e.g. "www.api.example.co.uk" -> "example.co.uk". Wildcard labels are ignored.
+    """
+    labels = [label for label in normalize_domain(domain).split(".") if label and label != "*"]
+    if len(labels) <= 2:
+        return ".".join(labels)
+    suffix_length = 2 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 1
+    return ".".join(labels[-(suffix_length + 1):])
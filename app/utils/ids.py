@@ -0,0 +1,36 @@
+"""
+Time-ordered identifiers.
+"""
+
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a UUIDv7 (RFC 9562): a 48-bit Unix millisecond timestamp
+    followed by 74 random bits. IDs sort by creation time, which keeps
+    B-tree inserts local and lets the creation time be recovered from the ID.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                          # version
+        | ((rand >> 62) & 0xFFF) << 64       # rand_a
+        | 0b10 << 62                         # variant
+        | (rand & 0x3FFF_FFFF_FFFF_FFFF)     # rand_b
+    )
+    return uuid.UUID(int=value)
+
+def uuid7_datetime(value: uuid.UUID) -> Optional[datetime]:
+    """
+    Return the naive UTC creation time embedded in a UUIDv7, or None for
+    other UUID versions.
+    """
+    if value.version != 7:
+        return None
+    timestamp_ms = value.int >> 80
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,46 @@
+"""
+Deferred construction of module-level singletons.
+"""
+
+import threading
+from typing import Any, Callable
+
+class LazyObject:
+    """
+    Proxy that builds the wrapped object with factory() on first attribute
+    access and forwards all attribute reads and writes to it. Lets modules
+    expose singletons such as settings without doing any work at import.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_wrapped", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _setup(self) -> Any:
+        wrapped = self._wrapped
+        if wrapped is None:
+            with self._lock:
+                wrapped = self._wrapped
+                if wrapped is None:
+                    wrapped = self._factory()
+                    object.__setattr__(self, "_wrapped", wrapped)
+        return wrapped
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._wrapped is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._setup(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._setup(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._setup(), name)
+
+    def __repr__(self) -> str:
+        if self._wrapped is None:
+            return f"<LazyObject {getattr(self._factory, '__name__', self._factory)} (not loaded)>"
+        return repr(self._wrapped)
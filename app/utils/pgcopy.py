@@ -0,0 +1,72 @@
+"""
+COPY helpers that work with either psycopg2 or psycopg 3 DBAPI connections.
+"""
+
+from typing import BinaryIO, Iterable, Union
+
+def copy_to(dbapi_connection, sql: str, output: BinaryIO) -> None:
+    """
+    Run a COPY ... TO STDOUT statement and write its output to a binary file.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sql, _TextToBinary(output))
+        else:
+            with cursor.copy(sql) as copy:
+                for chunk in copy:
+                    output.write(chunk)
+    finally:
+        cursor.close()
+
+def copy_from(dbapi_connection, sql: str, data: Union[BinaryIO, Iterable[bytes]]) -> None:
+    """
+    Run a COPY ... FROM STDIN statement fed from a binary file or an
+    iterable of byte chunks.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            source = data if hasattr(data, "read") else _IterableReader(data)
+            cursor.copy_expert(sql, source)
+        else:
+            with cursor.copy(sql) as copy:
+                if hasattr(data, "read"):
+                    while True:
+                        chunk = data.read(65536)
+                        if not chunk:
+                            break
+                        copy.write(chunk)
+                else:
+                    for chunk in data:
+                        copy.write(chunk)
+    finally:
+        cursor.close()
+
+class _TextToBinary:
+    # psycopg2 writes str to text-mode targets; encode for binary outputs like gzip files
+    def __init__(self, output: BinaryIO):
+        self.output = output
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return self.output.write(data)
+
+class _IterableReader:
+    # Minimal file-like adapter so psycopg2's copy_expert can read from a generator
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
@@ -0,0 +1,13 @@
+"""
+Offline load and latency benchmarks for the DNS orchestrator.
+
+Run from the repository root:
+
+    python -m benchmarks --concurrency 32 --requests 2000 --output bench.json
+
+Everything runs in one process against local stand-ins (see
+benchmarks/environment.py): a throwaway Postgres cluster, Celery's in-memory
+broker, an in-memory Kafka consumer, a JWKS file for SSO and the fake
+provisioning executor. Results are written as JSON; pass --baseline with an
+earlier result to fail on regressions.
+"""
@@ -0,0 +1,123 @@
+"""
+Run the offline benchmark suite and print (or write) the results as JSON.
+
+    python -m benchmarks --scenarios create,status,kafka,provision,sso --concurrency 32 --requests 2000
+    python -m benchmarks --output new.json --baseline old.json --tolerance 0.2
+
+Without --database-url a throwaway Postgres cluster is started for the run
+and removed afterwards. A given --database-url is migrated to the latest
+revision and written to, so point it at a scratch database.
+
+With --baseline the exit status is 1 when any scenario's p50/p95/p99
+latency grew, or its throughput dropped, by more than --tolerance.
+"""
+
+from contextlib import ExitStack
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import environment
+from benchmarks.stats import find_regressions
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main() -> int:
+    from benchmarks.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated, run in this order")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients, worker threads or Kafka partitions")
+    parser.add_argument("--requests", type=int, default=1000, help="operations per scenario")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"), help="scratch database instead of a throwaway cluster")
+    parser.add_argument("--pg-bin", help="directory with initdb and pg_ctl")
+    parser.add_argument("--dispatch-mode", choices=["outbox", "direct"], help="TASK_DISPATCH_MODE for the create paths")
+    parser.add_argument("--kafka-batch-size", type=int, default=100)
+    parser.add_argument("--provisioning-latency", type=float, default=0.05, help="simulated seconds per provisioning run")
+    parser.add_argument("--provisioning-timeout", type=float, default=120.0)
+    parser.add_argument("--sso-distinct-tokens", type=int, default=0, help="0 gives every call a new token")
+    parser.add_argument("--output", help="write the results here instead of stdout")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    with ExitStack() as stack:
+        workdir = stack.enter_context(tempfile.TemporaryDirectory(prefix="dns-bench-"))
+        database_url = args.database_url
+        if not database_url:
+            try:
+                database_url = stack.enter_context(environment.ThrowawayPostgres(args.pg_bin)).url
+            except RuntimeError as e:
+                parser.exit(2, f"{e}\n")
+        jwks_path, private_key = environment.write_jwks(workdir)
+        environment.configure(database_url, jwks_path, args.provisioning_latency, args.dispatch_mode)
+        environment.migrate()
+
+        from app.core.config import settings
+        from app.core.database import dispose_engines
+        from benchmarks.scenarios import BenchContext
+
+        ctx = BenchContext(
+            concurrency=args.concurrency,
+            requests=args.requests,
+            kafka_batch_size=args.kafka_batch_size,
+            sso_distinct_tokens=args.sso_distinct_tokens,
+            private_key=private_key,
+            provisioning_timeout=args.provisioning_timeout
+        )
+        results = {}
+        for name in names:
+            print(f"Running {name}...", file=sys.stderr)
+            for label, recorder in SCENARIOS[name](ctx).items():
+                results[label] = recorder.summary()
+        # Close pooled connections before the throwaway cluster goes away
+        asyncio.run(dispose_engines())
+
+    document = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "task_dispatch_mode": settings.TASK_DISPATCH_MODE,
+            "db_async_enabled": settings.DB_ASYNC_ENABLED,
+            "provisioning_latency_seconds": args.provisioning_latency,
+            "provisioning_batch_size": settings.PROVISIONING_BATCH_SIZE,
+            "kafka_batch_size": args.kafka_batch_size,
+        },
+        "scenarios": results,
+    }
+    rendered = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+    else:
+        print(rendered)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(json.load(f), document, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Local stand-ins for the services the application talks to.
+
+- Postgres: ThrowawayPostgres starts a private cluster in a temporary
+  directory (initdb/pg_ctl from PATH, PG_BIN or pg_config), or a
+  database URL is given. The code relies on Postgres itself (JSONB,
+  partitioning, advisory locks, NOTIFY, pg_trgm), so there is no
+  in-memory replacement for it.
+- Celery broker: kombu's in-memory transport (memory://).
+- Kafka: FakeKafkaConsumer, the part of KafkaConsumer that
+  app.kafka.consumer.ingest_batch uses, fed with generated batches.
+- SSO: a JWKS file with a freshly generated RSA key, and tokens signed
+  with it, verified in SSO_VALIDATION_MODE=local.
+- Provisioning: the FakeExecutor with a configurable latency.
+
+configure() must run before anything reads app.core.config.settings.
+"""
+
+from collections import namedtuple
+from typing import Dict, List, Optional
+import glob
+import json
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+KafkaRecord = namedtuple("KafkaRecord", ["offset", "value"])
+
+BENCH_AUDIENCE = "dns-orchestrator-bench"
+BENCH_ISSUER = "https://sso.bench.invalid"
+
+class ThrowawayPostgres:
+    """
+    A Postgres cluster that lives for one benchmark run. Durability is
+    turned off (fsync, synchronous_commit), which makes results steadier
+    but faster than a production database.
+    """
+
+    def __init__(self, bin_dir: Optional[str] = None):
+        self.bin_dir = bin_dir or find_postgres_bin_dir()
+        if self.bin_dir is None:
+            raise RuntimeError("Postgres server binaries not found: put initdb and pg_ctl on PATH, set PG_BIN, or pass --database-url")
+        self.directory: Optional[str] = None
+        self.url: Optional[str] = None
+
+    def _run(self, *args: str):
+        subprocess.run([os.path.join(self.bin_dir, args[0]), *args[1:]], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def __enter__(self) -> "ThrowawayPostgres":
+        self.directory = tempfile.mkdtemp(prefix="dns-bench-pg-")
+        data_dir = os.path.join(self.directory, "data")
+        port = _free_port()
+        self._run("initdb", "-D", data_dir, "-U", "bench", "-A", "trust", "-E", "UTF8")
+        options = f"-p {port} -k {self.directory} -c listen_addresses=127.0.0.1 -c max_connections=300 -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+        self._run("pg_ctl", "-D", data_dir, "-l", os.path.join(self.directory, "postgres.log"), "-o", options, "-w", "start")
+        self.url = f"postgresql://bench@127.0.0.1:{port}/postgres"
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self._run("pg_ctl", "-D", os.path.join(self.directory, "data"), "-m", "immediate", "-w", "stop")
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+def find_postgres_bin_dir() -> Optional[str]:
+    candidates = [os.getenv("PG_BIN")]
+    initdb = shutil.which("initdb")
+    if initdb:
+        candidates.append(os.path.dirname(initdb))
+    if shutil.which("pg_config"):
+        candidates.append(subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True).stdout.strip())
+    # Debian and Ubuntu keep the server binaries off PATH
+    candidates.extend(sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True))
+    for candidate in candidates:
+        if candidate and os.path.exists(os.path.join(candidate, "initdb")):
+            return candidate
+    return None
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def write_jwks(directory: str):
+    """
+    Generate an RSA signing key and write its public half as a JWKS file.
+    Returns (jwks path, private key).
+    """
+    import jwt
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": "bench-key", "alg": "RS256", "use": "sig"})
+    path = os.path.join(directory, "jwks.json")
+    with open(path, "w") as f:
+        json.dump({"keys": [jwk]}, f)
+    return path, private_key
+
+def mint_token(private_key, subject: str, ttl: float = 3600) -> str:
+    import jwt
+
+    claims = {
+        "sub": subject,
+        "iss": BENCH_ISSUER,
+        "aud": BENCH_AUDIENCE,
+        "exp": int(time.time() + ttl),
+        "scope": "read:dns write:dns",
+    }
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "bench-key"})
+
+def configure(database_url: str, jwks_path: str, provisioning_latency: float, dispatch_mode: Optional[str] = None):
+    """
+    Point the application at the stand-ins. Explicit arguments win; other
+    settings only get a default, so the environment can still tune them.
+    """
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["CELERY_BROKER_URL"] = "memory://"
+    os.environ["SSO_VALIDATION_MODE"] = "local"
+    os.environ["SSO_JWKS_URL"] = jwks_path
+    os.environ["SSO_JWT_ISSUER"] = BENCH_ISSUER
+    os.environ["SSO_JWT_AUDIENCE"] = BENCH_AUDIENCE
+    os.environ["PROVISIONING_BACKEND"] = "fake"
+    os.environ["PROVISIONING_FAKE_LATENCY_SECONDS"] = str(provisioning_latency)
+    if dispatch_mode:
+        os.environ["TASK_DISPATCH_MODE"] = dispatch_mode
+    # Quiet logs, and a pool large enough for the default concurrency
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("DB_POOL_SIZE", "20")
+    os.environ.setdefault("DB_MAX_OVERFLOW", "20")
+
+def migrate():
+    """
+    Bring the database to the latest Alembic revision.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config()
+    config.set_main_option("script_location", os.path.join(root, "app", "models", "migrations"))
+    command.upgrade(config, "head")
+
+class FakeKafkaConsumer:
+    """
+    In-memory stand-in for the KafkaConsumer calls made by ingest_batch.
+    """
+
+    def __init__(self):
+        self.commits = 0
+        self.seeks: List[tuple] = []
+        self.highwaters: Dict = {}
+
+    def highwater(self, tp):
+        return self.highwaters.get(tp)
+
+    def seek(self, tp, offset: int):
+        self.seeks.append((tp, offset))
+
+    def commit(self):
+        self.commits += 1
+
+def kafka_batches(topic: str, partition: int, payloads: List[dict], batch_size: int, first_offset: int = 0):
+    """
+    Split payloads into poll()-shaped batches ({TopicPartition: [records]})
+    for one partition.
+    """
+    from kafka.structs import TopicPartition
+
+    tp = TopicPartition(topic, partition)
+    batches = []
+    for start in range(0, len(payloads), batch_size):
+        records = [
+            KafkaRecord(offset=first_offset + start + i, value=json.dumps(payload).encode("utf-8"))
+            for i, payload in enumerate(payloads[start:start + batch_size])
+        ]
+        batches.append({tp: records})
+    return batches
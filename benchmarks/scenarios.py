@@ -0,0 +1,279 @@
+"""
+Benchmark scenarios. Each one drives a path of the application at a given
+concurrency and returns LatencyRecorders, one per measured quantity.
+
+The application modules are imported inside the scenarios, after
+environment.configure() has pointed the settings at the stand-ins.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List
+import asyncio
+import itertools
+import threading
+import time
+import uuid
+
+from benchmarks.environment import FakeKafkaConsumer, kafka_batches, mint_token
+from benchmarks.stats import LatencyRecorder
+
+class BenchContext:
+    """
+    Options and shared state of one run. Request IDs created by the create
+    scenario are reused by the status scenario.
+    """
+
+    def __init__(self, concurrency: int, requests: int, kafka_batch_size: int, sso_distinct_tokens: int, private_key, provisioning_timeout: float):
+        self.concurrency = concurrency
+        self.requests = requests
+        self.kafka_batch_size = kafka_batch_size
+        self.sso_distinct_tokens = sso_distinct_tokens
+        self.private_key = private_key
+        self.provisioning_timeout = provisioning_timeout
+        # Keeps domains unique across runs against the same database
+        self.run_id = uuid.uuid4().hex[:8]
+        self.request_ids: List[str] = []
+        self._counter = itertools.count()
+
+    def payload(self) -> dict:
+        i = next(self._counter)
+        return {
+            "context": {"account_id": f"bench-{i % 50}"},
+            "resource": {
+                "record_type": "A",
+                "domain": f"host{i}.zone{i % 20}-{self.run_id}.test",
+                "target": f"192.0.2.{i % 250 + 1}",
+                "config": {"ttl": 300}
+            }
+        }
+
+async def _drive_async(recorder: LatencyRecorder, concurrency: int, total: int, operation: Callable[[int], Awaitable[int]]):
+    # concurrency workers share one counter, so exactly total operations run
+    counter = itertools.count()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            started = time.perf_counter()
+            try:
+                items = await operation(i)
+            except Exception as e:
+                recorder.record_error(e)
+            else:
+                recorder.record(time.perf_counter() - started, items)
+
+    recorder.start()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    recorder.stop()
+
+def _drive_threads(recorder: LatencyRecorder, concurrency: int, items: List, operation: Callable) -> None:
+    def run(item):
+        started = time.perf_counter()
+        try:
+            count = operation(item)
+        except Exception as e:
+            recorder.record_error(e)
+        else:
+            recorder.record(time.perf_counter() - started, count)
+
+    recorder.start()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, items))
+    recorder.stop()
+
+def _run_async(main: Callable[[], Awaitable[None]]):
+    from app.core.database import dispose_engines
+
+    async def run():
+        try:
+            await main()
+        finally:
+            # asyncpg connections belong to this event loop, which is about to close
+            await dispose_engines()
+
+    asyncio.run(run())
+
+def _asgi_client():
+    import httpx
+    from app.main import create_app
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()), base_url="http://bench")
+
+def seed_requests(ctx: BenchContext, count: int) -> List[str]:
+    """
+    Insert PENDING requests directly, outside any measurement.
+    """
+    from app.api.v1.api import create_dns_requests_bulk
+    from app.core.database import SessionLocal
+    from app.schemas.request import DnsRequestCreate
+
+    db = SessionLocal()
+    try:
+        request_ids = create_dns_requests_bulk([DnsRequestCreate.model_validate(ctx.payload()) for _ in range(count)], db)
+    finally:
+        db.close()
+    return [str(request_id) for request_id in request_ids]
+
+def bench_create(ctx: BenchContext) -> Dict[str, LatencyRecorder]:
+    """
+    POST /api/v1/create through the ASGI app: validation, the insert with
+    its event and outbox rows (or the broker publish in direct dispatch mode),
+    and the commit.
+    """
+    recorder = LatencyRecorder("create")
+
+    async def run():
+        async with _asgi_client() as client:
+            async def create(i: int) -> int:
+                response = await client.post("/api/v1/create", json=ctx.payload())
+                response.raise_for_status()
+                ctx.request_ids.append(response.json()["context"]["request_id"])
+                return 1
+
+            await _drive_async(recorder, ctx.concurrency, ctx.requests, create)
+
+    _run_async(run)
+    return {"create": recorder}
+
+def bench_status(ctx: BenchContext) -> Dict[str, LatencyRecorder]:
+    """
+    GET /api/v1/{request_id} polling over the requests made by the create
+    scenario (or freshly seeded ones), as many clients waiting on their
+    requests would. Repeated polls are served by the status cache.
+    """
+    recorder = LatencyRecorder("status")
+    request_ids = ctx.request_ids or seed_requests(ctx, min(ctx.requests, 1000))
+
+    async def run():
+        async with _asgi_client() as client:
+            async def poll(i: int) -> int:
+                response = await client.get(f"/api/v1/{request_ids[i % len(request_ids)]}")
+                response.raise_for_status()
+                return 1
+
+            await _drive_async(recorder, ctx.concurrency, ctx.requests, poll)
+
+    _run_async(run)
+    return {"status": recorder}
+
+def bench_kafka(ctx: BenchContext) -> Dict[str, LatencyRecorder]:
+    """
+    Direct-mode Kafka ingestion: one consumer per partition, each ingesting
+    its polled batches with ingest_batch. Latency is per batch; items are
+    messages.
+    """
+    from app.core.config import settings
+    from app.kafka.consumer import ingest_batch
+
+    recorder = LatencyRecorder("kafka")
+    partitions = ctx.concurrency
+    per_partition = max(ctx.requests // partitions, 1)
+    consumers = []
+    for partition in range(partitions):
+        payloads = []
+        for _ in range(per_partition):
+            body = ctx.payload()
+            # Kafka messages carry the flat payload that build_api_payload maps
+            payloads.append({"account_id": body["context"]["account_id"], **body["resource"]})
+        consumers.append((FakeKafkaConsumer(), kafka_batches(settings.KAFKA_DNS_TOPIC, partition, payloads, ctx.kafka_batch_size)))
+
+    def consume(consumer_and_batches):
+        consumer, batches = consumer_and_batches
+        for batch in batches:
+            started = time.perf_counter()
+            if not ingest_batch(consumer, batch):
+                recorder.record_error(RuntimeError("Kafka batch rejected and rewound"))
+                continue
+            recorder.record(time.perf_counter() - started, sum(len(records) for records in batch.values()))
+
+    recorder.start()
+    with ThreadPoolExecutor(max_workers=partitions) as pool:
+        list(pool.map(consume, consumers))
+    recorder.stop()
+    return {"kafka": recorder}
+
+def bench_provision(ctx: BenchContext) -> Dict[str, LatencyRecorder]:
+    """
+    provision_dns_record run eagerly (Celery's apply, with its signals) from
+    concurrency worker threads, against the fake executor. "provision_task"
+    is the task itself; "provision_end_to_end" runs until
+    finalize_dns_requests has committed the outcome, so it includes zone
+    batching and the simulated provisioning latency.
+    """
+    from app.celery import tasks
+
+    task_recorder = LatencyRecorder("provision_task")
+    end_to_end = LatencyRecorder("provision_end_to_end")
+    request_ids = seed_requests(ctx, ctx.requests)
+    started_at: Dict[str, float] = {}
+    remaining = set(request_ids)
+    all_done = threading.Event()
+    lock = threading.Lock()
+    finalize = tasks.finalize_dns_requests
+
+    def timed_finalize(ids, result):
+        finalize(ids, result)
+        finished = time.perf_counter()
+        with lock:
+            for request_id in ids:
+                end_to_end.record(finished - started_at[request_id])
+                remaining.discard(request_id)
+            if not remaining:
+                all_done.set()
+
+    def provision(request_id: str) -> int:
+        started_at[request_id] = time.perf_counter()
+        result = tasks.provision_dns_record.apply(args=[request_id])
+        if result.failed():
+            raise result.result
+        return 1
+
+    tasks.finalize_dns_requests = timed_finalize
+    try:
+        end_to_end.start()
+        _drive_threads(task_recorder, ctx.concurrency, request_ids, provision)
+        if not all_done.wait(ctx.provisioning_timeout):
+            end_to_end.record_error(TimeoutError(f"{len(remaining)} requests not finalized after {ctx.provisioning_timeout}s"))
+        end_to_end.stop()
+    finally:
+        tasks.finalize_dns_requests = finalize
+    return {"provision_task": task_recorder, "provision_end_to_end": end_to_end}
+
+def bench_sso(ctx: BenchContext) -> Dict[str, LatencyRecorder]:
+    """
+    SSOAuth.authenticate with JWTs verified locally against the JWKS file.
+    With --sso-distinct-tokens 0 every call brings a new token (a cache
+    miss and a signature check); otherwise calls cycle through that many
+    tokens and mostly hit the token cache.
+    """
+    from app.core.security import SSOAuth
+
+    recorder = LatencyRecorder("sso")
+    distinct = ctx.sso_distinct_tokens or ctx.requests
+    # Signing is slow and not what is measured, so tokens are minted up front
+    tokens = [mint_token(ctx.private_key, f"user-{i}") for i in range(distinct)]
+
+    async def run():
+        auth = SSOAuth()
+        await auth.jwks.refresh()
+        try:
+            async def authenticate(i: int) -> int:
+                await auth.authenticate(tokens[i % distinct])
+                return 1
+
+            await _drive_async(recorder, ctx.concurrency, ctx.requests, authenticate)
+        finally:
+            await auth.aclose()
+
+    _run_async(run)
+    return {"sso": recorder}
+
+SCENARIOS = {
+    "create": bench_create,
+    "status": bench_status,
+    "kafka": bench_kafka,
+    "provision": bench_provision,
+    "sso": bench_sso,
+}
@@ -0,0 +1,96 @@
+"""
+Latency recording, summaries and regression checks.
+"""
+
+from typing import Any, Dict, List, Optional
+import math
+import time
+
+# Summary fields compared against a baseline, and whether higher is better
+COMPARED_FIELDS = (
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("throughput_per_second", True),
+)
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile (q in 0..100) of already sorted samples.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_samples)), 1)
+    return sorted_samples[rank - 1]
+
+class LatencyRecorder:
+    """
+    Latencies of one scenario's operations, and the wall time they took.
+    Operations may process several items each (a Kafka batch, for example);
+    throughput is reported both per operation and per item.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples: List[float] = []
+        self.items = 0
+        self.errors = 0
+        self.first_error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def record(self, seconds: float, items: int = 1):
+        self.samples.append(seconds)
+        self.items += items
+
+    def record_error(self, error: BaseException):
+        self.errors += 1
+        if self.first_error is None:
+            self.first_error = f"{type(error).__name__}: {error}"
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        elapsed = (self.finished or time.perf_counter()) - (self.started or 0.0)
+        result = {
+            "operations": len(samples),
+            "items": self.items,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_second": round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0,
+            "items_per_second": round(self.items / elapsed, 1) if elapsed > 0 else 0.0,
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3) if samples else 0.0,
+        }
+        if self.first_error:
+            result["first_error"] = self.first_error
+        return result
+
+def find_regressions(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare two result documents scenario by scenario. Returns a message for
+    every latency that grew, or throughput that shrank, by more than
+    tolerance (a fraction, 0.2 = 20%). Scenarios missing from either side
+    are ignored.
+    """
+    regressions = []
+    for name, now in current.get("scenarios", {}).items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for field, higher_is_better in COMPARED_FIELDS:
+            old, new = before.get(field), now.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{name}.{field}: {old} -> {new} ({change:+.0%})")
+    return regressions
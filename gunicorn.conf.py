@@ -0,0 +1,12 @@
+# Loaded automatically by gunicorn from the working directory.
+# e.g. gunicorn app.main:app -k uvicorn.workers.UvicornWorker --preload
+
+def post_fork(server, worker):
+    # With --preload the master may have opened pooled connections; each worker needs its own
+    from app.core.database import dispose_engines_after_fork
+    dispose_engines_after_fork()
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges when metrics are aggregated across workers
+    from app.core.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
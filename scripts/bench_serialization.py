@@ -0,0 +1,90 @@
+"""
+Measure the CPU spent building and encoding the /create and GET /{request_id}
+responses, FastAPI's default path against the fast response path.
+
+default: the handler returns the DnsRequestStatus model and FastAPI validates
+         it again against the response_model, in the threadpool for the sync
+         routes, before encoding it.
+fast:    the handler returns trusted_response(model), which encodes it with
+         the cached TypeAdapter on the calling thread.
+
+Both paths build the model the same way. Request parsing, the database and
+the ASGI stack also cost the same on both paths and are left out. No database
+or server is needed.
+
+    python scripts/bench_serialization.py --iterations 20000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import Response
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.api.common.responses import trusted_response
+from app.api.v1.api import _submitted_response, build_status_response
+from app.core.status_cache import StatusSnapshot
+from app.schemas.adapters import dns_request_create_adapter
+from app.schemas.response import DnsRequestStatus
+from app.utils.ids import uuid7
+
+REQUEST_BODY = json.dumps({
+    "context": {"account_id": "123456789012", "source": "api"},
+    "resource": {"record_type": "A", "domain": "bench.example.com", "target": "192.0.2.10", "config": {"ttl": 60}}
+}).encode("utf-8")
+
+async def _run(build, encode, iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        await encode(build())
+    return (time.process_time() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--async-routes", action="store_true", help="validate on the event loop, as with DB_ASYNC_ENABLED")
+    args = parser.parse_args()
+
+    field = create_model_field("Response_dns", DnsRequestStatus, mode="serialization")
+    request = dns_request_create_adapter().validate_json(REQUEST_BODY)
+    snapshot = StatusSnapshot(id=uuid7(), status="COMPLETED", updated_at="2024-01-01T00:00:00+00:00")
+
+    async def default_encode(model):
+        content = await serialize_response(field=field, response_content=model, is_coroutine=args.async_routes, dump_json=True)
+        return Response(content=content, media_type="application/json")
+
+    async def fast_encode(model):
+        return trusted_response(model)
+
+    scenarios = {
+        "POST /create": lambda: _submitted_response(request, uuid7()),
+        "GET /{request_id}": lambda: build_status_response(snapshot),
+    }
+
+    async def bench():
+        results = {}
+        for name, build in scenarios.items():
+            # Warm up the validators, serializers and the threadpool
+            await _run(build, default_encode, 200)
+            await _run(build, fast_encode, 200)
+            default_us = await _run(build, default_encode, args.iterations)
+            fast_us = await _run(build, fast_encode, args.iterations)
+            results[name] = {
+                "default_us": round(default_us, 2),
+                "fast_us": round(fast_us, 2),
+                "saved_us": round(default_us - fast_us, 2),
+                "saved_pct": round((default_us - fast_us) / default_us * 100, 1),
+            }
+        return results
+
+    print(json.dumps(asyncio.run(bench()), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Import DNS requests from an NDJSON file, one DnsResource per line, writing
+them with COPY in chunks of IMPORT_CHUNK_SIZE. The report (counts and the
+rejected lines) is printed as JSON; the exit status is 1 when any line was
+rejected or the import stopped early.
+
+    python scripts/import_ndjson.py zone.ndjson --account-id 123456789012
+    zcat zone.ndjson.gz | python scripts/import_ndjson.py - --account-id 123456789012 --source migration
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.api.v1.imports import import_ndjson
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.domain_index import domain_index_sync
+
+READ_SIZE = 65536
+
+def _read_chunks(stream):
+    while True:
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="NDJSON file, or - for stdin")
+    parser.add_argument("--account-id", required=True)
+    parser.add_argument("--source", default="import")
+    parser.add_argument("--index-timeout", type=float, default=60.0, help="seconds to wait for the domain index to load")
+    args = parser.parse_args()
+
+    if settings.DOMAIN_INDEX_ENABLED:
+        domain_index_sync.start_in_thread()
+        if not domain_index_sync.loaded.wait(args.index_timeout):
+            print(f"Domain index not loaded after {args.index_timeout}s; importing without conflict checks", file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        if args.path == "-":
+            report = import_ndjson(_read_chunks(sys.stdin.buffer), db, args.account_id, args.source)
+        else:
+            with open(args.path, "rb") as f:
+                report = import_ndjson(_read_chunks(f), db, args.account_id, args.source)
+    finally:
+        db.close()
+
+    print(report.model_dump_json(indent=2))
+    return 1 if report.rejected or report.aborted else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
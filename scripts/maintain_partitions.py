@@ -0,0 +1,32 @@
+"""
+Run dns_requests partition maintenance once, outside of celery beat.
+
+    python scripts/maintain_partitions.py                      # create upcoming partitions
+    python scripts/maintain_partitions.py --archive            # also archive expired ones
+    python scripts/maintain_partitions.py --archive --retention-months 6 --archive-dir /backups
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.celery.maintenance import ensure_future_partitions, archive_old_partitions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=None)
+    parser.add_argument("--archive", action="store_true", help="detach, archive and drop expired partitions")
+    parser.add_argument("--retention-months", type=int, default=None)
+    parser.add_argument("--archive-dir", default=None)
+    args = parser.parse_args()
+
+    for name in ensure_future_partitions(args.months_ahead):
+        print(f"created {name}")
+    if args.archive:
+        for path in archive_old_partitions(args.retention_months, args.archive_dir):
+            print(f"archived {path}")
+
+if __name__ == "__main__":
+    main()
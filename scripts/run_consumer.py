@@ -1,8 +1,10 @@
 from app.kafka.consumer import consume_dns_requests
 from app.core.logging import get_logger
+from app.core.metrics import start_metrics_server
 
 logger = get_logger(__name__)
 
 if __name__ == "__main__":
+    start_metrics_server()
     logger.info("Starting Kafka consumer...")
     consume_dns_requests()
@@ -0,0 +1,10 @@
+from app.celery.outbox import run_outbox_relay
+from app.core.logging import get_logger
+from app.core.metrics import start_metrics_server
+
+logger = get_logger(__name__)
+
+if __name__ == "__main__":
+    start_metrics_server()
+    logger.info("Starting outbox relay...")
+    run_outbox_relay()
@@ -0,0 +1,133 @@
+import importlib
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Insert, Select
+
+from app.api.v1 import api
+from app.core import domain_index
+from app.core.config import settings
+from app.core.database import get_async_db, get_async_read_db
+from app.core.status_cache import StatusCache
+from app.models.models import DnsRequest
+from app.routes.v1 import routes
+
+
+class _AsyncSession:
+    """
+    The AsyncSession calls made by the async create, status and update paths,
+    backed by a dict of DnsRequest rows. It has no sync API, so a request
+    served by a sync route fails.
+    """
+
+    def __init__(self):
+        self.requests = {}
+        self.events = []
+        self.commits = 0
+        self.sync = MagicMock()
+        self.sync.add.side_effect = lambda row: self.requests.setdefault(row.id, row)
+        self.sync.execute.side_effect = self._execute
+
+    def _execute(self, statement, params=None):
+        result = MagicMock()
+        if isinstance(statement, Insert):
+            self.events.extend(params)
+        elif isinstance(statement, Select):
+            request_id = next(value for value in statement.compile().params.values() if isinstance(value, uuid.UUID))
+            row = self.requests.get(request_id)
+            if statement.column_descriptions[0]["type"] is DnsRequest:
+                result.scalars.return_value.first.return_value = row
+            elif row is not None:
+                result.first.return_value = SimpleNamespace(id=row.id, status=row.status, updated_at=row.updated_at)
+            else:
+                result.first.return_value = None
+        return result
+
+    async def execute(self, statement, params=None):
+        return self._execute(statement, params)
+
+    async def run_sync(self, fn, *args):
+        return fn(self.sync, *args)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    async def refresh(self, row):
+        # updated_at is set by the database
+        row.updated_at = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def async_app(monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(settings, "DB_ASYNC_ENABLED", True)
+        importlib.reload(routes)
+    async_router = routes.router
+    importlib.reload(routes)
+
+    monkeypatch.setattr(settings, "DEDUP_PENDING_REQUESTS", False)
+    monkeypatch.setattr(settings, "TASK_DISPATCH_MODE", "direct")
+    monkeypatch.setattr(settings, "DATABASE_READ_URL", None)
+    monkeypatch.setattr(domain_index, "_index", None)
+    monkeypatch.setattr(api, "status_cache", StatusCache(maxsize=100, local_ttl=5.0, redis_url=None, redis_ttl=60))
+
+    session = _AsyncSession()
+
+    async def override():
+        yield session
+
+    app = FastAPI()
+    app.include_router(async_router, prefix="/api/v1")
+    app.dependency_overrides[get_async_db] = override
+    app.dependency_overrides[get_async_read_db] = override
+    return TestClient(app), session
+
+
+def _body(domain="www.example.com"):
+    return {
+        "context": {"account_id": "123456789012"},
+        "resource": {"record_type": "A", "domain": domain, "target": "192.0.2.1"}
+    }
+
+
+def test_async_create_then_get_round_trip(async_app):
+    client, session = async_app
+    with patch.object(api, "publish_provisioning") as publish:
+        created = client.post("/api/v1/create", json=_body())
+    assert created.status_code == 200
+    request_id = created.json()["context"]["request_id"]
+    assert session.commits == 1
+    publish.assert_called_once_with([uuid.UUID(request_id)])
+    assert [event["request_id"] for event in session.events] == [uuid.UUID(request_id)]
+
+    fetched = client.get(f"/api/v1/{request_id}")
+    assert fetched.status_code == 200
+    assert fetched.json()["status"] == "PENDING"
+    assert "ETag" in fetched.headers
+
+
+def test_async_update_status_invalidates_cached_status(async_app):
+    client, session = async_app
+    with patch.object(api, "publish_provisioning"):
+        request_id = client.post("/api/v1/create", json=_body()).json()["context"]["request_id"]
+    assert client.get(f"/api/v1/{request_id}").json()["status"] == "PENDING"
+
+    updated = client.post(f"/api/v1/update_status/{request_id}", params={"new_status": "COMPLETED"})
+    assert updated.status_code == 200
+    assert updated.json()["status"] == "COMPLETED"
+    assert session.events[-1]["message"] == "Status updated to COMPLETED."
+    assert client.get(f"/api/v1/{request_id}").json()["status"] == "COMPLETED"
+
+
+def test_async_get_unknown_request_is_404(async_app):
+    client, _ = async_app
+    assert client.get(f"/api/v1/{uuid.uuid4()}").status_code == 404
+    assert client.post(f"/api/v1/update_status/{uuid.uuid4()}", params={"new_status": "COMPLETED"}).status_code == 404
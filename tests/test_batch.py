@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import api
+from app.core import domain_index
+from app.core.database import get_db
+from app.core.domain_index import DomainIndex
+from app.routes.v1.routes import router
+from app.utils.ids import uuid7
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(domain_index.settings, "DOMAIN_INDEX_ENABLED", True)
+    monkeypatch.setattr(domain_index, "_index", DomainIndex())
+    db = MagicMock()
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app), db
+
+
+def _item(**resource):
+    return {
+        "context": {"account_id": "123456789012"},
+        "resource": {"record_type": "A", "domain": "www.example.com", "target": "192.0.2.1", **resource}
+    }
+
+
+def _bulk_ids(requests, db):
+    return [uuid7() for _ in requests]
+
+
+def test_batch_reports_invalid_items_and_creates_the_rest(client):
+    client, db = client
+    items = [
+        _item(domain="a.example.com"),
+        _item(domain=None),
+        {"context": {"account_id": "123456789012"}},
+        _item(domain="c.example.com"),
+    ]
+    with patch.object(api, "create_dns_requests_bulk", side_effect=_bulk_ids) as bulk:
+        response = client.post("/api/v1/batch", json=items)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (2, 2)
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3]
+    assert body["results"][0]["result"]["context"]["request_id"]
+    assert "resource.domain" in body["results"][1]["error"]
+    assert body["results"][2]["error"].startswith("resource: ")
+    assert body["results"][3]["result"] is not None
+    # Only the valid items reach the database, in order
+    (requests, _), = [call.args for call in bulk.call_args_list]
+    assert [request.resource.domain for request in requests] == ["a.example.com", "c.example.com"]
+
+
+def test_batch_reports_conflicts_with_earlier_items(client):
+    client, _ = client
+    items = [_item(record_type="CNAME", target="lb.example.net"), _item()]
+    with patch.object(api, "create_dns_requests_bulk", side_effect=_bulk_ids):
+        body = client.post("/api/v1/batch", json=items).json()
+    assert (body["accepted"], body["rejected"]) == (1, 1)
+    assert body["results"][0]["error"] is None
+    assert "CNAME" in body["results"][1]["error"]
+
+
+def test_batch_of_only_invalid_items_writes_nothing(client):
+    client, db = client
+    with patch.object(api, "create_dns_requests_bulk") as bulk:
+        body = client.post("/api/v1/batch", json=[_item(target=None), {}]).json()
+    assert (body["accepted"], body["rejected"]) == (0, 2)
+    assert all(result["error"] for result in body["results"])
+    bulk.assert_not_called()
+    db.rollback.assert_not_called()
+
+
+def test_batch_write_failure_is_a_500(client):
+    client, db = client
+    with patch.object(api, "create_dns_requests_bulk", side_effect=RuntimeError("database is down")):
+        response = client.post("/api/v1/batch", json=[_item()])
+    assert response.status_code == 500
+    db.rollback.assert_called_once()
+
+
+def test_batch_over_the_limit_is_rejected(client, monkeypatch):
+    client, _ = client
+    monkeypatch.setattr(api.settings, "BATCH_MAX_ITEMS", 2)
+    assert client.post("/api/v1/batch", json=[_item()] * 3).status_code == 413
@@ -0,0 +1,48 @@
+import time
+from app.celery.batching import ZoneBatcher
+from app.utils.dns import registrable_domain
+
+
+def test_registrable_domain():
+    assert registrable_domain("www.api.example.com") == "example.com"
+    assert registrable_domain("WWW.Example.COM.") == "example.com"
+    assert registrable_domain("mail.example.co.uk") == "example.co.uk"
+    assert registrable_domain("*.example.com") == "example.com"
+    assert registrable_domain("example.com") == "example.com"
+
+
+def _collector():
+    flushed = []
+
+    def flush(zone, items):
+        flushed.append((zone, list(items)))
+    return flushed, flush
+
+
+def test_full_batch_flushes_immediately():
+    flushed, flush = _collector()
+    batcher = ZoneBatcher(max_size=3, window=60, flush=flush)
+    for i in range(3):
+        batcher.add("example.com", i)
+    assert flushed == [("example.com", [0, 1, 2])]
+
+
+def test_window_expiry_flushes_per_zone():
+    flushed, flush = _collector()
+    batcher = ZoneBatcher(max_size=100, window=0.1, flush=flush)
+    batcher.add("example.com", 1)
+    batcher.add("example.org", 2)
+    batcher.add("example.com", 3)
+
+    deadline = time.monotonic() + 5
+    while len(flushed) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(flushed) == [("example.com", [1, 3]), ("example.org", [2])]
+
+
+def test_flush_all_drains_pending_batches():
+    flushed, flush = _collector()
+    batcher = ZoneBatcher(max_size=100, window=60, flush=flush)
+    batcher.add("example.com", 1)
+    batcher.flush_all()
+    assert flushed == [("example.com", [1])]
@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+
+from app.api.v1 import api
+from app.kafka import consumer as kafka_consumer
+from benchmarks.environment import FakeKafkaConsumer, kafka_batches
+from benchmarks.stats import LatencyRecorder, find_regressions, percentile
+
+def test_summary_reports_nearest_rank_percentiles():
+    recorder = LatencyRecorder("create")
+    recorder.start()
+    for ms in range(1, 101):
+        recorder.record(ms / 1000)
+    recorder.stop()
+
+    summary = recorder.summary()
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50.0, 95.0, 99.0)
+    assert summary["operations"] == 100
+    assert percentile([], 95) == 0.0
+
+def test_regressions_compare_latency_and_throughput():
+    baseline = {"scenarios": {"create": {"p95_ms": 10.0, "throughput_per_second": 1000.0}}}
+    current = {"scenarios": {
+        "create": {"p95_ms": 13.0, "throughput_per_second": 700.0},
+        "sso": {"p95_ms": 1.0},
+    }}
+
+    regressions = find_regressions(baseline, current, tolerance=0.2)
+    assert [r.split(":")[0] for r in regressions] == ["create.p95_ms", "create.throughput_per_second"]
+    assert find_regressions(baseline, current, tolerance=0.5) == []
+
+def test_ingest_batch_commits_or_rewinds(monkeypatch):
+    monkeypatch.setattr(kafka_consumer, "SessionLocal", MagicMock)
+    payloads = [{"account_id": "a", "record_type": "A", "domain": f"h{i}.example.com", "target": "192.0.2.1"} for i in range(5)]
+    batch = kafka_batches("dns_requests", 0, payloads, batch_size=10, first_offset=40)[0]
+    consumer = FakeKafkaConsumer()
+
+    bulk = MagicMock()
+    monkeypatch.setattr(api, "create_dns_requests_bulk", bulk)
+    assert kafka_consumer.ingest_batch(consumer, batch)
+    requests, db, keys = bulk.call_args.args
+    assert [r.resource.domain for r in requests] == [p["domain"] for p in payloads]
+    assert keys[0] == "kafka:dns_requests:0:40"
+    assert consumer.commits == 1
+
+    monkeypatch.setattr(api, "create_dns_requests_bulk", MagicMock(side_effect=RuntimeError("db down")))
+    assert not kafka_consumer.ingest_batch(consumer, batch)
+    assert consumer.commits == 1
+    assert [offset for _, offset in consumer.seeks] == [40]
@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core import database
+
+@pytest.fixture
+def pool_settings(monkeypatch):
+    monkeypatch.setattr(database.settings, "DB_STATEMENT_TIMEOUT_MS", 30000)
+    monkeypatch.setattr(database.settings, "DB_LOCK_TIMEOUT_MS", 5000)
+    monkeypatch.setattr(database.settings, "DB_PGBOUNCER_MODE", False)
+    return database.settings
+
+def test_direct_connections_set_timeouts_as_startup_options(pool_settings):
+    options = database.engine_options("postgresql+psycopg://u:p@db/app")
+    assert options["poolclass"] is database.TimedQueuePool
+    assert options["connect_args"] == {"options": "-c statement_timeout=30000 -c lock_timeout=5000"}
+
+    options = database.engine_options("postgresql+asyncpg://u:p@db/app")
+    assert options["poolclass"] is database.TimedAsyncAdaptedQueuePool
+    assert options["connect_args"] == {"server_settings": {"statement_timeout": "30000", "lock_timeout": "5000"}}
+
+def test_pgbouncer_mode_disables_prepared_statements(pool_settings, monkeypatch):
+    monkeypatch.setattr(pool_settings, "DB_PGBOUNCER_MODE", True)
+    assert database.engine_options("postgresql+psycopg://u:p@db/app")["connect_args"] == {"prepare_threshold": None}
+
+    connect_args = database.engine_options("postgresql+asyncpg://u:p@db/app")["connect_args"]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    assert "server_settings" not in connect_args
+
+def test_timed_pool_counts_checkouts_and_timeouts():
+    pool = database.TimedQueuePool(creator=MagicMock, pool_size=1, max_overflow=0, timeout=0.05)
+    connection = pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    connection.close()
+    pool.connect().close()
+
+    timer = pool.checkout_timer
+    assert timer.checkouts == 2
+    assert timer.timeouts == 1
+    assert timer.wait_seconds_max >= 0.05
+
+def test_pool_stats_reports_created_engines(monkeypatch):
+    engine = MagicMock()
+    engine.pool = database.TimedQueuePool(creator=MagicMock, pool_size=3, max_overflow=0)
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_async_engine", None)
+    connection = engine.pool.connect()
+
+    stats = database.pool_stats()
+    assert list(stats) == ["sync"]
+    assert stats["sync"]["size"] == 3
+    assert stats["sync"]["in_use"] == 1
+    assert stats["sync"]["checkouts"] == 1
+    connection.close()
@@ -0,0 +1,101 @@
+import json
+import uuid
+from unittest.mock import MagicMock
+
+from app.core import domain_index
+from app.core.domain_index import DOMAIN_CHANNEL, DomainIndex, apply_notification
+from app.core.notifications import STATUS_CHANNEL
+from app.schemas.request import DnsRequestCreate
+
+def _request(record_type, domain, target):
+    return DnsRequestCreate.model_validate({
+        "context": {"account_id": "123456789012"},
+        "resource": {"record_type": record_type, "domain": domain, "target": target}
+    })
+
+def test_cname_cannot_coexist_with_other_records():
+    index = DomainIndex()
+    index.add_record("A", "www.example.com", "192.0.2.1")
+    index.add_pending(uuid.uuid4(), "CNAME", "app.example.com", "lb.example.net")
+
+    assert "CNAME" in index.check("CNAME", "WWW.example.com.", "other.example.net")
+    assert "CNAME" in index.check("A", "app.example.com", "192.0.2.2")
+    assert index.check("A", "www.example.com", "192.0.2.2") is None
+    # Identical to the pending request: left to deduplication
+    assert index.check("CNAME", "app.example.com", "LB.example.net.") is None
+
+def test_exact_duplicate_of_a_record_is_rejected():
+    index = DomainIndex()
+    index.add_record("TXT", "example.com", "v=spf1 -all")
+    assert "already exists" in index.check("TXT", "example.com", "v=spf1 -all")
+    assert index.check("TXT", "example.com", "v=spf1 ~all") is None
+
+def test_owned_zones():
+    index = DomainIndex(["example.com", "internal.example.com"])
+    assert index.owning_zone("a.b.internal.example.com") == "internal.example.com"
+    assert index.owning_zone("example.org") is None
+    assert "not in a zone" in index.check("A", "www.example.org", "192.0.2.1")
+    assert "apex" in index.check("CNAME", "internal.example.com", "lb.example.net")
+    assert index.check("CNAME", "www.example.com", "lb.example.net") is None
+
+def test_check_many_sees_earlier_items_of_the_batch():
+    index = DomainIndex()
+    index.add_record("A", "db.example.com", "192.0.2.1")
+    results = index.check_many([
+        ("CNAME", "www.example.com", "lb.example.net"),
+        ("A", "www.example.com", "192.0.2.2"),
+        ("A", "db.example.com", "192.0.2.1"),
+        ("A", "api.example.com", "192.0.2.3"),
+    ])
+    assert results[0] is None
+    assert "CNAME" in results[1]
+    assert "already exists" in results[2]
+    assert results[3] is None
+
+def test_notifications_keep_the_index_current():
+    index = DomainIndex()
+    completed, failed = str(uuid.uuid4()), str(uuid.uuid4())
+    for request_id, domain in ((completed, "a.example.com"), (failed, "b.example.com")):
+        payload = json.dumps({"request_id": request_id, "record_type": "CNAME", "domain": domain, "target": "lb.example.net"})
+        apply_notification(index, DOMAIN_CHANNEL, payload)
+        # The creating process adds it as well; the second add is a no-op
+        apply_notification(index, DOMAIN_CHANNEL, payload)
+    assert index.size()["pending"] == 2
+
+    apply_notification(index, STATUS_CHANNEL, json.dumps({"request_id": completed, "status": "COMPLETED", "provisioned": True}))
+    apply_notification(index, STATUS_CHANNEL, json.dumps({"request_id": failed, "status": "FAILED"}))
+    apply_notification(index, STATUS_CHANNEL, "not json")
+
+    assert index.size()["pending"] == 0
+    assert "already exists" in index.check("CNAME", "a.example.com", "lb.example.net")
+    assert index.check("A", "b.example.com", "192.0.2.1") is None
+    # The failed request's name was pruned from the trie
+    assert "b" not in index._root.children["com"].children["example"].children
+
+def test_check_conflict_is_skipped_until_loaded(monkeypatch):
+    request = _request("A", "www.example.org", "192.0.2.1")
+    monkeypatch.setattr(domain_index.settings, "DOMAIN_INDEX_ENABLED", True)
+    monkeypatch.setattr(domain_index, "_index", None)
+    assert domain_index.check_conflict(request) is None
+
+    monkeypatch.setattr(domain_index, "_index", DomainIndex(["example.com"]))
+    assert "not in a zone" in domain_index.check_conflict(request)
+    monkeypatch.setattr(domain_index.settings, "DOMAIN_INDEX_ENABLED", False)
+    assert domain_index.check_conflict(request) is None
+
+def test_completed_without_provisioning_is_not_a_record():
+    index = DomainIndex()
+    request_id = str(uuid.uuid4())
+    index.add_pending(request_id, "CNAME", "a.example.com", "lb.example.net")
+    # Set by hand through update_status: no DnsRecord was written
+    apply_notification(index, STATUS_CHANNEL, json.dumps({"request_id": request_id, "status": "COMPLETED"}))
+    assert index.size()["pending"] == 0
+    assert index.check("A", "a.example.com", "192.0.2.1") is None
+
+def test_oversized_announcements_are_skipped(monkeypatch):
+    monkeypatch.setattr(domain_index.settings, "DOMAIN_INDEX_ENABLED", True)
+    db = MagicMock()
+    rows = [(uuid.uuid4(), "TXT", "a.example.com", "x" * 8000), (uuid.uuid4(), "A", "b.example.com", "192.0.2.1")]
+    domain_index.notify_new_requests(db, rows)
+    payloads = db.execute.call_args.args[1]["payloads"]
+    assert [json.loads(payload)["domain"] for payload in payloads] == ["b.example.com"]
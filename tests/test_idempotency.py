@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import api
+from app.core.idempotency import request_fingerprint, request_body_hash, idempotency_row, replay_response
+from app.kafka.consumer import message_idempotency_key
+from app.models.models import IdempotencyKey
+from app.schemas.request import DnsRequestCreate
+
+def _request(**resource):
+    body = {"record_type": "A", "domain": "www.example.com", "target": "192.0.2.1", **resource}
+    return DnsRequestCreate.model_validate({"context": {"account_id": "acct-1"}, "resource": body})
+
+def _stored(request, key="key-1"):
+    response = api._submitted_response(request, api.uuid7())
+    return IdempotencyKey(**idempotency_row("acct-1", key, request_body_hash(request), response))
+
+def test_fingerprint_ignores_case_and_comment():
+    assert request_fingerprint(_request()) == request_fingerprint(_request(domain="WWW.Example.com.", comment="retry"))
+    assert request_fingerprint(_request()) != request_fingerprint(_request(target="192.0.2.2"))
+    assert request_body_hash(_request()) != request_body_hash(_request(comment="retry"))
+
+def test_replay_response_requires_same_body():
+    request = _request()
+    stored = _stored(request)
+    assert replay_response(stored, request_body_hash(request)).context.request_id == stored.request_id
+    assert replay_response(stored, request_body_hash(_request(comment="other"))) is None
+
+def test_stage_replays_stored_response_without_creating_a_request():
+    request = _request()
+    stored = _stored(request)
+    db = MagicMock()
+    with patch.object(api, "find_idempotency_keys", return_value={("acct-1", "key-1"): stored}):
+        response, new_request = api._stage_dns_request(db, request, "key-1")
+    assert new_request is None
+    assert response.context.request_id == stored.request_id
+    db.add.assert_not_called()
+
+def test_stage_rejects_key_reused_for_different_body():
+    stored = _stored(_request())
+    with patch.object(api, "find_idempotency_keys", return_value={("acct-1", "key-1"): stored}):
+        with pytest.raises(HTTPException) as excinfo:
+            api._stage_dns_request(MagicMock(), _request(target="192.0.2.9"), "key-1")
+    assert excinfo.value.status_code == 422
+
+def test_stage_returns_pending_duplicate(monkeypatch):
+    request = _request()
+    existing = api.uuid7()
+    monkeypatch.setattr(api.settings, "DEDUP_PENDING_REQUESTS", True)
+    db = MagicMock()
+    with patch.object(api, "lock_fingerprints") as lock, \
+            patch.object(api, "find_pending_duplicates", return_value={request_fingerprint(request): existing}):
+        response, new_request = api._stage_dns_request(db, request)
+    lock.assert_called_once()
+    assert new_request is None
+    assert response.context.request_id == existing
+    assert response.message == api.DUPLICATE_MESSAGE
+
+def test_kafka_idempotency_key_is_stable_per_offset():
+    assert message_idempotency_key("dns", 3, 42) == "kafka:dns:3:42"
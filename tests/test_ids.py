@@ -0,0 +1,23 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from app.utils.ids import uuid7, uuid7_datetime
+
+
+def test_uuid7_layout():
+    value = uuid7()
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_sorts_by_creation_time():
+    first = uuid7()
+    time.sleep(0.002)
+    second = uuid7()
+    assert first < second
+
+
+def test_uuid7_datetime_round_trip():
+    created = uuid7_datetime(uuid7())
+    assert abs(created - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(seconds=1)
+    assert uuid7_datetime(uuid.uuid4()) is None
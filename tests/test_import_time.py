@@ -0,0 +1,54 @@
+"""
+Import-time budget for app.main. Runs in a fresh interpreter so modules
+already imported by other tests do not hide the cost.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Generous for CI; a regression such as a DB round trip or eager app build lands well above it
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "2.0"))
+
+PROBE = """
+import json, sys, time
+repo = sys.argv[1]
+io_events = []
+
+def audit(event, args):
+    if event in ("socket.connect", "socket.getaddrinfo", "subprocess.Popen", "os.system"):
+        io_events.append(event)
+    elif event == "open" and isinstance(args[0], str) and args[0].startswith(repo) \\
+            and not args[0].endswith((".py", ".pyc")):
+        # Reading configuration files (.env, alembic.ini, ...) is startup work, not import work
+        io_events.append(f"open {args[0]}")
+
+sys.addaudithook(audit)
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+
+from app.core.config import settings
+print(json.dumps({"elapsed": elapsed, "io": io_events, "settings_loaded": settings.is_loaded}))
+"""
+
+def _probe():
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT), "PYTHONDONTWRITEBYTECODE": "1"}
+    # Point CSM at an address that would fail loudly if contacted
+    env.update({"CSM_BASE_URL": "http://192.0.2.1:9", "CSM_API_KEY": "unused"})
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, str(REPO_ROOT)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_app_main_is_side_effect_free_and_fast():
+    report = _probe()
+    assert report["io"] == []
+    assert not report["settings_loaded"]
+    assert report["elapsed"] < IMPORT_BUDGET_SECONDS, f"import app.main took {report['elapsed']:.2f}s"
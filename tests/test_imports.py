@@ -0,0 +1,63 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from app.api.v1 import imports
+from app.api.v1.imports import LineSplitter, copy_line, import_ndjson
+from app.core import domain_index
+from app.core.domain_index import DomainIndex
+
+def _line(**resource):
+    return json.dumps({"record_type": "A", "domain": "www.example.com", "target": "192.0.2.1", **resource}).encode()
+
+def test_line_splitter_joins_chunks_and_drops_long_lines():
+    splitter = LineSplitter(max_bytes=10)
+    lines = splitter.feed(b"abc\nde")
+    lines += splitter.feed(b"f\n" + b"x" * 8)
+    lines += splitter.feed(b"x" * 8)
+    lines += splitter.feed(b"xx\nlast")
+    lines += splitter.finish()
+    assert lines == [(1, b"abc"), (2, b"def"), (3, None), (4, b"last")]
+
+def test_copy_line_escapes_text_format():
+    row = {column: None for column in imports.COPY_COLUMNS}
+    row.update(id="id-1", record_type="TXT", target="a\tb\\c\nd", config={"ttl": 300})
+    fields = copy_line(row).decode().rstrip("\n").split("\t")
+    assert fields[imports.COPY_COLUMNS.index("target")] == "a\\tb\\\\c\\nd"
+    assert fields[imports.COPY_COLUMNS.index("config")] == '{"ttl": 300}'
+    assert fields[imports.COPY_COLUMNS.index("comment")] == "\\N"
+
+def test_import_reports_bad_lines_and_copies_in_chunks(monkeypatch):
+    monkeypatch.setattr(imports.settings, "IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(imports.settings, "DEDUP_PENDING_REQUESTS", False)
+    monkeypatch.setattr(domain_index.settings, "DOMAIN_INDEX_ENABLED", True)
+    monkeypatch.setattr(domain_index, "_index", DomainIndex())
+    body = b"\n".join([
+        _line(domain="a.example.com"),
+        b"{not json",
+        _line(domain="b.example.com", record_type="CNAME", target="lb.example.net"),
+        b"",
+        _line(domain="b.example.com"),
+        _line(domain="c.example.com", target=1),
+    ]) + b"\n"
+    db = MagicMock()
+    with patch.object(imports, "copy_from") as copy_from, patch.object(imports, "publish_provisioning") as publish:
+        # Deliver the body in small pieces, as a request stream would
+        report = import_ndjson((body[i:i + 7] for i in range(0, len(body), 7)), db, "acct-1")
+
+    assert (report.lines, report.accepted, report.rejected, report.aborted) == (5, 2, 3, None)
+    assert [error.line for error in report.errors] == [2, 5, 6]
+    assert "CNAME" in report.errors[1].error
+    # The second chunk held only the conflicting line, so nothing was copied
+    assert copy_from.call_count == 1
+    assert db.commit.call_count == 2
+    assert sum(len(call.args[0]) for call in publish.call_args_list) == 2
+
+def test_import_stops_at_a_failed_chunk(monkeypatch):
+    monkeypatch.setattr(imports.settings, "IMPORT_CHUNK_SIZE", 1)
+    db = MagicMock()
+    with patch.object(imports, "write_import_chunk", side_effect=RuntimeError("connection lost")):
+        report = import_ndjson([_line(domain="a.example.com") + b"\n" + _line(domain="b.example.com")], db, "acct-1")
+    assert report.accepted == 0
+    assert report.lines == 1
+    assert "lines 1-1" in report.aborted
+    db.rollback.assert_called_once()
@@ -0,0 +1,59 @@
+import json
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+from kafka.structs import TopicPartition
+
+from app.kafka import consumer
+
+Record = namedtuple("Record", ["offset", "value"])
+
+TP0 = TopicPartition("dns_requests", 0)
+
+def _payload(domain="www.example.com"):
+    return {"account_id": "acct-1", "record_type": "A", "domain": domain, "target": "192.0.2.1"}
+
+def _consumer():
+    kafka = MagicMock()
+    kafka.highwater.return_value = None
+    return kafka
+
+def _message(offset, payload):
+    value = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    return Record(offset=offset, value=value)
+
+def test_parse_batch_skips_messages_that_are_not_objects():
+    batches = {TP0: [
+        _message(0, [1, 2]),
+        _message(1, "x"),
+        _message(2, b"{broken"),
+        _message(3, _payload()),
+    ]}
+    dns_requests, keys = consumer._parse_batch(batches)
+    assert [request.resource.domain for request in dns_requests] == ["www.example.com"]
+    assert keys == [consumer.message_idempotency_key("dns_requests", 0, 3)]
+
+def test_ingest_batch_writes_valid_messages_and_commits():
+    kafka = _consumer()
+    batches = {TP0: [_message(10, _payload("a.example.com")), _message(11, b"{broken"), _message(12, _payload("b.example.com"))]}
+    with patch.object(consumer, "SessionLocal") as session, patch("app.api.v1.api.create_dns_requests_bulk") as bulk:
+        assert consumer.ingest_batch(kafka, batches) is True
+
+    dns_requests, db, keys = bulk.call_args.args
+    assert [request.resource.domain for request in dns_requests] == ["a.example.com", "b.example.com"]
+    assert keys == [consumer.message_idempotency_key("dns_requests", 0, offset) for offset in (10, 12)]
+    assert db is session.return_value
+    kafka.commit.assert_called_once()
+    kafka.seek.assert_not_called()
+    db.close.assert_called_once()
+
+def test_ingest_batch_rewinds_without_committing_on_failure():
+    kafka = _consumer()
+    batches = {TP0: [_message(10, _payload()), _message(11, _payload("b.example.com"))]}
+    with patch.object(consumer, "SessionLocal") as session, \
+            patch("app.api.v1.api.create_dns_requests_bulk", side_effect=RuntimeError("database is down")):
+        assert consumer.ingest_batch(kafka, batches) is False
+
+    kafka.commit.assert_not_called()
+    kafka.seek.assert_called_once_with(TP0, 10)
+    session.return_value.rollback.assert_called_once()
@@ -0,0 +1,87 @@
+import asyncio
+from collections import namedtuple
+from unittest.mock import MagicMock
+
+from kafka.structs import TopicPartition
+from app.kafka.forwarder import PartitionOffsetTracker, _RebalanceListener, _forward_message
+
+Record = namedtuple("Record", ["offset", "value"])
+
+TP0 = TopicPartition("dns_requests", 0)
+TP1 = TopicPartition("dns_requests", 1)
+
+
+def test_commit_waits_for_earlier_offsets():
+    tracker = PartitionOffsetTracker()
+    for offset in (10, 11, 12):
+        tracker.track(TP0, offset)
+
+    tracker.complete(TP0, 12)
+    assert tracker.committable() == {}
+
+    tracker.complete(TP0, 10)
+    assert tracker.committable() == {TP0: 11}
+
+    tracker.complete(TP0, 11)
+    assert tracker.committable() == {TP0: 13}
+    assert tracker.in_flight == 0
+
+
+def test_partitions_advance_independently():
+    tracker = PartitionOffsetTracker()
+    tracker.track(TP0, 0)
+    tracker.track(TP1, 5)
+    tracker.track(TP1, 6)
+
+    tracker.complete(TP1, 5)
+    assert tracker.committable() == {TP1: 6}
+    assert tracker.in_flight == 2
+
+
+def test_duplicate_completion_is_ignored():
+    tracker = PartitionOffsetTracker()
+    tracker.track(TP0, 1)
+    tracker.complete(TP0, 1)
+    tracker.complete(TP0, 1)
+    assert tracker.in_flight == 0
+
+
+def test_forget_drops_revoked_partitions():
+    tracker = PartitionOffsetTracker()
+    tracker.track(TP0, 1)
+    tracker.track(TP1, 7)
+    tracker.forget([TP0])
+    assert tracker.in_flight == 1
+
+    # A forward that was running for the revoked partition finishes later
+    tracker.complete(TP0, 1)
+    assert tracker.in_flight == 1
+    assert tracker.committable() == {}
+
+
+def test_message_that_is_not_an_object_still_completes():
+    tracker = PartitionOffsetTracker()
+    tracker.track(TP0, 3)
+    message = Record(offset=3, value=b"[1, 2]")
+    client = MagicMock()
+    asyncio.run(_forward_message(client, tracker, TP0, message))
+    client.post.assert_not_called()
+    assert tracker.committable() == {TP0: 4}
+
+
+def test_revoke_commits_completed_offsets_and_forgets_partitions():
+    tracker = PartitionOffsetTracker()
+    tracker.track(TP0, 5)
+    tracker.track(TP0, 6)
+    tracker.complete(TP0, 5)
+    consumer = MagicMock()
+    listener = _RebalanceListener(consumer, tracker)
+
+    listener.on_partitions_revoked([TP0])
+    assert list(consumer.commit.call_args.kwargs["offsets"]) == [TP0]
+    assert consumer.commit.call_args.kwargs["offsets"][TP0].offset == 6
+    assert tracker.in_flight == 0
+
+    listener.paused = True
+    listener.on_partitions_assigned([TP1])
+    consumer.pause.assert_called_once_with(TP1)
@@ -0,0 +1,38 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.common.pagination import encode_cursor, decode_cursor
+from app.api.v1.api import _domain_conditions
+from app.models.models import DnsRequest
+
+def _compile(condition):
+    compiled = condition.compile(dialect=postgresql.dialect())
+    return compiled.string, sorted(compiled.params.values())
+
+def test_cursor_round_trip():
+    created = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(created, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created, row_id)
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "eyJ0IjoiIn0"])
+def test_decode_cursor_rejects_malformed_input(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_domain_suffix_matches_on_label_boundary():
+    (condition,) = _domain_conditions(DnsRequest.domain, None, "Example.COM.", None)
+    sql, params = _compile(condition)
+    assert "lower(dns_requests.domain) = " in sql
+    assert "reverse(lower(dns_requests.domain)) LIKE " in sql
+    assert params == ["example.com", "moc.elpmaxe.%"]
+
+def test_domain_contains_escapes_wildcards():
+    (condition,) = _domain_conditions(DnsRequest.domain, None, None, "a_b%")
+    sql, params = _compile(condition)
+    assert "ESCAPE" in sql
+    assert params == ["%a\\_b\\%%"]
@@ -0,0 +1,85 @@
+import json
+import logging
+import queue
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import logging as app_logging
+from app.core.logging import (
+    JsonFormatter, LogContextMiddleware, NonBlockingQueueHandler, RateLimitFilter, SamplingFilter,
+    _parse_sample_rates, log_context
+)
+
+def _record(msg="hello %s", args=("world",), name="app.test", level=logging.INFO, lineno=10):
+    return logging.LogRecord(name, level, __file__, lineno, msg, args, None)
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.handle(_record())
+    assert handler.queue.qsize() == 1
+    assert handler.take_dropped() == 2
+    assert handler.take_dropped() == 0
+
+def test_context_is_captured_in_the_calling_thread():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    with log_context(request_id="r-1", account_id="acct"):
+        handler.handle(_record())
+    queued = handler.queue.get_nowait()
+
+    # Formatted later, outside the context, as the listener thread would
+    output = json.loads(JsonFormatter().format(queued))
+    assert output["message"] == "hello world"
+    assert output["request_id"] == "r-1"
+    assert output["account_id"] == "acct"
+
+def test_only_mutable_arguments_are_formatted_eagerly():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    handler.handle(_record())
+    payload = {"domain": "a.example.com"}
+    handler.handle(_record(msg="payload %s", args=(payload,)))
+    payload["domain"] = "changed.example.com"
+
+    lazy, eager = handler.queue.get_nowait(), handler.queue.get_nowait()
+    assert lazy.args == ("world",)
+    assert eager.args is None
+    assert eager.getMessage() == "payload {'domain': 'a.example.com'}"
+
+def test_rate_limit_is_per_call_site_and_reports_suppressed(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(app_logging.time, "monotonic", lambda: clock[0])
+    limit = RateLimitFilter(per_second=2)
+
+    passed = [limit.filter(_record()) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert limit.filter(_record(lineno=11))
+    assert limit.filter(_record(level=logging.ERROR))
+
+    clock[0] += 1.0
+    record = _record()
+    assert limit.filter(record)
+    assert record.suppressed == 3
+
+def test_sampling_uses_most_specific_prefix_and_keeps_warnings():
+    sampling = SamplingFilter(_parse_sample_rates("app=1.0, app.kafka=0"))
+    assert not sampling.filter(_record(name="app.kafka.consumer"))
+    assert sampling.filter(_record(name="app.kafka.consumer", level=logging.WARNING))
+    assert sampling.filter(_record(name="app.api.v1.api"))
+
+def test_route_field_is_the_route_template():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: str):
+        handler.handle(_record())
+        return {}
+
+    app.add_middleware(LogContextMiddleware)
+    TestClient(app).get("/items/abc-123")
+
+    output = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+    assert output["method"] == "GET"
+    assert output["route"] == "/items/{item_id}"
+    assert "path" not in output
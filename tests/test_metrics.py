@@ -0,0 +1,53 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.core import database, metrics
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_middleware_labels_requests_by_route_template():
+    router = APIRouter(prefix="/dns")
+
+    @router.get("/{request_id}")
+    def get_request(request_id: str):
+        return {"id": request_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v9")
+    app.add_middleware(metrics.MetricsMiddleware)
+    client = TestClient(app)
+
+    labels = {"method": "GET", "route": "/api/v9/dns/{request_id}", "status": "200"}
+    before = _sample("dns_http_request_duration_seconds_count", **labels)
+    client.get("/api/v9/dns/abc")
+    client.get("/api/v9/dns/def")
+    assert _sample("dns_http_request_duration_seconds_count", **labels) == before + 2
+
+    unmatched = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = _sample("dns_http_request_duration_seconds_count", **unmatched)
+    client.get("/nowhere")
+    assert _sample("dns_http_request_duration_seconds_count", **unmatched) == before + 1
+
+def test_engine_instrumentation_times_statements_and_pool_use():
+    engine = create_engine("sqlite://", poolclass=database.TimedQueuePool, pool_size=1, max_overflow=0)
+    metrics.instrument_engine(engine, "test")
+    # dispose() swaps in a new pool, which must keep reporting checkout waits
+    engine.dispose()
+
+    with engine.connect() as conn:
+        assert _sample("dns_db_pool_connections_in_use", engine="test") == 1
+        conn.execute(text("SELECT 1"))
+    assert _sample("dns_db_pool_connections_in_use", engine="test") == 0
+    assert _sample("dns_db_query_duration_seconds_count", engine="test", operation="select") == 1
+    assert _sample("dns_db_pool_checkout_wait_seconds_count", engine="test") == 1
+
+def test_metrics_endpoint_renders_text_format():
+    from app.main import create_app
+
+    response = TestClient(create_app()).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "dns_http_request_duration_seconds" in response.text
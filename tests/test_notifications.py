@@ -0,0 +1,121 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1 import api
+from app.core import notifications
+from app.core.notifications import StatusBroadcaster, STATUS_CHANNEL
+from app.core.status_cache import StatusSnapshot
+from app.utils.ids import uuid7
+
+
+def _broadcaster(queue_size=100):
+    broadcaster = StatusBroadcaster("postgresql://unused", queue_size=queue_size)
+
+    async def connected():
+        pass
+
+    # No database here: notifications are injected directly
+    broadcaster._ensure_connected = connected
+    return broadcaster
+
+
+def _notify(broadcaster, request_id, status):
+    payload = json.dumps({"request_id": str(request_id), "status": status})
+    broadcaster._on_notify(None, 1, STATUS_CHANNEL, payload)
+
+
+def test_notifications_fan_out_to_matching_subscribers():
+    async def run():
+        broadcaster = _broadcaster()
+        first, second = uuid.uuid4(), uuid.uuid4()
+        queue_a = await broadcaster.subscribe([first])
+        queue_b = await broadcaster.subscribe([first, second])
+
+        _notify(broadcaster, second, "COMPLETED")
+        assert queue_a.empty()
+        assert (await queue_b.get())["status"] == "COMPLETED"
+
+        broadcaster.unsubscribe(queue_a, [first])
+        broadcaster.unsubscribe(queue_b, [first, second])
+        assert not broadcaster._subscribers
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_keeps_latest_updates():
+    async def run():
+        broadcaster = _broadcaster(queue_size=2)
+        request_id = uuid.uuid4()
+        queue = await broadcaster.subscribe([request_id])
+        for status in ("PENDING", "RUNNING", "COMPLETED"):
+            _notify(broadcaster, request_id, status)
+        assert [(await queue.get())["status"] for _ in range(2)] == ["RUNNING", "COMPLETED"]
+
+    asyncio.run(run())
+
+
+class _Session:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        result = MagicMock()
+        result.all.return_value = self.rows
+        return result
+
+
+def test_reconnect_publishes_current_status_of_subscribed_requests(monkeypatch):
+    async def run():
+        broadcaster = _broadcaster()
+        request_id = uuid7()
+        queue = await broadcaster.subscribe([request_id])
+        session = _Session([SimpleNamespace(id=request_id, status="COMPLETED")])
+        monkeypatch.setattr(notifications, "AsyncSessionLocal", lambda: session)
+        monkeypatch.setattr(notifications, "RECONNECT_DELAY", 0)
+        local = MagicMock()
+        monkeypatch.setattr(notifications.status_cache, "local", local)
+
+        await broadcaster._reconnect()
+
+        (statement,) = session.statements
+        # The lookup is bounded by creation time, so partitions are pruned
+        assert "dns_requests.created_at >=" in str(statement.compile(dialect=postgresql.dialect()))
+        assert (await queue.get()) == {"request_id": str(request_id), "status": "COMPLETED"}
+        local.clear.assert_called_once()
+
+    asyncio.run(run())
+
+
+def test_stream_skips_republished_statuses(monkeypatch):
+    request_id = uuid.uuid4()
+    queue = asyncio.Queue()
+    # After a reconnect the current status is republished, even if unchanged
+    queue.put_nowait({"request_id": str(request_id), "status": "PENDING"})
+    queue.put_nowait({"request_id": str(request_id), "status": "COMPLETED"})
+    broadcaster = MagicMock()
+    broadcaster.subscribe = AsyncMock(return_value=queue)
+    monkeypatch.setattr(api, "status_broadcaster", broadcaster)
+    monkeypatch.setattr(api, "AsyncReadSessionLocal", MagicMock())
+    snapshot = StatusSnapshot(id=request_id, status="PENDING", updated_at=None)
+    monkeypatch.setattr(api, "get_dns_request_status_snapshot_logic_async", AsyncMock(return_value=snapshot))
+
+    async def run():
+        return [event async for event in api.stream_dns_request_status_logic([request_id], AsyncMock(return_value=False))]
+
+    events = asyncio.run(run())
+    assert len(events) == 2
+    assert '"PENDING"' in events[0] and '"COMPLETED"' in events[1]
+    broadcaster.unsubscribe.assert_called_once_with(queue, [request_id])
@@ -0,0 +1,60 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.celery import outbox
+
+def _session_with_rows(rows):
+    db = MagicMock()
+    db.execute.return_value.all.return_value = rows
+    return db
+
+def _statement_sql(db, call_index):
+    statement = db.execute.call_args_list[call_index].args[0]
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+def test_stage_and_publish_follow_dispatch_mode(monkeypatch):
+    request_id = uuid.uuid4()
+    db = MagicMock()
+    with patch.object(outbox, "enqueue_provisioning") as enqueue:
+        monkeypatch.setattr(outbox.settings, "TASK_DISPATCH_MODE", "outbox")
+        outbox.stage_provisioning(db, [request_id])
+        outbox.publish_provisioning([request_id])
+        assert db.execute.call_args.args[1] == [{"request_id": request_id}]
+        enqueue.assert_not_called()
+
+        db.reset_mock()
+        monkeypatch.setattr(outbox.settings, "TASK_DISPATCH_MODE", "direct")
+        outbox.stage_provisioning(db, [request_id])
+        outbox.publish_provisioning([request_id])
+        db.execute.assert_not_called()
+        enqueue.assert_called_once_with([str(request_id)])
+
+def test_relay_claims_with_skip_locked_and_deletes_published_rows():
+    rows = [SimpleNamespace(id=1, request_id=uuid.uuid4()), SimpleNamespace(id=2, request_id=uuid.uuid4())]
+    db = _session_with_rows(rows)
+    with patch.object(outbox, "SessionLocal", return_value=db), \
+            patch.object(outbox, "enqueue_provisioning") as enqueue:
+        assert outbox.relay_outbox_batch(10) == 2
+    assert "FOR UPDATE SKIP LOCKED" in _statement_sql(db, 0)
+    enqueue.assert_called_once_with([str(row.request_id) for row in rows])
+    assert _statement_sql(db, 1).startswith("DELETE FROM task_outbox")
+    db.commit.assert_called_once()
+
+def test_relay_backs_off_when_publish_fails():
+    db = _session_with_rows([SimpleNamespace(id=1, request_id=uuid.uuid4())])
+    with patch.object(outbox, "SessionLocal", return_value=db), \
+            patch.object(outbox, "enqueue_provisioning", side_effect=ConnectionError("broker down")):
+        assert outbox.relay_outbox_batch(10) == 0
+    assert _statement_sql(db, 1).startswith("UPDATE task_outbox")
+    db.commit.assert_called_once()
+
+def test_relay_is_idle_on_empty_outbox():
+    db = _session_with_rows([])
+    with patch.object(outbox, "SessionLocal", return_value=db), \
+            patch.object(outbox, "enqueue_provisioning") as enqueue:
+        assert outbox.relay_outbox_batch(10) == 0
+    enqueue.assert_not_called()
+    db.commit.assert_not_called()
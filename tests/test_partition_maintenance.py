@@ -0,0 +1,80 @@
+import gzip
+import io
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.celery import maintenance
+from app.celery.maintenance import partition_month, retention_cutoff
+from app.models.models import DnsRequest
+from app.utils.ids import uuid7
+from app.utils.pgcopy import copy_to, copy_from
+
+def test_partition_month_parses_partition_names():
+    assert partition_month("dns_requests_p202401") == date(2024, 1, 1)
+    assert partition_month("dns_requests_default") is None
+    assert partition_month("dns_requests_p2024") is None
+
+def test_retention_cutoff_crosses_year_boundary():
+    assert retention_cutoff(date(2024, 3, 15), 12) == date(2023, 3, 1)
+    assert retention_cutoff(date(2024, 3, 15), 3) == date(2023, 12, 1)
+    assert retention_cutoff(date(2024, 3, 1), 0) == date(2024, 3, 1)
+
+def test_id_clause_bounds_created_at_for_uuid7():
+    request_id = uuid7()
+    sql = str(DnsRequest.id_clause(request_id).compile())
+    assert "created_at >=" in sql and "created_at <" in sql
+
+    legacy = str(DnsRequest.id_clause(uuid.uuid4()).compile())
+    assert "created_at" not in legacy
+
+class _Psycopg2Cursor:
+    def __init__(self):
+        self.received = b""
+
+    def copy_expert(self, sql, file):
+        if "TO STDOUT" in sql:
+            file.write("id,domain\n1,example.com\n")
+        else:
+            while True:
+                chunk = file.read(4)
+                if not chunk:
+                    break
+                self.received += chunk
+
+    def close(self):
+        pass
+
+class _Connection:
+    def __init__(self):
+        self.cursor_obj = _Psycopg2Cursor()
+
+    def cursor(self):
+        return self.cursor_obj
+
+def test_copy_helpers_bridge_psycopg2_text_and_iterables():
+    conn = _Connection()
+    buffer = io.BytesIO()
+    with gzip.GzipFile(mode="wb", fileobj=buffer) as output:
+        copy_to(conn, "COPY t TO STDOUT", output)
+    assert gzip.decompress(buffer.getvalue()) == b"id,domain\n1,example.com\n"
+
+    copy_from(conn, "COPY t FROM STDIN", iter([b"abc", b"defgh", b"i"]))
+    assert conn.cursor_obj.received == b"abcdefghi"
+
+def test_requeue_stale_requests_reenqueues_claimed_requests():
+    stale = [uuid7(), uuid7()]
+    db = MagicMock()
+    db.execute.return_value = [SimpleNamespace(id=request_id) for request_id in stale]
+    with patch.object(maintenance, "SessionLocal", return_value=db), \
+            patch.object(maintenance, "record_events") as events, \
+            patch.object(maintenance, "stage_provisioning") as stage, \
+            patch.object(maintenance, "publish_provisioning") as publish:
+        assert maintenance.requeue_stale_requests(stale_after_seconds=60, limit=10) == 2
+
+    assert db.execute.call_args.args[1] == {"stale_after": 60, "limit": 10}
+    assert [event[0] for event in events.call_args.args[1]] == stale
+    stage.assert_called_once_with(db, stale)
+    db.commit.assert_called_once()
+    publish.assert_called_once_with(stale)
@@ -0,0 +1,125 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy.sql.dml import Insert, Update
+
+from app.celery import tasks
+from app.celery.provisioning import FakeExecutor, SubprocessExecutor, ProvisioningJob, ProvisioningResult
+from app.utils.ids import uuid7
+
+
+def _run(executor, count=1):
+    results = []
+    done = threading.Semaphore(0)
+
+    def on_complete(result):
+        results.append(result)
+        done.release()
+
+    for i in range(count):
+        executor.submit(ProvisioningJob(job_id=str(i), records=[{"domain": "example.com"}]), on_complete)
+    for _ in range(count):
+        assert done.acquire(timeout=10)
+    return results
+
+
+def test_fake_executor_runs_jobs_concurrently():
+    executor = FakeExecutor(latency=0.2, max_in_flight=100, callback_threads=2)
+    results = _run(executor, count=50)
+    assert all(r.success for r in results)
+    # 50 runs of 0.2s each finish in about one latency, not 50
+    assert max(r.duration for r in results) < 2
+    assert executor.in_flight == 0
+
+
+def test_fake_executor_failure_rate():
+    executor = FakeExecutor(latency=0, failure_rate=1.0, max_in_flight=10, callback_threads=1)
+    assert not _run(executor)[0].success
+
+
+def test_subprocess_executor_reports_exit_status(tmp_path):
+    script = tmp_path / "playbook.sh"
+    script.write_text('echo "applying $2"\n')
+
+    ok = SubprocessExecutor(command="sh", playbook=str(script), timeout=10, max_in_flight=2, callback_threads=1)
+    assert _run(ok)[0].success
+
+    failing_script = tmp_path / "failing.sh"
+    failing_script.write_text('echo "zone not found"; exit 3\n')
+    failing = SubprocessExecutor(command="sh", playbook=str(failing_script), timeout=10, max_in_flight=2, callback_threads=1)
+    result = _run(failing)[0]
+    assert not result.success
+    assert "exit code 3" in result.message
+    assert "zone not found" in result.message
+
+
+def test_subprocess_executor_reports_failed_records(tmp_path):
+    # The vars file is passed as "-e @path"; results go next to it
+    script = tmp_path / "partial.sh"
+    script.write_text('printf \'{"r2": "zone not found"}\' > "${2#@}.results"; exit 2\n')
+    executor = SubprocessExecutor(command="sh", playbook=str(script), timeout=10, max_in_flight=2, callback_threads=1)
+    result = _run(executor)[0]
+    assert result.success
+    assert result.failed == {"r2": "zone not found"}
+    assert "1 failed records" in result.message
+    assert not list(tmp_path.glob("*.results"))
+
+
+def _finalize(success, pending_rows, failed=None, request_ids=None):
+    """
+    Run finalize_dns_requests against a mock session whose guarded UPDATE
+    returns the pending_rows among the requests it updates. Returns the
+    session, the statuses it set and the notify mock.
+    """
+    db = MagicMock()
+    statuses = []
+
+    def execute(statement, *args):
+        if isinstance(statement, Update):
+            params = statement.compile().params
+            statuses.append(params["status"])
+            rows = [row for row in pending_rows if row.id in params.values()]
+            return MagicMock(all=MagicMock(return_value=rows))
+        return MagicMock()
+
+    db.execute.side_effect = execute
+    result = ProvisioningResult(job=ProvisioningJob(job_id="j", records=[]), success=success, message="done", failed=failed or {})
+    with patch.object(tasks, "SessionLocal", return_value=db), \
+            patch.object(tasks, "notify_status_change") as notify, \
+            patch.object(tasks, "record_events"), \
+            patch.object(tasks, "status_cache"):
+        tasks.finalize_dns_requests(request_ids or [row.id for row in pending_rows] or [uuid7()], result)
+    return db, statuses, notify
+
+
+def test_finalize_skips_requests_finalized_by_another_run():
+    db, statuses, notify = _finalize(success=True, pending_rows=[])
+    assert statuses == ["COMPLETED"]
+    assert not any(isinstance(call.args[0], Insert) for call in db.execute.call_args_list)
+    db.rollback.assert_not_called()
+    notify.assert_not_called()
+
+
+def test_finalize_marks_failed_only_when_the_run_failed():
+    row = SimpleNamespace(id=uuid7())
+    db, statuses, notify = _finalize(success=False, pending_rows=[row])
+    assert statuses == ["FAILED"]
+    notify.assert_called_once_with(db, row.id, "FAILED")
+
+
+def test_finalize_fails_only_the_records_the_run_reported():
+    ok, bad = SimpleNamespace(id=uuid7(), account_id="1", record_type="A", domain="a.example.com", target="192.0.2.1", comment=None), SimpleNamespace(id=uuid7())
+    db, statuses, notify = _finalize(success=True, pending_rows=[ok, bad], failed={str(bad.id): "zone not found"})
+    assert statuses == ["FAILED", "COMPLETED"]
+    assert {call.args[1:3] for call in notify.call_args_list} == {(bad.id, "FAILED"), (ok.id, "COMPLETED")}
+    inserts = [call.args[1] for call in db.execute.call_args_list if isinstance(call.args[0], Insert)]
+    assert [[values["request_id"] for values in rows] for rows in inserts] == [[ok.id]]
+
+
+def test_finish_pending_is_pruned_to_the_request_partitions():
+    db = MagicMock()
+    tasks._finish_pending(db, [uuid7(), uuid7()], "COMPLETED")
+    sql = str(db.execute.call_args.args[0].compile())
+    assert sql.count("created_at >=") == 2
+    assert tasks._finish_pending(db, [], "FAILED") == []
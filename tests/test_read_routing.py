@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+import uuid
+
+import pytest
+
+from app.api.v1 import api
+from app.core import database, read_routing
+from app.utils.cache import TTLCache
+from app.utils.ids import uuid7, uuid7_datetime
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(database.settings, "DATABASE_READ_URL", "postgresql://u:p@replica/app")
+    monkeypatch.setattr(database.settings, "READ_YOUR_WRITES_WINDOW_SECONDS", 5.0)
+    monkeypatch.setattr(read_routing, "_recent_writes", TTLCache(maxsize=100, ttl=5.0))
+
+def test_without_replica_reads_stay_on_the_read_session(monkeypatch):
+    monkeypatch.setattr(database.settings, "DATABASE_READ_URL", None)
+    primary = object()
+    monkeypatch.setattr(database, "get_engine", lambda: primary)
+    assert database.get_read_engine() is primary
+    assert not read_routing.read_from_primary(uuid7())
+    assert read_routing.replica_status() == {"replica": False, "lag_seconds": None}
+
+def test_recently_created_requests_read_from_primary(replica):
+    request_id = uuid7()
+    created = uuid7_datetime(request_id)
+    assert read_routing.read_from_primary(request_id, now=created + timedelta(seconds=1))
+    assert not read_routing.read_from_primary(request_id, now=created + timedelta(seconds=6))
+    # UUIDv4 IDs carry no creation time
+    assert not read_routing.read_from_primary(uuid.uuid4())
+
+def test_recently_updated_requests_read_from_primary(replica):
+    request_id = uuid.uuid4()
+    read_routing.mark_written(str(request_id))
+    assert read_routing.read_from_primary(request_id, now=datetime(2030, 1, 1))
+
+def _session_returning(row):
+    session = MagicMock()
+    session.execute.return_value.first.return_value = row
+    session.__enter__.return_value = session
+    return session
+
+def test_status_missing_on_replica_falls_back_to_primary(replica, monkeypatch):
+    request_id = uuid.uuid4()
+    row = SimpleNamespace(id=request_id, status="PENDING", updated_at=None)
+    replica_session = _session_returning(None)
+    primary_session = _session_returning(row)
+    monkeypatch.setattr(api, "SessionLocal", lambda: primary_session)
+    cache = MagicMock()
+    cache.read.return_value = (None, "3")
+    monkeypatch.setattr(api, "status_cache", cache)
+
+    snapshot = api.get_dns_request_status_snapshot_logic(request_id=request_id, db=replica_session)
+
+    assert snapshot.status == "PENDING"
+    replica_session.execute.assert_called_once()
+    primary_session.execute.assert_called_once()
+    # Read from the primary, so it may go to the shared cache tier
+    cache.set.assert_called_once_with(snapshot, shared=True, generation="3")
+
+def test_status_found_on_replica_is_cached_locally_only(replica, monkeypatch):
+    request_id = uuid.uuid4()
+    replica_session = _session_returning(SimpleNamespace(id=request_id, status="COMPLETED", updated_at=None))
+    monkeypatch.setattr(api, "SessionLocal", MagicMock(side_effect=AssertionError("primary not expected")))
+    cache = MagicMock()
+    cache.read.return_value = (None, "3")
+    monkeypatch.setattr(api, "status_cache", cache)
+
+    snapshot = api.get_dns_request_status_snapshot_logic(request_id=request_id, db=replica_session)
+
+    assert snapshot.status == "COMPLETED"
+    cache.set.assert_called_once_with(snapshot, shared=False, generation="3")
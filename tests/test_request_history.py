@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import BigInteger, create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import api
+from app.core.database import get_read_db
+from app.core.request_events import record_event, record_events
+from app.models.models import DnsRequestEvent
+from app.routes.v1.routes import router
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_bigint(type_, compiler, **kw):
+    # SQLite only generates IDs for INTEGER PRIMARY KEY columns
+    return "INTEGER"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(api.settings, "DATABASE_READ_URL", None)
+    # dns_request_events uses no Postgres-only types, so SQLite can hold it. The
+    # route handler runs in another thread, so everything shares one connection
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    DnsRequestEvent.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _client(db):
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[get_read_db] = lambda: db
+    return TestClient(app)
+
+
+def test_events_are_appended_in_order(db):
+    request_id, other_id = uuid.uuid4(), uuid.uuid4()
+    record_event(db, request_id, "INFO", "received")
+    record_events(db, [(other_id, "INFO", "received"), (request_id, "PENDING", "queued"), (request_id, "COMPLETED", "done")])
+    db.commit()
+
+    history = api.get_dns_request_history_logic(request_id=request_id, db=db)
+    assert [(event.status, event.message) for event in history.events] == [
+        ("INFO", "received"), ("PENDING", "queued"), ("COMPLETED", "done")
+    ]
+    assert [event.id for event in history.events] == sorted(event.id for event in history.events)
+    assert history.next_after is None
+
+
+def test_record_events_without_rows_writes_nothing():
+    session = MagicMock()
+    record_events(session, [])
+    session.execute.assert_not_called()
+
+
+def test_history_pages_follow_next_after(db):
+    request_id, other_id = uuid.uuid4(), uuid.uuid4()
+    for number in range(5):
+        # Another request's events are interleaved with this one's
+        record_events(db, [(request_id, "INFO", f"event {number}"), (other_id, "INFO", f"other {number}")])
+    db.commit()
+    client = _client(db)
+
+    messages, after, pages = [], None, 0
+    while True:
+        params = {"limit": 2} if after is None else {"limit": 2, "after": after}
+        response = client.get(f"/api/v1/{request_id}/events", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        pages += 1
+        messages += [event["message"] for event in page["events"]]
+        after = page["next_after"]
+        if after is None:
+            break
+        assert after == page["events"][-1]["id"]
+
+    assert pages == 3
+    assert messages == [f"event {number}" for number in range(5)]
+
+    # Past the last event is an empty page, not a 404
+    last = client.get(f"/api/v1/{request_id}/events", params={"after": 10**6}).json()
+    assert last["events"] == [] and last["next_after"] is None
+
+
+def test_history_limit_is_bounded(db):
+    client = _client(db)
+    assert client.get(f"/api/v1/{uuid.uuid4()}/events", params={"limit": 501}).status_code == 422
+    assert client.get(f"/api/v1/{uuid.uuid4()}/events", params={"limit": 0}).status_code == 422
+
+
+def _session_with_request(exists):
+    session = MagicMock()
+    query = session.query.return_value.filter.return_value
+    query.order_by.return_value.limit.return_value.all.return_value = []
+    query.first.return_value = (uuid.uuid4(),) if exists else None
+    return session
+
+
+def test_history_of_unknown_request_is_404(monkeypatch):
+    monkeypatch.setattr(api.settings, "DATABASE_READ_URL", None)
+    client = _client(_session_with_request(exists=False))
+    assert client.get(f"/api/v1/{uuid.uuid4()}/events").status_code == 404
+
+
+def test_request_without_events_has_empty_history(monkeypatch):
+    monkeypatch.setattr(api.settings, "DATABASE_READ_URL", None)
+    client = _client(_session_with_request(exists=True))
+    response = client.get(f"/api/v1/{uuid.uuid4()}/events")
+    assert response.status_code == 200
+    assert response.json()["events"] == []
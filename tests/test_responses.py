@@ -0,0 +1,41 @@
+import json
+import uuid
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.api.common import responses
+from app.api.common.responses import FastJSONResponse, trusted_response
+from app.api.v1.api import build_status_response
+from app.core.status_cache import StatusSnapshot
+from app.routes.v1.routes import _conditional_status_response
+
+def _snapshot():
+    return StatusSnapshot(id=uuid.uuid4(), status="COMPLETED", updated_at="2024-01-01T00:00:00+00:00")
+
+def test_trusted_response_matches_the_model_json():
+    model = build_status_response(_snapshot())
+    response = trusted_response(model, headers={"ETag": '"abc"'})
+
+    assert isinstance(response, Response)
+    assert response.media_type == "application/json"
+    assert response.headers["etag"] == '"abc"'
+    assert json.loads(response.body) == model.model_dump(mode="json")
+
+def test_trusted_response_returns_the_model_when_disabled(monkeypatch):
+    monkeypatch.setattr(responses.settings, "FAST_RESPONSES_ENABLED", False)
+    model = build_status_response(_snapshot())
+    assert trusted_response(model) is model
+
+def test_status_response_carries_etag_headers():
+    snapshot = _snapshot()
+    response = _conditional_status_response(snapshot, Response(), None)
+    assert response.headers["etag"] == snapshot.etag
+    assert response.headers["cache-control"] == "no-cache"
+
+    not_modified = _conditional_status_response(snapshot, Response(), snapshot.etag)
+    assert not_modified.status_code == 304
+
+def test_fast_json_response_renders_like_json_response():
+    content = {"status": "healthy", "pools": {"sync": {"in_use": 1}}, "note": "ünïcode"}
+    assert FastJSONResponse(content).body == JSONResponse(content).body
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import time
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from app.core.security import SSOAuth
+
+
+def _mock_sso(calls, exp=None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("/validate"):
+            return httpx.Response(200, json={"sub": "user-1", "exp": exp or time.time() + 3600})
+        return httpx.Response(200, json={"email": "user@example.com", "role": "admin"})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_concurrent_lookups_share_one_validation():
+    calls = []
+    auth = SSOAuth()
+    auth._client = _mock_sso(calls)
+
+    async def run():
+        return await asyncio.gather(*(auth.authenticate("token-a") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert sorted(calls) == ["/userinfo", "/validate"]
+    assert all(r["user_info"]["email"] == "user@example.com" for r in results)
+    assert auth.cache_stats()["single_flight_joins"] == 4
+
+
+def test_cached_token_skips_sso_provider():
+    calls = []
+    auth = SSOAuth()
+    auth._client = _mock_sso(calls)
+
+    asyncio.run(auth.authenticate("token-a"))
+    user_data = asyncio.run(auth.authenticate("token-a"))
+    assert len(calls) == 2
+    assert user_data["token"] == "token-a"
+    assert auth.cache_stats()["hits"] == 1
+
+
+def test_expired_token_is_not_cached():
+    calls = []
+    auth = SSOAuth()
+    auth._client = _mock_sso(calls, exp=time.time() - 1)
+
+    asyncio.run(auth.authenticate("token-a"))
+    asyncio.run(auth.authenticate("token-a"))
+    assert len(calls) == 4
+
+
+def _local_auth(tmp_path, monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": "test-key", "alg": "RS256", "use": "sig"})
+    jwks_path = tmp_path / "jwks.json"
+    jwks_path.write_text(json.dumps({"keys": [jwk]}))
+
+    monkeypatch.setenv("SSO_VALIDATION_MODE", "local")
+    monkeypatch.setenv("SSO_JWKS_URL", f"file://{jwks_path}")
+    monkeypatch.setenv("SSO_JWT_ISSUER", "https://sso.test")
+    monkeypatch.setenv("SSO_JWT_AUDIENCE", "dns-orchestrator")
+
+    def sign(**claims):
+        payload = {
+            "iss": "https://sso.test",
+            "aud": "dns-orchestrator",
+            "sub": "user-1",
+            "exp": int(time.time()) + 3600,
+            **claims
+        }
+        # A claim passed as None is left out of the token
+        payload = {name: value for name, value in payload.items() if value is not None}
+        return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": "test-key"})
+
+    return SSOAuth(), sign
+
+
+def test_local_verification_maps_claims_without_network(tmp_path, monkeypatch):
+    auth, sign = _local_auth(tmp_path, monkeypatch)
+    calls = []
+    auth._client = _mock_sso(calls)
+    token = sign(email="user@example.com", role="admin", permissions=["read:dns"])
+
+    user_data = asyncio.run(auth.authenticate(token))
+    assert calls == []
+    assert user_data["user_info"]["role"] == "admin"
+    assert user_data["user_info"]["permissions"] == ["read:dns"]
+    assert user_data["token_data"]["sub"] == "user-1"
+
+
+def test_local_verification_rejects_wrong_audience(tmp_path, monkeypatch):
+    auth, sign = _local_auth(tmp_path, monkeypatch)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.authenticate(sign(aud="someone-else")))
+    assert exc.value.status_code == 401
+
+
+def test_opaque_token_falls_back_to_remote(tmp_path, monkeypatch):
+    auth, _ = _local_auth(tmp_path, monkeypatch)
+    calls = []
+    auth._client = _mock_sso(calls)
+
+    asyncio.run(auth.authenticate("opaque-token"))
+    assert sorted(calls) == ["/userinfo", "/validate"]
+
+
+def test_failed_user_info_is_not_cached():
+    calls = []
+    userinfo_status = [503]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("/validate"):
+            return httpx.Response(200, json={"sub": "user-1", "exp": time.time() + 3600})
+        return httpx.Response(userinfo_status[0], json={"role": "admin"})
+
+    auth = SSOAuth()
+    auth._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    first = asyncio.run(auth.authenticate("token-a"))
+    assert first["user_info"] == {}
+
+    userinfo_status[0] = 200
+    second = asyncio.run(auth.authenticate("token-a"))
+    assert second["user_info"]["role"] == "admin"
+    assert len(calls) == 4
+
+
+def test_local_verification_requires_issuer_at_startup(tmp_path, monkeypatch):
+    _local_auth(tmp_path, monkeypatch)
+    monkeypatch.delenv("SSO_JWT_ISSUER")
+    with pytest.raises(RuntimeError, match="SSO_JWT_ISSUER"):
+        asyncio.run(SSOAuth().start())
+
+
+def test_local_verification_rejects_token_without_issuer(tmp_path, monkeypatch):
+    auth, sign = _local_auth(tmp_path, monkeypatch)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.authenticate(sign(iss=None)))
+    assert exc.value.status_code == 401
@@ -0,0 +1,126 @@
+import uuid
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.common.etag import etag_matches
+from app.core.database import get_read_db, get_async_read_db
+from app.core.status_cache import status_cache, StatusCache, StatusSnapshot
+from app.routes.v1.routes import router
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    # Every lookup in these tests must be served from the cache
+    app.dependency_overrides[get_read_db] = lambda: None
+    app.dependency_overrides[get_async_read_db] = lambda: None
+    return TestClient(app)
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+
+
+def test_etag_changes_with_status():
+    request_id = uuid.uuid4()
+    pending = StatusSnapshot(id=request_id, status="PENDING", updated_at="2024-01-01T00:00:00")
+    completed = StatusSnapshot(id=request_id, status="COMPLETED", updated_at="2024-01-01T00:00:10")
+    assert pending.etag != completed.etag
+
+
+def test_conditional_get_returns_304():
+    request_id = uuid.uuid4()
+    status_cache.set(StatusSnapshot(id=request_id, status="PENDING", updated_at="2024-01-01T00:00:00"))
+    client = _client()
+
+    first = client.get(f"/api/v1/{request_id}")
+    assert first.status_code == 200
+    assert first.json()["status"] == "PENDING"
+
+    second = client.get(f"/api/v1/{request_id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+
+
+def test_invalidate_drops_cached_status():
+    request_id = uuid.uuid4()
+    status_cache.set(StatusSnapshot(id=request_id, status="PENDING", updated_at=None))
+    status_cache.invalidate(str(request_id))
+    assert status_cache.get(request_id) is None
+
+
+class _FakeRedis:
+    """
+    The Redis calls StatusCache makes, with the set script evaluated in Python.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def register_script(self, source):
+        def run(keys, args):
+            generation, value, ttl = args
+            if self.data.get(keys[1], b"").decode() == generation:
+                self.data[keys[0]] = value.encode()
+                return 1
+            return 0
+        return run
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def incr(self, key):
+        self.redis.data[key] = str(int(self.redis.data.get(key, b"0")) + 1).encode()
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, key):
+        self.redis.data.pop(key, None)
+
+    def execute(self):
+        pass
+
+
+def _shared_cache():
+    cache = StatusCache(maxsize=0, local_ttl=1.0, redis_url="redis://cache", redis_ttl=60)
+    redis = _FakeRedis()
+    cache._redis, cache._set_script = redis, redis.register_script(None)
+    return cache
+
+
+def test_stale_snapshot_is_not_cached_after_invalidation():
+    cache = _shared_cache()
+    request_id = uuid.uuid4()
+    stale = StatusSnapshot(id=request_id, status="PENDING", updated_at="2024-01-01T00:00:00")
+
+    # A reader misses and loads PENDING; a writer commits COMPLETED and
+    # invalidates before the reader stores what it loaded
+    snapshot, generation = cache.read(request_id)
+    assert snapshot is None
+    cache.invalidate(request_id)
+    cache.set(stale, generation=generation)
+    assert cache.get(request_id) is None
+
+    # A reader that missed after the invalidation may store its snapshot
+    fresh = StatusSnapshot(id=request_id, status="COMPLETED", updated_at="2024-01-01T00:00:10")
+    _, generation = cache.read(request_id)
+    cache.set(fresh, generation=generation)
+    assert cache.get(request_id) == fresh
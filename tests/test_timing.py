@@ -0,0 +1,63 @@
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import timing
+
+@pytest.fixture
+def timing_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(timing.settings, "SERVER_TIMING_ENABLED", True)
+    monkeypatch.setattr(timing.settings, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(timing.settings, "PROFILE_HEADER_ENABLED", True)
+    monkeypatch.setattr(timing.settings, "PROFILE_INTERVAL_MS", 1.0)
+    monkeypatch.setattr(timing.settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(timing, "_profiler", None)
+    return timing.settings
+
+def _busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def _client():
+    router = APIRouter(route_class=timing.TimedRoute)
+
+    @router.post("/work")
+    def do_work(payload: dict):
+        with timing.span("stage"):
+            _busy_wait(0.02)
+        with timing.span("commit"):
+            pass
+        with timing.span("commit"):
+            pass
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(timing.ServerTimingMiddleware)
+    return TestClient(app)
+
+def test_span_is_a_no_op_outside_a_timed_request():
+    assert timing.span("stage") is timing._NO_SPAN
+    timing.record_span("sql", 1.0)
+
+def test_server_timing_header_lists_spans(timing_settings):
+    response = _client().post("/work", json={})
+
+    entries = {entry.split(";")[0]: entry for entry in response.headers["server-timing"].split(", ")}
+    assert list(entries) == ["validate", "stage", "commit", "total"]
+    assert float(entries["stage"].split("dur=")[1]) >= 20
+    assert entries["commit"].endswith('desc="2 calls"')
+    assert "profile" not in entries
+
+def test_profile_header_writes_collapsed_stacks(timing_settings, tmp_path):
+    response = _client().post("/work", json={}, headers={"X-Profile": "1"})
+
+    filename = response.headers["server-timing"].split('profile;desc="')[1].split('"')[0]
+    lines = (tmp_path / filename).read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("_busy_wait" in line for line in lines)